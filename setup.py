@@ -59,5 +59,6 @@ setup(
     platforms='any',
     packages=find_packages('src'),
     package_dir={'': 'src'},
-    install_requires=['robotframework', 'robotframework-requests', 'requests-oauthlib']
+    install_requires=['robotframework', 'robotframework-requests', 'requests-oauthlib'],
+    extras_require={'http2': ['httpx[http2]']}
 )
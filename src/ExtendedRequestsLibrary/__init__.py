@@ -21,30 +21,50 @@
 Extended Requests Library - a HTTP client library with OAuth2 support.
 """
 
-try:
-    # pylint: disable=no-name-in-module
-    from urllib.parse import urlparse
-except ImportError:
-    # pylint: disable=import-error
-    # pylint: disable=no-name-in-module
-    from urlparse import urlparse
+from functools import partial
+from hashlib import new as new_hash
+from json import dumps
 import logging
 from oauthlib.oauth2 import BackendApplicationClient
 from oauthlib.oauth2 import LegacyApplicationClient
 import requests
 from requests.auth import HTTPBasicAuth
+from requests.compat import urlencode
+from requests.packages.urllib3.util import Retry
 from requests_oauthlib import OAuth2Session
+from time import time
 from RequestsLibrary import RequestsLibrary
 from robot.api import logger
-from ExtendedRequestsLibrary.keywords import Utility
+from robot.libraries.BuiltIn import RobotNotRunningError
+from ExtendedRequestsLibrary.circuitbreaker import CircuitBreaker
+from ExtendedRequestsLibrary.keywords import Concurrency, Utility
+from ExtendedRequestsLibrary.latency import RequestStatistics
+from ExtendedRequestsLibrary.registry import SessionRegistry
+from ExtendedRequestsLibrary.responsecache import ResponseCache, session_scope
+from ExtendedRequestsLibrary.tokencache import TokenCache
+from ExtendedRequestsLibrary.tokenrefresher import TokenRefresher
+from ExtendedRequestsLibrary.transport import HTTP2Adapter, SessionAdapter
+from ExtendedRequestsLibrary.uploads import CompressedBody, ENCODINGS, MappedFile
+from ExtendedRequestsLibrary.uploads import MultipartEncoder
 from ExtendedRequestsLibrary.version import get_version
+from ExtendedRequestsLibrary.warmup import warm_up
 
 requests.packages.urllib3.disable_warnings()
 logging.getLogger('requests').setLevel(logging.WARNING)
 __version__ = get_version()
 
 
-class ExtendedRequestsLibrary(RequestsLibrary, Utility):
+class _Deprecated(object):
+    """Class attribute that hides the inherited deprecated keyword of the same name."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        raise AttributeError("'%s' is deprecated." % self.name)
+
+
+class ExtendedRequestsLibrary(RequestsLibrary, Concurrency, Utility):
     # pylint: disable=line-too-long
     """ExtendedRequestsLibrary is an extended HTTP client library for
     [http://goo.gl/lES6WM|Robot Framework] with [http://goo.gl/VehoOR|OAuth2] support
@@ -62,6 +82,11 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
     | Log | ${var} |
     | `Delete All Sessions` |
 
+    Example for Background Requests:
+    | ${handle} = | `Start Get Request` | label | /slow/report |
+    | ${var} = | `Get Request` | label | /endpoint |
+    | ${report} = | `Wait For Response` | ${handle} | timeout=60 |
+
     Example for File Upload:
     | &{files} = | Create Dictionary | file1=/path/to/a_file.ext | file2=/path/to/another_file.ext | # Collections library |
     | `Create Client OAuth2 Session` | label | https://token | key | secret | base_url=https://service |
@@ -69,12 +94,44 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
     | Log | ${var} |
 
     Non-inherited Keywords:
+    | `Close All Sessions`                |
+    | `Count JSON Items`                  |
     | `Create Client OAuth2 Session`      |
     | `Create Password OAuth2 Session`    |
+    | `Download To File`                  |
+    | `Enable Circuit Breaker`            |
+    | `Enable Response Cache`             |
+    | `Filter JSON Items`                 |
+    | `Get Circuit Breaker States`        |
+    | `Get Connection Pool Statistics`    |
     | `Get JSON File`                     |
+    | `Get JSON File Cache Statistics`    |
+    | `Get Request Statistics`            |
+    | `Get Response Cache Statistics`     |
+    | `Get Response JSON`                 |
     | `Get Session Object`                |
+    | `Get Token Refresh Count`           |
+    | `Iterate JSON Items`                |
     | `JSON Loads`                        |
     | `Natural Sort List Of Dictionaries` |
+    | `Natural Top N`                     |
+    | `Run Load`                          |
+    | `Send Requests In Parallel`         |
+    | `Set JSON Backend`                  |
+    | `Set Request Compression`           |
+    | `Set Request Deadline`              |
+    | `Set Response Logging`              |
+    | `Set Session Eviction`              |
+    | `Start Delete Request`              |
+    | `Start Get Request`                 |
+    | `Start Head Request`                |
+    | `Start Options Request`             |
+    | `Start Patch Request`               |
+    | `Start Post Request`                |
+    | `Start Put Request`                 |
+    | `Wait For All Responses`            |
+    | `Wait For Response`                 |
+    | `Warm Up Hosts`                     |
 
     Inherited Deprecated Keywords:
     | `Delete`  |
@@ -91,6 +148,15 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
     ROBOT_LIBRARY_SCOPE = 'GLOBAL'
     ROBOT_LIBRARY_VERSION = __version__
 
+    delete = _Deprecated('delete')
+    get = _Deprecated('get')
+    head = _Deprecated('head')
+    options = _Deprecated('options')
+    patch = _Deprecated('patch')
+    post = _Deprecated('post')
+    put = _Deprecated('put')
+    to_json = _Deprecated('to_json')
+
     # pylint: disable=super-init-not-called
     def __init__(self):
         """Extended Request Library class init.
@@ -100,16 +166,20 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         """
         for base in ExtendedRequestsLibrary.__bases__:
             base.__init__(self)
-        self._primers = {}
-        self.cookies = None
-        self.timeout = 90
-        self.verify = False
+        self._cache = SessionRegistry('No sessions created')
+        self._deadline = None
+        self._response_logging = {'content_types': None, 'max_bytes': None, 'mode': 'all'}
+        self._statistics = RequestStatistics()
+        self._urls = {}
 
-    def __getattribute__(self, name):
-        """Returns requested attribute."""
-        if name in ('delete', 'get', 'head', 'options', 'patch', 'post', 'put', 'to_json'):
-            raise AttributeError("'%s' is deprecated." % name)
-        return super(ExtendedRequestsLibrary, self).__getattribute__(name)
+    def close_all_sessions(self):
+        """Closes the connections of all session objects in the cache. The session objects
+        stay in the cache, and open new connections when used again.
+
+        Examples:
+        | Close All Sessions |
+        """
+        self._cache.close_all()
 
     def create_client_oauth2_session(self, *args, **kwargs):
         """Create and return an [http://goo.gl/VehoOR|OAuth2] session object to a server
@@ -124,14 +194,37 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         - ``base_url``: The server base URL.
         - ``headers``: Default headers dictionary.
         - ``cookies``: Default cookies dictionary.
-        - ``timeout``: The connection timeout in seconds.
+        - ``timeout``: The connect and read timeout in seconds.
+        - ``connect_timeout``: The connect timeout in seconds, 10 when neither this
+                               nor ``timeout`` is given.
+        - ``read_timeout``: The read timeout in seconds, 90 when neither this
+                            nor ``timeout`` is given.
         - ``proxies``: The proxy URLs dictionary for HTTP and/or HTTPS communication.
         - ``verify``: Set to True if [http://goo.gl/8p7MOG|Requests] should verify the SSL
                       certificate.
+        - ``pool_connections``: The number of host connection pools to keep.
+        - ``pool_maxsize``: The maximum number of keep-alive connections to keep in each
+                            host connection pool.
+        - ``pool_block``: Set to True to wait for a free connection when the connection pool
+                          is exhausted, instead of opening a throwaway connection.
+        - ``max_retries``: The maximum number of retries each connection should attempt.
+        - ``backoff_factor``: The backoff factor in seconds to apply between retry attempts.
+        - ``status_forcelist``: A list of HTTP status codes that should be retried.
+        - ``http2``: Set to True to send concurrent requests to the same host as multiplexed
+                     HTTP/2 streams over a single connection. Requires
+                     [https://www.python-httpx.org|httpx] with HTTP/2 support, only retries
+                     failed connections, and ignores ``backoff_factor``, ``pool_block``,
+                     ``pool_connections`` and ``status_forcelist``.
+        - ``token_cache``: Set to True, or to a cache file path, to reuse the access token
+                           across sessions and processes until shortly before it expires.
+        - ``warm_up``: How to open connections to the server and token server hosts when
+                       the session is created: ``head`` (default), ``connect``, or ``off``.
 
         Examples:
         | ${var} = | Create Client OAuth2 Session | label | https://token |
         | ${var} = | Create Client OAuth2 Session | label | https://token | key | secret |
+        | ${var} = | Create Client OAuth2 Session | label | https://token | key | secret | token_cache=${True} |
+        | ${var} = | Create Client OAuth2 Session | label | https://token | key | secret | http2=${True} |
         """
         return self._create_oauth2_session(BackendApplicationClient(''), *args, **kwargs)
 
@@ -143,16 +236,38 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         - ``base_url``: The server base URL.
         - ``auth``: A list of NTLM authentication credentials. ['domain', 'username', 'password']
         - ``headers``: Default headers dictionary.
-        - ``timeout``: The connection timeout in seconds.
+        - ``timeout``: The connect and read timeout in seconds.
+        - ``connect_timeout``: The connect timeout in seconds, 10 when neither this
+                               nor ``timeout`` is given.
+        - ``read_timeout``: The read timeout in seconds, 90 when neither this
+                            nor ``timeout`` is given.
         - ``proxies``: The proxy URLs dictionary for HTTP and/or HTTPS communication.
         - ``verify``: Set to True if [http://goo.gl/8p7MOG|Requests] should verify the SSL
                       certificate.
+        - ``pool_connections``: The number of host connection pools to keep.
+        - ``pool_maxsize``: The maximum number of keep-alive connections to keep in each
+                            host connection pool.
+        - ``pool_block``: Set to True to wait for a free connection when the connection pool
+                          is exhausted, instead of opening a throwaway connection.
+        - ``max_retries``: The maximum number of retries each connection should attempt.
+        - ``backoff_factor``: The backoff factor in seconds to apply between retry attempts.
+        - ``status_forcelist``: A list of HTTP status codes that should be retried.
+        - ``warm_up``: How to open a connection to the server host when the session is
+                       created: ``head``, ``connect``, or ``off`` (default).
 
         Examples:
         | @{auth} = | Create List | domain | username | password |
         | ${var} = | Create NTLM Session | label | https://service | auth=@{auth} |
+        | ${var} = | Create NTLM Session | label | https://service | auth=@{auth} | pool_maxsize=50 |
         """
-        return super(ExtendedRequestsLibrary, self).create_ntlm_session(label, base_url, auth, **kwargs)
+        adapter_kwargs = self._pop_adapter_kwargs(kwargs)
+        timeout_kwargs = self._pop_timeout_kwargs(kwargs)
+        warm_up_mode = kwargs.pop('warm_up', 'off')
+        session = super(ExtendedRequestsLibrary, self).create_ntlm_session(label, base_url, auth, **kwargs)
+        self._mount_adapters(session, **adapter_kwargs)
+        self._set_request_defaults(session, cookies=kwargs.get('cookies', None), **timeout_kwargs)
+        self._warm_up(session, [base_url], warm_up_mode)
+        return session
 
     def create_password_oauth2_session(self, *args, **kwargs):
         # pylint: disable=line-too-long
@@ -170,10 +285,31 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         - ``base_url``: The server base URL.
         - ``headers``: Default headers dictionary.
         - ``cookies``: Default cookies dictionary.
-        - ``timeout``: The connection timeout in seconds.
+        - ``timeout``: The connect and read timeout in seconds.
+        - ``connect_timeout``: The connect timeout in seconds, 10 when neither this
+                               nor ``timeout`` is given.
+        - ``read_timeout``: The read timeout in seconds, 90 when neither this
+                            nor ``timeout`` is given.
         - ``proxies``: The proxy URLs dictionary for HTTP and/or HTTPS communication.
         - ``verify``: Set to True if [http://goo.gl/8p7MOG|Requests] should verify the SSL
                       certificate.
+        - ``pool_connections``: The number of host connection pools to keep.
+        - ``pool_maxsize``: The maximum number of keep-alive connections to keep in each
+                            host connection pool.
+        - ``pool_block``: Set to True to wait for a free connection when the connection pool
+                          is exhausted, instead of opening a throwaway connection.
+        - ``max_retries``: The maximum number of retries each connection should attempt.
+        - ``backoff_factor``: The backoff factor in seconds to apply between retry attempts.
+        - ``status_forcelist``: A list of HTTP status codes that should be retried.
+        - ``http2``: Set to True to send concurrent requests to the same host as multiplexed
+                     HTTP/2 streams over a single connection. Requires
+                     [https://www.python-httpx.org|httpx] with HTTP/2 support, only retries
+                     failed connections, and ignores ``backoff_factor``, ``pool_block``,
+                     ``pool_connections`` and ``status_forcelist``.
+        - ``token_cache``: Set to True, or to a cache file path, to reuse the access token
+                           across sessions and processes until shortly before it expires.
+        - ``warm_up``: How to open connections to the server and token server hosts when
+                       the session is created: ``head`` (default), ``connect``, or ``off``.
 
         Examples:
         | ${var} = | Create Password OAuth2 Session | label | https://token |
@@ -192,16 +328,45 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         - ``base_url``: The server base URL.
         - ``auth``: A list of HTTP basic authentication credentials. ['username', 'password']
         - ``headers``: Default headers dictionary.
-        - ``timeout``: The connection timeout in seconds.
+        - ``timeout``: The connect and read timeout in seconds.
+        - ``connect_timeout``: The connect timeout in seconds, 10 when neither this
+                               nor ``timeout`` is given.
+        - ``read_timeout``: The read timeout in seconds, 90 when neither this
+                            nor ``timeout`` is given.
         - ``proxies``: The proxy URLs dictionary for HTTP and/or HTTPS communication.
         - ``verify``: Set to True if [http://goo.gl/8p7MOG|Requests] should verify the SSL
                       certificate.
+        - ``pool_connections``: The number of host connection pools to keep.
+        - ``pool_maxsize``: The maximum number of keep-alive connections to keep in each
+                            host connection pool.
+        - ``pool_block``: Set to True to wait for a free connection when the connection pool
+                          is exhausted, instead of opening a throwaway connection.
+        - ``max_retries``: The maximum number of retries each connection should attempt.
+        - ``backoff_factor``: The backoff factor in seconds to apply between retry attempts.
+        - ``status_forcelist``: A list of HTTP status codes that should be retried.
+        - ``http2``: Set to True to send concurrent requests to the same host as multiplexed
+                     HTTP/2 streams over a single connection. Requires
+                     [https://www.python-httpx.org|httpx] with HTTP/2 support, only retries
+                     failed connections, and ignores ``backoff_factor``, ``pool_block``,
+                     ``pool_connections`` and ``status_forcelist``.
+        - ``warm_up``: How to open a connection to the server host when the session is
+                       created: ``head``, ``connect``, or ``off`` (default).
 
         Examples:
         | @{auth} = | Create List | username | password |
         | ${var} = | Create Session | label | https://service | auth=@{auth} |
+        | @{status} = | Create List | 502 | 503 | 504 |
+        | ${var} = | Create Session | label | https://service | pool_maxsize=50 | status_forcelist=@{status} |
+        | ${var} = | Create Session | label | https://service | http2=${True} |
         """
-        return super(ExtendedRequestsLibrary, self).create_session(label, base_url, **kwargs)
+        adapter_kwargs = self._pop_adapter_kwargs(kwargs)
+        timeout_kwargs = self._pop_timeout_kwargs(kwargs)
+        warm_up_mode = kwargs.pop('warm_up', 'off')
+        session = super(ExtendedRequestsLibrary, self).create_session(label, base_url, **kwargs)
+        self._mount_adapters(session, **adapter_kwargs)
+        self._set_request_defaults(session, cookies=kwargs.get('cookies', None), **timeout_kwargs)
+        self._warm_up(session, [base_url], warm_up_mode)
+        return session
 
     def delete_request(self, label, uri, **kwargs):
         """Send a DELETE request on the session object found in the cache using the given
@@ -220,17 +385,10 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         Examples:
         | ${var} = | Delete Request | label | /endpoint |
         """
-        allow_redirects = bool(kwargs.pop('allow_redirects', None))
-        data = self._utf8_urlencode(kwargs.pop('data', None))
-        headers = kwargs.pop('headers', None)
-        session = self._cache.switch(label)
-        response = session.delete(self._get_url(session, uri), allow_redirects=allow_redirects,
-                                  cookies=self.cookies, data=data, headers=headers,
-                                  timeout=self.timeout, **kwargs)
-        return self._finalize_response(session, response, 'DELETE')
+        return self._request('delete', label, uri, **kwargs)
 
     def delete_session(self, label):
-        """Removes session object using the given ``label``.
+        """Removes session object using the given ``label``, and closes its connections.
 
         Arguments:
         - ``label``: A case and space insensitive string to identify
@@ -239,14 +397,155 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         Examples:
         | Delete Session | label |
         """
-        self._cache.switch(label)
-        index = self._cache.current_index
-        # pylint: disable=protected-access
-        self._cache.current = self._cache._no_current
-        # pylint: disable=protected-access
-        self._cache._connections[index - 1] = None
-        # pylint: disable=protected-access
-        self._cache._aliases['x-%s-x' % label] = self._cache._aliases.pop(label)
+        self._cache.remove(label)
+
+    def download_to_file(self, label, uri, path, **kwargs):
+        """Download the response content of a GET request on the session object found in
+        the cache using the given ``label`` to the given ``path``, and returns the download
+        ``size`` in bytes, content ``digest``, ``elapsed`` time in seconds and ``throughput``
+        in bytes per second.
+
+        The response content is streamed to the file in chunks, so the memory usage stays
+        flat regardless of the content size.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+        - ``uri``: The request URI that will be combined with ``base_url``
+                   if it was specified in the Session object.
+        - ``path``: The path to the file to write the response content to.
+        - ``headers``: Headers dictionary that will be accompanied the request.
+        - ``params``: A key-value pairs dictionary that will be urlencoded and sent as GET data.
+        - ``allow_redirects``: A flag to allow connection redirects.
+        - ``chunk_size``: The number of bytes to read and write at a time.
+        - ``algorithm``: The content digest algorithm, i.e.: md5, sha1, sha256.
+
+        Examples:
+        | &{var} = | Download To File | label | /export | /path/to/export.csv |
+        | &{var} = | Download To File | label | /export | /path/to/export.csv | algorithm=md5 |
+        | Should Be Equal | ${var.digest} | ${expected} |
+        """
+        algorithm = kwargs.pop('algorithm', 'sha256')
+        chunk_size = int(kwargs.pop('chunk_size', 65536))
+        digest = new_hash(algorithm)
+        size = 0
+        start = time()
+        response = self._request('get', label, uri, stream=True, **kwargs)
+        try:
+            response.raise_for_status()
+            with open(path, 'wb') as writer:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    writer.write(chunk)
+        finally:
+            response.close()
+        elapsed = time() - start
+        return {
+            'algorithm': algorithm,
+            'digest': digest.hexdigest(),
+            'elapsed': elapsed,
+            'path': path,
+            'size': size,
+            'throughput': size / elapsed if elapsed > 0 else float(size)
+        }
+
+    def enable_circuit_breaker(self, label, threshold=5, cooldown=30):
+        """Enables a circuit breaker per host on the session object found in the cache
+        using the given ``label``.
+
+        After ``threshold`` consecutive connection errors or timeouts, the circuit of the host
+        opens, and requests to it fail at once for ``cooldown`` seconds. The first request
+        after that is sent as a probe, the circuit closes again when it gets a response,
+        and opens for another ``cooldown`` seconds otherwise.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+        - ``threshold``: The number of consecutive failures that opens the circuit.
+        - ``cooldown``: The number of seconds the circuit stays open before a probe request.
+
+        Examples:
+        | Enable Circuit Breaker | label |
+        | Enable Circuit Breaker | label | threshold=3 | cooldown=60 |
+        """
+        session = self._cache.switch(label)
+        session.circuit_breaker = CircuitBreaker(int(threshold), float(cooldown))
+        for adapter in session.adapters.values():
+            if isinstance(adapter, (HTTP2Adapter, SessionAdapter)):
+                adapter.circuit_breaker = session.circuit_breaker
+
+    def enable_response_cache(self, label, max_bytes=16777216, path=None):
+        """Enables the response cache of `Get Request` and `Head Request` on the session
+        object found in the cache using the given ``label``.
+
+        Responses are reused while the Cache-Control max-age or Expires header allows it.
+        Stale responses with ETag or Last-Modified header are revalidated with a conditional
+        request, and reused when the server replies 304 Not Modified. Responses with
+        Cache-Control no-store or Vary * header are never cached.
+
+        Responses are only reused by requests with the same headers, on sessions with the
+        same default headers, cookies, authentication and OAuth2 credentials, so the other
+        Vary headers are always satisfied.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+        - ``max_bytes``: The maximum size in bytes of the responses kept in memory,
+                         the least recently used responses are removed first.
+        - ``path``: The directory to also keep responses in, so they are reused
+                    when they are no longer in memory, and by later runs.
+
+        Examples:
+        | Enable Response Cache | label |
+        | Enable Response Cache | label | max_bytes=1048576 | path=/tmp/responses |
+        """
+        self._cache.switch(label).response_cache = ResponseCache(
+            int(max_bytes) if max_bytes is not None else None, path)
+
+    def get_circuit_breaker_states(self, label):
+        """Returns the circuit breaker state of each host requested with the session object
+        found in the cache using the given ``label``, keyed by its ``scheme://host:port``:
+        - ``state``: ``closed`` when requests are sent, ``open`` when requests fail at once,
+                     or ``half-open`` while the probe request is sent.
+        - ``failures``: The number of consecutive connection errors or timeouts.
+        - ``opened_at``: The timestamp the circuit was last opened at.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+
+        Examples:
+        | &{var} = | Get Circuit Breaker States | label |
+        | Should Be Equal | ${var['https://service:443'].state} | closed |
+        """
+        breaker = getattr(self._cache.switch(label), 'circuit_breaker', None)
+        if not isinstance(breaker, CircuitBreaker):
+            raise RuntimeError("Circuit breaker is not enabled for '%s'." % label)
+        return breaker.states()
+
+    def get_connection_pool_statistics(self, label=None):
+        """Returns the connection pool usage of the session object found in the cache
+        using the given ``label``, or of all session objects when ``label`` is not given.
+
+        Each connection pool is keyed by its ``scheme://host:port``, and reports:
+        - ``opened``: The number of connections opened.
+        - ``reused``: The number of requests sent over an already used connection, at least.
+        - ``idle``: The number of keep-alive connections currently available in the pool.
+        - ``maxsize``: The maximum number of keep-alive connections kept in the pool.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+
+        Examples:
+        | &{var} = | Get Connection Pool Statistics | label |
+        | &{var} = | Get Connection Pool Statistics |
+        """
+        if label is not None:
+            return self._get_pool_statistics(self._cache.switch(label))
+        return dict((alias, self._get_pool_statistics(session))
+                    for (alias, session) in self._cache.items())
 
     def get_request(self, label, uri, **kwargs):
         """Send a GET request on the session object found in the cache using the given ``label``.
@@ -263,14 +562,91 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         Examples:
         | ${var} = | Get Request | label | /endpoint |
         """
-        allow_redirects = bool(kwargs.pop('allow_redirects', None))
-        headers = kwargs.pop('headers', None)
-        params = self._utf8_urlencode(kwargs.pop('params', None))
-        session = self._cache.switch(label)
-        response = session.get(self._get_url(session, uri), allow_redirects=allow_redirects,
-                               cookies=self.cookies, headers=headers, params=params,
-                               timeout=self.timeout, **kwargs)
-        return self._finalize_response(session, response, 'GET')
+        return self._request('get', label, uri, **kwargs)
+
+    def get_request_statistics(self, label=None):
+        """Returns the latency statistics of the requests sent with the session object found
+        in the cache using the given ``label``, or of all session objects keyed by their label
+        when ``label`` is not given.
+
+        The statistics have the number of requests as ``count``, and ``mean``, ``min``,
+        ``max``, ``p50``, ``p90`` and ``p99`` latencies in seconds, with percentiles accurate
+        within 2%. ``phases`` has the mean ``dns``, ``connect``, ``tls``, time to first byte
+        ``ttfb``, and ``download`` durations, and ``endpoints`` has the same statistics per
+        method and URI template, where numeric, UUID and long hexadecimal path segments are
+        replaced by ``{id}``. Responses reused from the response cache are not included, and
+        streamed responses are only timed up to their headers.
+
+        The phase durations of each request are also available as the response ``timings``.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+
+        Examples:
+        | &{var} = | Get Request Statistics | label |
+        | Log | ${var.p99} |
+        | Log | ${var.endpoints['GET /api/users/{id}'].p90} |
+        """
+        return self._statistics.summary(label)
+
+    def get_response_cache_statistics(self, label):
+        """Returns the response cache usage of the session object found in the cache
+        using the given ``label``:
+        - ``hits``: The number of responses reused without a request.
+        - ``misses``: The number of responses not found in the cache, or changed.
+        - ``revalidations``: The number of stale responses reused after a 304 Not Modified.
+        - ``entries``: The number of responses kept in memory.
+        - ``bytes``: The size in bytes of the responses kept in memory.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+
+        Examples:
+        | &{var} = | Get Response Cache Statistics | label |
+        | Should Be Equal As Integers | ${var.misses} | 1 |
+        """
+        cache = getattr(self._cache.switch(label), 'response_cache', None)
+        if not isinstance(cache, ResponseCache):
+            raise RuntimeError("Response cache is not enabled for '%s'." % label)
+        return cache.statistics()
+
+    def get_response_json(self, response=None, label=None):
+        """Returns [http://goo.gl/o0X6Pp|JSON] object of the given response, or of the last
+        response of the session object found in the cache using the given ``label``.
+
+        The body is decoded once, with the `Set JSON Backend` parser, and tagged objects are
+        restored, see `JSON Loads`. The object is kept on the response and released with it,
+        so later calls with the same response return it without decoding again. The same
+        object is returned by every call, copy it before changing it.
+
+        Arguments:
+        - ``response``: The response object.
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache, used when ``response`` is not given.
+
+        Examples:
+        | ${resp} = | Get Request | label | /endpoint |
+        | ${var} = | Get Response JSON | ${resp} |
+        | ${var} = | Get Response JSON | label=label |
+        """
+        if response is None:
+            if label is None:
+                raise ValueError('Either response or label is required.')
+            response = getattr(self._cache.switch(label), 'last_resp', None)
+            if response is None:
+                raise RuntimeError("No response has been received with '%s'." % label)
+        content = response.content
+        # decoded object of the same body and parser
+        parsed = getattr(response, '_parsed_json', None)
+        same_parser = isinstance(parsed, tuple) and parsed[0] is self._json_loads
+        if same_parser and parsed[1] is content:
+            return parsed[2]
+        value = self._json_loads(content)
+        # pylint: disable=protected-access
+        response._parsed_json = (self._json_loads, content, value)
+        return value
 
     def get_session_object(self, label):
         """Returns the session object found in the cache using the given ``label``
@@ -286,6 +662,23 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         logger.debug(vars(response))
         return response
 
+    def get_token_refresh_count(self, label):
+        """Returns the number of times the OAuth2 access token of the session object found
+        in the cache using the given ``label`` has been renewed.
+
+        OAuth2 access tokens are renewed shortly before they expire, using the refresh token
+        when the token server issued one, or by fetching a new access token otherwise.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+
+        Examples:
+        | ${var} = | Get Token Refresh Count | label |
+        """
+        refresher = getattr(self._cache.switch(label), 'token_refresher', None)
+        return refresher.count if isinstance(refresher, TokenRefresher) else 0
+
     def head_request(self, label, uri, **kwargs):
         """Send a HEAD request on the session object found in the cache using the given ``label``.
 
@@ -300,13 +693,7 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         Examples:
         | ${var} = | Head Request | label | /endpoint |
         """
-        allow_redirects = bool(kwargs.pop('allow_redirects', None))
-        headers = kwargs.pop('headers', None)
-        session = self._cache.switch(label)
-        response = session.head(self._get_url(session, uri), allow_redirects=allow_redirects,
-                                cookies=self.cookies, headers=headers, timeout=self.timeout,
-                                **kwargs)
-        return self._finalize_response(session, response, 'HEAD')
+        return self._request('head', label, uri, **kwargs)
 
     def options_request(self, label, uri, **kwargs):
         """Send a OPTIONS request on the session object found in the cache
@@ -323,13 +710,7 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         Examples:
         | ${var} = | Options Request | label | /endpoint |
         """
-        allow_redirects = bool(kwargs.pop('allow_redirects', None))
-        headers = kwargs.pop('headers', None)
-        session = self._cache.switch(label)
-        response = session.options(self._get_url(session, uri), allow_redirects=allow_redirects,
-                                   cookies=self.cookies, headers=headers, timeout=self.timeout,
-                                   **kwargs)
-        return self._finalize_response(session, response, 'OPTIONS')
+        return self._request('options', label, uri, **kwargs)
 
     def patch_request(self, label, uri, **kwargs):
         # pylint: disable=line-too-long
@@ -345,25 +726,24 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
                     sent as raw body content data or binary data.
         - ``headers``: Headers dictionary that will be accompanied the request.
         - ``files``: Multiple file names and file paths dictionary data to be uploaded.
+        - ``data_file``: The path to a file to be sent as raw body content data.
+        - ``compress``: The content encoding to compress the body with: ``gzip``, ``deflate``
+                        or ``br``, or ``off``. Defaults to the `Set Request Compression`
+                        setting of the session.
         - ``allow_redirects``: A flag to allow connection redirects.
 
+        Files are streamed while the request is sent, and closed afterwards. The returned
+        response has ``upload_size`` in bytes as sent, after compression, and
+        ``upload_throughput`` in bytes per second.
+
         Examples:
         | &{files} = | Create Dictionary | file1=/path/to/a_file.ext | file2=/path/to/another_file.ext | # Collections library |
         | ${var} = | Patch Request | label | /endpoint | files=&{files} |
+        | ${var} = | Patch Request | label | /endpoint | data_file=/path/to/a_file.ext |
+        | ${var} = | Patch Request | label | /endpoint | data_file=/path/to/a_file.csv | compress=gzip |
         """
         # pylint: disable=line-too-long
-        allow_redirects = bool(kwargs.pop('allow_redirects', None))
-        data = self._utf8_urlencode(kwargs.pop('data', None))
-        files = kwargs.pop('files', None)
-        if files is not None:
-            for key, value in list(files.items()):
-                files[key] = open(value, 'rb')
-        headers = kwargs.pop('headers', None)
-        session = self._cache.switch(label)
-        response = session.patch(self._get_url(session, uri), allow_redirects=allow_redirects,
-                                 cookies=self.cookies, data=data, files=files, headers=headers,
-                                 timeout=self.timeout, **kwargs)
-        return self._finalize_response(session, response, 'PATCH')
+        return self._request('patch', label, uri, **kwargs)
 
     def post_request(self, label, uri, **kwargs):
         # pylint: disable=line-too-long
@@ -378,25 +758,24 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
                     sent as raw body content data or binary data.
         - ``headers``: Headers dictionary that will be accompanied the request.
         - ``files``: Multiple file names and file paths dictionary data to be uploaded.
+        - ``data_file``: The path to a file to be sent as raw body content data.
+        - ``compress``: The content encoding to compress the body with: ``gzip``, ``deflate``
+                        or ``br``, or ``off``. Defaults to the `Set Request Compression`
+                        setting of the session.
         - ``allow_redirects``: A flag to allow connection redirects.
 
+        Files are streamed while the request is sent, and closed afterwards. The returned
+        response has ``upload_size`` in bytes as sent, after compression, and
+        ``upload_throughput`` in bytes per second.
+
         Examples:
         | &{files} = | Create Dictionary | file1=/path/to/a_file.ext | file2=/path/to/another_file.ext | # Collections library |
         | ${var} = | Post Request | label | /endpoint | files=&{files} |
+        | ${var} = | Post Request | label | /endpoint | data_file=/path/to/a_file.ext |
+        | ${var} = | Post Request | label | /endpoint | data_file=/path/to/a_file.csv | compress=gzip |
         """
         # pylint: disable=line-too-long
-        allow_redirects = bool(kwargs.pop('allow_redirects', None))
-        data = self._utf8_urlencode(kwargs.pop('data', None))
-        files = kwargs.pop('files', None)
-        if files is not None:
-            for key, value in list(files.items()):
-                files[key] = open(value, 'rb')
-        headers = kwargs.pop('headers', None)
-        session = self._cache.switch(label)
-        response = session.post(self._get_url(session, uri), allow_redirects=allow_redirects,
-                                cookies=self.cookies, data=data, files=files, headers=headers,
-                                timeout=self.timeout, **kwargs)
-        return self._finalize_response(session, response, 'POST')
+        return self._request('post', label, uri, **kwargs)
 
     def put_request(self, label, uri, **kwargs):
         """Send a PUT request on the session object found in the cache using the given ``label``.
@@ -409,22 +788,167 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         - ``data``: A key-value pairs dictionary that will be urlencoded and
                     sent as raw body content data or binary data.
         - ``headers``: Headers dictionary that will be accompanied the request.
+        - ``data_file``: The path to a file to be sent as raw body content data.
+        - ``compress``: The content encoding to compress the body with: ``gzip``, ``deflate``
+                        or ``br``, or ``off``. Defaults to the `Set Request Compression`
+                        setting of the session.
         - ``allow_redirects``: A flag to allow connection redirects.
 
+        Files are streamed while the request is sent, and closed afterwards. The returned
+        response has ``upload_size`` in bytes as sent, after compression, and
+        ``upload_throughput`` in bytes per second.
+
         Examples:
         | ${var} = | Put Request | label | /endpoint |
+        | ${var} = | Put Request | label | /endpoint | data_file=/path/to/a_file.ext |
+        | ${var} = | Put Request | label | /endpoint | data_file=/path/to/a_file.csv | compress=gzip |
+        """
+        return self._request('put', label, uri, **kwargs)
+
+    def set_request_compression(self, label, encoding='gzip', min_bytes=1024):
+        """Sets the content encoding the request bodies of `Patch Request`, `Post Request` and
+        `Put Request` on the session object found in the cache using the given ``label``
+        are compressed with.
+
+        Bodies are compressed in blocks while the request is sent, and sent with the matching
+        ``Content-Encoding`` header. The ``compress`` argument of a request keyword takes
+        precedence over this setting, and compresses the body regardless of its size.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+        - ``encoding``: ``gzip``, ``deflate``, ``br`` (requires the brotli package),
+                        or ``off`` to stop compressing request bodies.
+        - ``min_bytes``: The minimum body size in bytes to compress, bodies of unknown
+                         size are always compressed.
+
+        Examples:
+        | Set Request Compression | label |
+        | Set Request Compression | label | br | min_bytes=65536 |
+        | ${var} = | Post Request | label | /endpoint | data_file=/path/to/a_file.csv |
+        | Set Request Compression | label | off |
         """
-        allow_redirects = bool(kwargs.pop('allow_redirects', None))
-        data = self._utf8_urlencode(kwargs.pop('data', None))
-        headers = kwargs.pop('headers', None)
         session = self._cache.switch(label)
-        response = session.put(self._get_url(session, uri), allow_redirects=allow_redirects,
-                               cookies=self.cookies, data=data, headers=headers,
-                               timeout=self.timeout, **kwargs)
-        return self._finalize_response(session, response, 'PUT')
+        encoding = str(encoding).lower()
+        if encoding in ('false', 'none', 'off'):
+            session.request_compression = None
+            return
+        if encoding not in ENCODINGS:
+            raise ValueError("Unknown content encoding '%s'." % encoding)
+        session.request_compression = (encoding, int(min_bytes))
+
+    def set_request_deadline(self, seconds=None):
+        """Sets the number of seconds all requests sent until the end of the current test
+        can take together. Each request only waits for the remaining budget, and fails
+        right away once the budget is spent.
+
+        Arguments:
+        - ``seconds``: The time budget in seconds, the deadline is removed when not given.
+
+        Examples:
+        | Set Request Deadline | 30 |
+        | ${var} = | Get Request | label | /endpoint |
+        | ${var} = | Get Request | label | /other-endpoint |
+        | Set Request Deadline | # wait for the session timeouts only |
+        """
+        self._deadline = ((self._get_test_name(), time() + float(seconds))
+                          if seconds is not None else None)
+
+    def set_response_logging(self, mode='all', max_bytes=None, content_types=None):
+        """Sets how the response content is logged by all request keywords.
+
+        The response content is only logged when the log level is DEBUG or TRACE,
+        and never read just to be logged when the response is streamed.
+
+        Arguments:
+        - ``mode``: ``all`` to log every response, ``failure`` to log only responses with
+                    4xx or 5xx status code, or ``off`` to stop logging response content.
+        - ``max_bytes``: The maximum number of content bytes to log, the rest is truncated.
+        - ``content_types``: A list of content type prefixes to log, i.e.: application/json,
+                             text/. Response content of any other content type is not logged.
+
+        Examples:
+        | Set Response Logging | failure | max_bytes=4096 |
+        | @{types} = | Create List | application/json | text/ |
+        | Set Response Logging | max_bytes=1024 | content_types=@{types} |
+        | Set Response Logging | off |
+        """
+        mode = str(mode).lower()
+        if mode not in ('all', 'failure', 'off'):
+            raise ValueError("Unknown response logging mode '%s'." % mode)
+        self._response_logging = {
+            'content_types': list(content_types) if content_types is not None else None,
+            'max_bytes': int(max_bytes) if max_bytes is not None else None,
+            'mode': mode
+        }
+
+    def set_session_eviction(self, idle_timeout=None, max_sessions=None):
+        """Sets when session objects are removed from the cache and their connections closed.
+
+        Arguments:
+        - ``idle_timeout``: The number of seconds a session object can stay unused
+                            before it is removed.
+        - ``max_sessions``: The maximum number of session objects in the cache, the least
+                            recently used session objects are removed first.
+
+        Examples:
+        | Set Session Eviction | idle_timeout=300 |
+        | Set Session Eviction | max_sessions=100 |
+        | Set Session Eviction | # never remove session objects |
+        """
+        self._cache.idle_timeout = float(idle_timeout) if idle_timeout is not None else None
+        self._cache.max_sessions = int(max_sessions) if max_sessions is not None else None
+
+    def warm_up_hosts(self, label, urls, mode='connect', connections=1):
+        """Open connections to the given URL hosts, all hosts at the same time, inside
+        the connection pools of the session object found in the cache using the given
+        ``label``, so the following requests don't have to wait for them.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+        - ``urls``: A list of URLs of the hosts to connect to, or a single URL.
+        - ``mode``: ``connect`` to open bare TCP and TLS connections, ``head`` to send
+                    HEAD requests, or ``off``.
+        - ``connections``: The number of connections to open to each host, up to the
+                           connection pool size.
+
+        Examples:
+        | @{urls} = | Create List | https://service | https://other-service |
+        | Warm Up Hosts | label | ${urls} |
+        | Warm Up Hosts | label | ${urls} | connections=10 |
+        """
+        self._warm_up(self._cache.switch(label), urls, mode, connections)
+
+    @staticmethod
+    def _compress_body(session, encoding, data, headers, kwargs):
+        """Returns the request body compressed with the given or the session content encoding,
+        and the request headers"""
+        compression = getattr(session, 'request_compression', None)
+        (default, min_bytes) = compression if isinstance(compression, tuple) else (None, 0)
+        if encoding is not None:
+            min_bytes = 0
+        encoding = str(encoding if encoding is not None else default).lower()
+        if encoding in ('', 'false', 'none', 'off'):
+            return data, headers
+        if data is None and kwargs.get('json', None) is not None:
+            data = dumps(kwargs.pop('json')).encode('utf-8')
+            headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+        if isinstance(data, (list, tuple)):
+            # form fields are encoded as requests does for an uncompressed body
+            data = urlencode(data, doseq=True)
+            headers = dict({'Content-Type': 'application/x-www-form-urlencoded'},
+                           **(headers or {}))
+        # bodies of unknown size are always compressed
+        if data is None or (hasattr(data, '__len__') and len(data) < min_bytes):
+            return data, headers
+        return (CompressedBody(data, encoding),
+                dict(headers or {}, **{'Content-Encoding': encoding}))
 
     def _create_oauth2_session(self, client, *args, **kwargs):
         """Create and return an OAuth2 session to a server."""
+        token_cache = kwargs.pop('token_cache', None)
+        warm_up_mode = kwargs.pop('warm_up', 'head')
         fetch_kwargs = kwargs.copy()
         kargs = dict(enumerate(args))
         argv = {
@@ -450,36 +974,227 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
         if kw_message:
             log_message += ', %s' % kw_message
         logger.debug(log_message)
-        self._register_urls(base_url=kwargs.get('base_url', None), token_url=argv.get('token_url'))
         session = OAuth2Session(client=client)
         self._session_init(session, **kwargs)
+        self._warm_up(session, [kwargs.get('base_url', None), argv.get('token_url')], warm_up_mode)
         fetch_kwargs.pop('base_url', None)
         fetch_kwargs.pop('cookies', None)
         fetch_kwargs.pop('headers', None)
         fetch_kwargs.pop('proxies', None)
-        fetch_kwargs.pop('timeout', None)
-        session.fetch_token(argv.get('token_url'), **fetch_kwargs)
+        self._pop_adapter_kwargs(fetch_kwargs)
+        self._pop_timeout_kwargs(fetch_kwargs)
+        fetch_kwargs['timeout'] = session.timeout
+        # identifies the session credentials in every run, unlike the access tokens
+        session.credentials_key = TokenCache.key(argv.get('token_url'), argv.get('tenant_id'),
+                                                 argv.get('username'),
+                                                 fetch_kwargs.get('scope', None))
+        self._fetch_token(session, argv, token_cache, **fetch_kwargs)
+        session.token_refresher = TokenRefresher(
+            session, partial(self._fetch_token, session, argv, token_cache, **fetch_kwargs),
+            argv.get('token_url'), auth=fetch_kwargs.get('auth', None),
+            verify=fetch_kwargs.get('verify', None))
+        session.register_compliance_hook('protected_request', session.token_refresher)
         self._cache.register(session, alias=argv.get('label'))
         return session
 
     @staticmethod
-    def _finalize_response(session, response, method):
-        """Store last response object, logging, and return the response"""
+    def _fetch_token(session, argv, token_cache=None, **kwargs):
+        """Fetch an OAuth2 access token, or reuse a cached one if token cache is enabled"""
+        token_url = argv.get('token_url')
+        if str(token_cache).lower() in ('', 'false', 'none'):
+            return session.fetch_token(token_url, **kwargs)
+        cache = TokenCache(None if str(token_cache).lower() == 'true' else token_cache)
+        key = cache.key(token_url, argv.get('tenant_id'), argv.get('username'),
+                        kwargs.get('scope', None))
+        session.token = cache.fetch(key, lambda: session.fetch_token(token_url, **kwargs))
+        return session.token
+
+    def _finalize_response(self, session, response, method, label=None):
+        """Store last response object, timing, logging, and return the response"""
         session.last_resp = response
-        logger.debug("%s response: %s" % (method, response.content))
+        timings = getattr(response, 'timings', None)
+        # responses reused from the response cache have been timed already
+        if label is not None and isinstance(timings, dict) and 'download' not in timings:
+            timings['download'] = max(0.0, time() - response.received_at)
+            phases = dict(timings)
+            for previous in response.history:
+                for (phase, value) in getattr(previous, 'timings', {}).items():
+                    phases[phase] = phases.get(phase, 0.0) + value
+            url = response.history[0].url if response.history else response.url
+            self._statistics.record(label, method, url, phases)
+        if self._should_log_response(response):
+            content = response.content
+            max_bytes = self._response_logging.get('max_bytes')
+            if max_bytes is not None and len(content) > max_bytes:
+                content = '%s... (%d bytes truncated)' % (content[:max_bytes],
+                                                          len(content) - max_bytes)
+            logger.debug("%s response: %s" % (method, content))
         return response
 
-    def _register_url(self, url=None):
-        """Make HEAD request to warm up the destination server"""
-        host = urlparse(url).hostname
-        if host not in self._primers:
-            requests.head('%s' % url, verify=False)
-            self._primers[host] = 1
+    @staticmethod
+    def _get_pool_statistics(session):
+        """Returns connection pool usage of all adapters mounted on the given session."""
+        statistics = {}
+        adapters = dict((id(adapter), adapter) for adapter in session.adapters.values())
+        for adapter in adapters.values():
+            if not hasattr(adapter, 'poolmanager'):
+                # HTTP/2 adapters multiplex requests instead of pooling connections
+                continue
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                # idle slots are pre-filled with None until a connection is returned
+                queue = list(pool.pool.queue) if pool.pool is not None else []
+                # pools of the same host with different TLS settings are reported together
+                usage = statistics.setdefault('%s://%s:%s' % (pool.scheme, pool.host, pool.port),
+                                              {'idle': 0, 'maxsize': 0, 'opened': 0, 'reused': 0})
+                usage['idle'] += len([conn for conn in queue if conn is not None])
+                usage['maxsize'] += pool.pool.maxsize if pool.pool is not None else 0
+                usage['opened'] += pool.num_connections
+                usage['reused'] += max(0, pool.num_requests - pool.num_connections)
+        return statistics
+
+    def _get_request_timeout(self, session):
+        """Returns the session connect and read timeouts bounded by the remaining deadline"""
+        timeout = getattr(session, 'timeout', None)
+        if self._deadline is None:
+            return timeout
+        (test_name, deadline) = self._deadline
+        if test_name != self._get_test_name():
+            # the deadline only spans the test it was set in
+            self._deadline = None
+            return timeout
+        remaining = deadline - time()
+        if remaining <= 0:
+            raise AssertionError('Request deadline exceeded.')
+        if timeout is None:
+            return remaining
+        return tuple(min(value, remaining) for value in timeout)
+
+    def _get_test_name(self):
+        """Returns the current test name, or None outside of a test"""
+        try:
+            return self.builtin.get_variable_value('${TEST NAME}')
+        except RobotNotRunningError:
+            return None
+
+    def _get_url(self, session, uri):
+        """Returns the URL of the given URI combined with the session base URL"""
+        key = (session.url, uri)
+        url = self._urls.get(key, None)
+        if url is None:
+            url = super(ExtendedRequestsLibrary, self)._get_url(session, uri)
+            if len(self._urls) >= 4096:
+                self._urls.clear()
+            self._urls[key] = url
+        return url
+
+    def _is_debug_logged(self):
+        """Returns True if debug messages are logged"""
+        try:
+            return self.builtin.get_variable_value('${LOG LEVEL}') in ('DEBUG', 'TRACE')
+        except RobotNotRunningError:
+            return True
+
+    def _mount_adapters(self, session, **kwargs):
+        """Mount connection pooling and retry enabled adapters on the given session"""
+        status_forcelist = kwargs.get('status_forcelist', None)
+        if status_forcelist is not None:
+            status_forcelist = [int(status) for status in status_forcelist]
+        http2 = self.builtin.convert_to_boolean(kwargs.get('http2', False))
+        for prefix in ('http://', 'https://'):
+            if http2:
+                session.mount(prefix, HTTP2Adapter(
+                    pool_maxsize=int(kwargs.get('pool_maxsize', 10)),
+                    max_retries=int(kwargs.get('max_retries', 3))))
+                continue
+            retries = Retry(total=int(kwargs.get('max_retries', 3)),
+                            backoff_factor=float(kwargs.get('backoff_factor', 0.10)),
+                            status_forcelist=status_forcelist)
+            session.mount(prefix, SessionAdapter(
+                pool_connections=int(kwargs.get('pool_connections', 10)),
+                pool_maxsize=int(kwargs.get('pool_maxsize', 10)),
+                pool_block=self.builtin.convert_to_boolean(kwargs.get('pool_block', False)),
+                max_retries=retries))
+
+    @staticmethod
+    def _pop_adapter_kwargs(kwargs):
+        """Remove and return adapter arguments from the given keyword arguments"""
+        return dict((key, kwargs.pop(key)) for key in
+                    ('backoff_factor', 'http2', 'max_retries', 'pool_block', 'pool_connections',
+                     'pool_maxsize', 'status_forcelist') if key in kwargs)
+
+    def _open_upload(self, data=None, files=None, data_file=None):
+        """Returns streaming request body of the given upload arguments"""
+        if files:
+            if data is not None and not isinstance(data, dict):
+                raise ValueError('Data must be a dictionary when files are uploaded.')
+            return MultipartEncoder(fields=data, files=files)
+        if data_file is not None:
+            return MappedFile(data_file)
+        return self._utf8_urlencode(data)
+
+    @staticmethod
+    def _pop_timeout_kwargs(kwargs):
+        """Remove and return timeout arguments from the given keyword arguments"""
+        return dict((key, kwargs.pop(key)) for key in
+                    ('connect_timeout', 'read_timeout', 'timeout') if key in kwargs)
+
+    def _request(self, method, label, uri, **kwargs):
+        """Send a request on the session object found in the cache using the given label,
+        and return the finalized response"""
+        allow_redirects = bool(kwargs.pop('allow_redirects', None))
+        headers = kwargs.pop('headers', None)
+        params = kwargs.pop('params', None)
+        if params is not None:
+            params = self._utf8_urlencode(params)
+        data = kwargs.pop('data', None)
+        files = kwargs.pop('files', None)
+        data_file = kwargs.pop('data_file', None)
+        compress = kwargs.pop('compress', None)
+        # upload files are only opened once nothing else can fail before they are closed
+        session = self._cache.switch(label)
+        url = self._get_url(session, uri)
+        timeout = self._get_request_timeout(session)
+        if data is not None or files or data_file is not None:
+            data = self._open_upload(data, files, data_file)
+        if isinstance(data, MultipartEncoder):
+            headers = dict(headers or {}, **{'Content-Type': data.content_type})
+        start = time()
+        try:
+            if method in ('patch', 'post', 'put'):
+                (data, headers) = self._compress_body(session, compress, data, headers, kwargs)
+            # sessions created by inherited keywords have no default request cookies
+            send = partial(getattr(session, method), url, allow_redirects=allow_redirects,
+                           cookies=getattr(session, 'request_cookies', None), data=data,
+                           params=params, timeout=timeout, **kwargs)
+            if method in ('get', 'head') and not kwargs.get('stream', False):
+                response = self._send_cached(session, method.upper(),
+                                             '%s?%s' % (url, params) if params else url,
+                                             headers, lambda request_headers:
+                                             send(headers=request_headers))
+            else:
+                response = send(headers=headers)
+        finally:
+            if isinstance(data, (CompressedBody, MappedFile, MultipartEncoder)):
+                data.close()
+        if method in ('patch', 'post', 'put'):
+            elapsed = time() - start
+            response.upload_size = (len(data) if hasattr(data, '__len__') else
+                                    getattr(data, 'size', None))
+            response.upload_throughput = (response.upload_size / elapsed
+                                          if response.upload_size and elapsed > 0 else None)
+        return self._finalize_response(session, response, method.upper(), label)
 
-    def _register_urls(self, base_url=None, token_url=None):
-        """Make HEAD requests for both base URL and token URL"""
-        self._register_url(base_url)
-        self._register_url(token_url)
+    @staticmethod
+    def _send_cached(session, method, url, headers, send):
+        """Send a request through the session response cache when it is enabled"""
+        cache = getattr(session, 'response_cache', None)
+        if not isinstance(cache, ResponseCache):
+            return send(headers)
+        return cache.fetch(method, url, headers, send, session_scope(session))
 
     def _session_init(self, session=None, **kwargs):
         """Initialize session"""
@@ -493,7 +1208,45 @@ class ExtendedRequestsLibrary(RequestsLibrary, Utility):
             session.headers.update(headers)
         session.proxies = proxies if proxies is not None else session.proxies
         session.verify = self.builtin.convert_to_boolean(kwargs.get('verify', None))
-        # cant pass these into the Session anymore
-        self.cookies = kwargs.get('cookies', None)
-        self.timeout = kwargs.get('timeout', 90)
-        self.verify = kwargs.get('verify', False)
+        self._mount_adapters(session, **kwargs)
+        self._set_request_defaults(session, **kwargs)
+
+    @staticmethod
+    def _set_request_defaults(session, **kwargs):
+        """Store default cookies, connect and read timeouts on the given session"""
+        timeout = kwargs.get('timeout', None)
+        connect_timeout = kwargs.get('connect_timeout', None)
+        read_timeout = kwargs.get('read_timeout', None)
+        if connect_timeout is None:
+            connect_timeout = timeout if timeout is not None else 10
+        if read_timeout is None:
+            read_timeout = timeout if timeout is not None else 90
+        session.request_cookies = kwargs.get('cookies', None)
+        session.timeout = (float(connect_timeout), float(read_timeout))
+
+    def _should_log_response(self, response):
+        """Returns True if the response content should be logged"""
+        policy = self._response_logging
+        if policy.get('mode') == 'off' or not self._is_debug_logged():
+            return False
+        # streamed response content that has not been read yet
+        if getattr(response, '_content', None) is False:
+            return False
+        if policy.get('mode') == 'failure' and int(response.status_code) < 400:
+            return False
+        content_types = policy.get('content_types')
+        if content_types is not None:
+            content_type = response.headers.get('content-type', '') or ''
+            return any(content_type.startswith(prefix) for prefix in content_types)
+        return True
+
+    def _warm_up(self, session, urls, mode, connections=1):
+        """Open connections to the given URL hosts inside the session connection pools"""
+        if str(mode).lower() == 'off':
+            return
+        # warming up is part of setting up the session, not bounded by the request deadline
+        timeout = getattr(session, 'timeout', None)
+        errors = warm_up(session, urls, mode, connections,
+                         timeout[0] if isinstance(timeout, tuple) else timeout)
+        for (host, error) in sorted(errors.items()):
+            logger.warn('Unable to warm up %s: %s' % (host, error))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from threading import Lock
+from time import time
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.packages.urllib3.util import parse_url
+
+
+class CircuitBreaker(object):
+    """Per host circuit breaker that opens after consecutive connection errors or timeouts,
+    fails requests at once while open, and lets a single probe request through after
+    the cool-down period to decide whether to close again."""
+
+    def __init__(self, threshold=5, cooldown=30):
+        self.cooldown = cooldown
+        self.threshold = threshold
+        self._lock = Lock()
+        # host: {'failures', 'opened_at', 'state'}
+        self._hosts = {}
+
+    def after(self, host, error=None):
+        """Records the outcome of a request to the given host."""
+        with self._lock:
+            circuit = self._circuit(host)
+            if error is None:
+                circuit.update(failures=0, opened_at=None, state='closed')
+                return
+            circuit['failures'] += 1
+            if circuit['state'] == 'half-open' or circuit['failures'] >= int(self.threshold):
+                circuit.update(opened_at=time(), state='open')
+
+    def before(self, host):
+        """Raises an error if requests to the given host must fail at once."""
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit['state'] == 'closed':
+                return
+            retry_at = circuit['opened_at'] + float(self.cooldown)
+            if circuit['state'] == 'open' and retry_at <= time():
+                circuit['state'] = 'half-open'
+                return
+            message = ('Circuit breaker is %s for %s after %d failures.' %
+                       (circuit['state'], host, circuit['failures']))
+        raise RequestsConnectionError(message)
+
+    @staticmethod
+    def host(url):
+        """Returns the scheme://host:port of the given URL."""
+        parsed = parse_url(url)
+        return '%s://%s:%s' % (parsed.scheme, parsed.host,
+                               parsed.port or {'http': 80, 'https': 443}.get(parsed.scheme))
+
+    def states(self):
+        """Returns the state, number of consecutive failures and opening timestamp
+        of all hosts."""
+        with self._lock:
+            return dict((host, dict(circuit)) for (host, circuit) in self._hosts.items())
+
+    def _circuit(self, host):
+        """Returns the circuit of the given host."""
+        return self._hosts.setdefault(host, {'failures': 0, 'opened_at': None,
+                                             'state': 'closed'})
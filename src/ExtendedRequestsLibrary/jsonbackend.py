@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from decimal import Decimal
+import json
+from ExtendedRequestsLibrary.restorer import restore, restore_all, tagged
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+BACKENDS = ('auto', 'orjson', 'simplejson', 'stdlib', 'ujson')
+MODES = ('decimal', 'float')
+# decoding arguments of the supported backend and number mode pairs
+_OPTIONS = {
+    ('orjson', 'float'): {},
+    ('simplejson', 'decimal'): {'use_decimal': True},
+    ('simplejson', 'float'): {},
+    ('stdlib', 'decimal'): {'parse_float': Decimal},
+    ('stdlib', 'float'): {},
+    ('ujson', 'float'): {}
+}
+
+
+def get_loads(backend='auto', mode='decimal'):
+    """Returns the function that decodes a JSON string with the given backend, into
+    Decimal numbers in ``decimal`` mode, or into float numbers in ``float`` mode,
+    and restores its tagged objects.
+
+    The ``auto`` backend is the standard library in ``decimal`` mode, and the fastest
+    installed one of orjson, ujson and the standard library in ``float`` mode.
+    """
+    backend = str(backend).lower()
+    mode = str(mode).lower()
+    if backend not in BACKENDS:
+        raise ValueError("Unknown JSON backend '%s'." % backend)
+    if mode not in MODES:
+        raise ValueError("Unknown JSON number mode '%s'." % mode)
+    if backend == 'auto':
+        backend = _get_auto_backend(mode)
+    module = {'orjson': orjson, 'simplejson': simplejson, 'stdlib': json, 'ujson': ujson}[backend]
+    if module is None:
+        raise ValueError("JSON backend '%s' is not installed." % backend)
+    if (backend, mode) not in _OPTIONS:
+        raise ValueError("JSON backend '%s' can't decode into Decimal numbers." % backend)
+    kwargs = _OPTIONS[(backend, mode)]
+    # object hooks called from C are faster than restoring after decoding where available
+    hooked = backend in ('simplejson', 'stdlib')
+
+    def loads(text):
+        """Returns the JSON object of the given JSON string with tagged objects restored."""
+        if not tagged(text):
+            return module.loads(text, **kwargs)
+        if hooked:
+            return module.loads(text, object_hook=restore, **kwargs)
+        return restore_all(module.loads(text, **kwargs))
+    return loads
+
+
+def _get_auto_backend(mode):
+    """Returns the fastest installed backend that supports the given number mode."""
+    if mode == 'float':
+        for (backend, module) in (('orjson', orjson), ('ujson', ujson)):
+            if module is not None:
+                return backend
+    return 'stdlib'
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from codecs import getincrementaldecoder
+import json
+import re
+
+_NON_SPACE = re.compile(r'\S')
+_SCALAR_END = re.compile(r'[\s,\]}]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURE = re.compile(r'["\[\]{}]')
+
+
+class _Reader(object):
+    """Buffered reader of the JSON values in the text chunks of a JSON document, that only
+    keeps the text of the value being read."""
+
+    def __init__(self, chunks):
+        self.buffer = ''
+        self.pos = 0
+        self._chunks = iter(chunks)
+        self._decoder = getincrementaldecoder('utf-8')()
+        # nesting depth and whether inside a string, of the value being read
+        self._depth = 0
+        self._in_string = False
+
+    def compact(self):
+        """Drops the text that has been read, once there is enough of it."""
+        if self.pos > 65536:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+
+    def fill(self):
+        """Appends the next chunk to the buffer, returns False at the end of the document."""
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decoder.decode(chunk)
+            if chunk:
+                self.buffer += chunk
+                return True
+        return False
+
+    def next(self):
+        """Consumes and returns the next structural character, or '' at the end."""
+        char = self.peek()
+        self.pos += len(char)
+        return char
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it, or '' at the end."""
+        while True:
+            match = _NON_SPACE.search(self.buffer, self.pos)
+            if match is not None:
+                self.pos = match.start()
+                return self.buffer[self.pos]
+            self.pos = len(self.buffer)
+            if not self.fill():
+                return ''
+
+    def value(self, keep=True):
+        """Consumes the next value, and returns its JSON text, or None when not kept."""
+        first = self.peek()
+        if not first:
+            raise ValueError('Unexpected end of JSON document.')
+        (start, index) = (self.pos, self.pos + 1)
+        scalar = first not in '"[{'
+        self._depth = 1 if first in '[{' else 0
+        self._in_string = first == '"'
+        scan = self._scan_scalar if scalar else self._scan_structure
+        while True:
+            (index, done) = scan(index)
+            if done:
+                break
+            if not keep:
+                # skipped values are never held in memory as a whole
+                self.buffer = self.buffer[index:]
+                (start, index) = (0, 0)
+            if not self.fill():
+                if scalar:
+                    break
+                raise ValueError('Unexpected end of JSON document.')
+        self.pos = index
+        return self.buffer[start:index] if keep else None
+
+    def _scan_scalar(self, index):
+        """Returns the end of the number or literal from the given index, and whether
+        the end is in the buffer."""
+        match = _SCALAR_END.search(self.buffer, index)
+        if match is None:
+            return (len(self.buffer), False)
+        return (match.start(), True)
+
+    def _scan_string(self, index):
+        """Returns the index after the closing quote of the string from the given index,
+        and whether the closing quote is in the buffer."""
+        while True:
+            match = _STRING_SPECIAL.search(self.buffer, index)
+            if match is None:
+                return (len(self.buffer), False)
+            if match.group() == '"':
+                return (match.end(), True)
+            if match.end() >= len(self.buffer):
+                # the escaped character may not have been read yet
+                return (match.start(), False)
+            index = match.end() + 1
+
+    def _scan_structure(self, index):
+        """Returns the end of the string, array or object from the given index, and whether
+        the end is in the buffer."""
+        while True:
+            if self._in_string:
+                (index, closed) = self._scan_string(index)
+                if not closed:
+                    return (index, False)
+                self._in_string = False
+                if self._depth == 0:
+                    return (index, True)
+                continue
+            match = _STRUCTURE.search(self.buffer, index)
+            if match is None:
+                return (len(self.buffer), False)
+            index = match.end()
+            if match.group() == '"':
+                self._in_string = True
+                continue
+            self._depth += 1 if match.group() in '[{' else -1
+            if self._depth == 0:
+                return (index, True)
+
+
+def iter_items(chunks, prefix='item', loads=json.loads):
+    """Yields the values at the given prefix of the JSON document in the given text or
+    bytes chunks one at a time, decoded with the given loads function.
+
+    The prefix is a dot separated path of object keys, and ``item`` for the items of an
+    array, i.e.: ``item`` for the items of a top-level array, ``data.item`` for the items
+    of the array in the ``data`` key of a top-level object. An empty prefix yields the
+    whole document.
+    """
+    reader = _Reader(chunks)
+    path = [name for name in (prefix or '').split('.') if name]
+    for text in _walk(reader, path):
+        yield loads(text)
+
+
+def _walk(reader, path):
+    """Yields the JSON text of the values at the given path of the value being read."""
+    if not path:
+        yield reader.value()
+        return
+    char = reader.peek()
+    if char == '[' and path[0] == 'item':
+        texts = _walk_array(reader, path[1:])
+    elif char == '{':
+        texts = _walk_object(reader, path[0], path[1:])
+    else:
+        reader.value(keep=False)
+        return
+    for text in texts:
+        yield text
+
+
+def _walk_array(reader, path):
+    """Yields the JSON text of the values at the given path of the items of the array
+    being read."""
+    reader.next()
+    if reader.peek() == ']':
+        reader.next()
+        return
+    while True:
+        for text in _walk(reader, path):
+            yield text
+        reader.compact()
+        char = reader.next()
+        if char == ']':
+            return
+        if char != ',':
+            raise ValueError("Expecting ',' or ']' delimiter in JSON array.")
+
+
+def _walk_object(reader, name, path):
+    """Yields the JSON text of the values at the given path of the value of the given key
+    of the object being read, the values of the other keys are skipped."""
+    reader.next()
+    if reader.peek() == '}':
+        reader.next()
+        return
+    while True:
+        key = json.loads(reader.value())
+        if reader.next() != ':':
+            raise ValueError("Expecting ':' delimiter in JSON object.")
+        if key == name:
+            for text in _walk(reader, path):
+                yield text
+        else:
+            reader.value(keep=False)
+        reader.compact()
+        char = reader.next()
+        if char == '}':
+            return
+        if char != ',':
+            raise ValueError("Expecting ',' or '}' delimiter in JSON object.")
@@ -21,8 +21,10 @@
 Extended Requests Library - a HTTP client library with OAuth2 support.
 """
 
+from ExtendedRequestsLibrary.keywords.concurrency import Concurrency
 from ExtendedRequestsLibrary.keywords.utility import Utility
 
 __all__ = [
+    'Concurrency',
     'Utility'
 ]
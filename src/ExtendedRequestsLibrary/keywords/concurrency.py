@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from functools import partial
+from itertools import count
+from multiprocessing.pool import ThreadPool
+from threading import Lock, Thread
+from time import sleep, time
+from robot.api import logger
+from ExtendedRequestsLibrary.latency import LatencyHistogram
+try:
+    from queue import Queue
+except ImportError:
+    # pylint: disable=import-error
+    from Queue import Queue
+
+
+class Concurrency(object):
+    """Concurrency keywords for Requests operations."""
+
+    def __init__(self):
+        self._handles = []
+        self._pool = None
+
+    def run_load(self, label, requests, duration=10, rate=None, concurrency=10, max_p99=None,
+                 max_error_rate=None):
+        # pylint: disable=line-too-long
+        """Send requests repeatedly on the session object found in the cache using the given
+        ``label`` for ``duration`` seconds, and returns the load test result.
+
+        Without ``rate``, each of the ``concurrency`` workers sends the next request as soon as
+        it gets the previous response. With ``rate``, requests are scheduled at that rate, and
+        their latency is measured from the time they were scheduled, so a slow server is not
+        hidden by fewer requests being sent. Scheduled requests that no worker could send before
+        the end are reported as ``missed``.
+
+        The result has the number of ``requests`` sent, the ``duration`` in seconds,
+        the ``throughput`` in requests per second, the number of ``errors``, ``error_counts``
+        keyed by status code or error name, and ``latency`` with ``count``, ``mean``, ``min``,
+        ``max``, ``p50``, ``p90`` and ``p99`` latencies in seconds, and its ``histogram`` as
+        a list of bucket upper bound and count pairs.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+        - ``requests``: A request dictionary, or a list of request dictionaries sent in turn,
+                        as described in `Send Requests In Parallel` keyword.
+        - ``duration``: The number of seconds to send requests for.
+        - ``rate``: The number of requests per second to schedule.
+        - ``concurrency``: The number of workers sending requests at the same time.
+        - ``max_p99``: Fail when the 99th percentile latency is higher, in seconds.
+        - ``max_error_rate``: Fail when the ratio of failed requests is higher, i.e.: 0.01.
+
+        Examples:
+        | &{request} = | Create Dictionary | uri=/endpoint | params=${params} | # Collections library |
+        | &{var} = | Run Load | label | ${request} | duration=30 | concurrency=20 |
+        | &{var} = | Run Load | label | ${request} | duration=60 | rate=100 | max_p99=0.5 | max_error_rate=0.01 |
+        """
+        # pylint: disable=line-too-long
+        requests = list(requests) if isinstance(requests, (list, tuple)) else [requests]
+        state = {'error_counts': {}, 'histogram': LatencyHistogram(), 'lock': Lock(),
+                 'missed': 0, 'sequence': count()}
+        start = time()
+        end = start + float(duration)
+        tasks = Queue() if rate is not None else None
+        workers = [Thread(target=self._run_load_worker,
+                          args=(label, requests, end, tasks, state))
+                   for _ in range(max(1, int(concurrency)))]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+        if tasks is not None:
+            self._schedule_load(tasks, start, end, float(rate), len(workers))
+        for worker in workers:
+            worker.join()
+        elapsed = time() - start
+        histogram = state['histogram']
+        errors = sum(state['error_counts'].values())
+        result = {
+            'duration': elapsed,
+            'error_counts': state['error_counts'],
+            'errors': errors,
+            'latency': dict(histogram.summary(), histogram=histogram.buckets()),
+            'missed': state['missed'],
+            'requests': histogram.count,
+            'throughput': histogram.count / elapsed if elapsed > 0 else 0.0
+        }
+        logger.info('Sent %d requests in %.3f seconds, %.1f requests per second, %d errors, '
+                    'p99 latency %s seconds.' % (histogram.count, elapsed,
+                                                 result['throughput'], errors,
+                                                 result['latency']['p99']))
+        if max_p99 is not None and (result['latency']['p99'] or 0) > float(max_p99):
+            raise AssertionError('p99 latency %.3f seconds is higher than %s seconds.' %
+                                 (result['latency']['p99'], max_p99))
+        error_rate = float(errors) / histogram.count if histogram.count else 0.0
+        if max_error_rate is not None and error_rate > float(max_error_rate):
+            raise AssertionError('Error rate %.4f is higher than %s.' %
+                                 (error_rate, max_error_rate))
+        return result
+
+    def send_requests_in_parallel(self, label, requests, concurrency=10):
+        # pylint: disable=line-too-long
+        """Send multiple requests concurrently on the session object found in the cache
+        using the given ``label``, and returns the responses in the same order as ``requests``.
+
+        Any error raised by a request is collected in place of its response,
+        the remaining requests are still sent.
+
+        Arguments:
+        - ``label``: A case and space insensitive string to identify
+                     the Session object in the cache.
+        - ``requests``: A list of request dictionaries, each with ``method`` (defaults to GET),
+                        ``uri``, and any other argument accepted by the matching
+                        ``* Request`` keyword, i.e.: ``data``, ``headers``, ``params``.
+        - ``concurrency``: The maximum number of requests in flight at the same time.
+
+        Examples:
+        | &{first} = | Create Dictionary | method=POST | uri=/endpoint | data=${data} | # Collections library |
+        | &{second} = | Create Dictionary | uri=/endpoint | params=${params} | # Collections library |
+        | @{requests} = | Create List | ${first} | ${second} |
+        | @{var} = | Send Requests In Parallel | label | ${requests} | concurrency=20 |
+        """
+        # pylint: disable=line-too-long
+        requests = list(requests)
+        if not requests:
+            return []
+        pool = ThreadPool(max(1, min(int(concurrency), len(requests))))
+        try:
+            responses = pool.map(partial(self._send_request_safely, label), requests)
+        finally:
+            pool.close()
+            pool.join()
+        self._log_errors(responses)
+        return responses
+
+    def start_delete_request(self, label, uri, **kwargs):
+        """Start sending a DELETE request in the background, and returns a handle
+        that can be waited on using `Wait For Response`.
+
+        Arguments are the same as `Delete Request` keyword.
+
+        Examples:
+        | ${handle} = | Start Delete Request | label | /endpoint |
+        | ${var} = | Wait For Response | ${handle} |
+        """
+        return self._start_request('delete', label, uri, **kwargs)
+
+    def start_get_request(self, label, uri, **kwargs):
+        """Start sending a GET request in the background, and returns a handle
+        that can be waited on using `Wait For Response`.
+
+        Arguments are the same as `Get Request` keyword.
+
+        Examples:
+        | ${handle} = | Start Get Request | label | /endpoint |
+        | ${var} = | Wait For Response | ${handle} |
+        """
+        return self._start_request('get', label, uri, **kwargs)
+
+    def start_head_request(self, label, uri, **kwargs):
+        """Start sending a HEAD request in the background, and returns a handle
+        that can be waited on using `Wait For Response`.
+
+        Arguments are the same as `Head Request` keyword.
+
+        Examples:
+        | ${handle} = | Start Head Request | label | /endpoint |
+        | ${var} = | Wait For Response | ${handle} |
+        """
+        return self._start_request('head', label, uri, **kwargs)
+
+    def start_options_request(self, label, uri, **kwargs):
+        """Start sending an OPTIONS request in the background, and returns a handle
+        that can be waited on using `Wait For Response`.
+
+        Arguments are the same as `Options Request` keyword.
+
+        Examples:
+        | ${handle} = | Start Options Request | label | /endpoint |
+        | ${var} = | Wait For Response | ${handle} |
+        """
+        return self._start_request('options', label, uri, **kwargs)
+
+    def start_patch_request(self, label, uri, **kwargs):
+        """Start sending a PATCH request in the background, and returns a handle
+        that can be waited on using `Wait For Response`.
+
+        Arguments are the same as `Patch Request` keyword.
+
+        Examples:
+        | ${handle} = | Start Patch Request | label | /endpoint |
+        | ${var} = | Wait For Response | ${handle} |
+        """
+        return self._start_request('patch', label, uri, **kwargs)
+
+    def start_post_request(self, label, uri, **kwargs):
+        """Start sending a POST request in the background, and returns a handle
+        that can be waited on using `Wait For Response`.
+
+        Arguments are the same as `Post Request` keyword.
+
+        Examples:
+        | ${handle} = | Start Post Request | label | /endpoint |
+        | ${var} = | Wait For Response | ${handle} |
+        """
+        return self._start_request('post', label, uri, **kwargs)
+
+    def start_put_request(self, label, uri, **kwargs):
+        """Start sending a PUT request in the background, and returns a handle
+        that can be waited on using `Wait For Response`.
+
+        Arguments are the same as `Put Request` keyword.
+
+        Examples:
+        | ${handle} = | Start Put Request | label | /endpoint |
+        | ${var} = | Wait For Response | ${handle} |
+        """
+        return self._start_request('put', label, uri, **kwargs)
+
+    def wait_for_all_responses(self, timeout=None):
+        """Wait for all requests started in the background, and returns their responses
+        in the same order as they were started.
+
+        Any error raised by a request is collected in place of its response.
+
+        Arguments:
+        - ``timeout``: The maximum number of seconds to wait for all responses,
+                       waits indefinitely when not given.
+
+        Examples:
+        | Start Get Request | label | /endpoint |
+        | Start Post Request | label | /endpoint |
+        | @{var} = | Wait For All Responses | timeout=30 |
+        """
+        deadline = None if timeout is None else time() + float(timeout)
+        responses = []
+        while self._handles:
+            remaining = None if deadline is None else max(0, deadline - time())
+            handle = self._handles[0]
+            handle.wait(remaining)
+            if not handle.ready():
+                raise AssertionError('Not all responses received within %s seconds.' % timeout)
+            self._handles.pop(0)
+            responses.append(self._get_result_safely(handle))
+        self._log_errors(responses)
+        return responses
+
+    def wait_for_response(self, handle, timeout=None):
+        """Wait for the request started in the background, and returns its response.
+
+        Any error raised by the request is raised again by this keyword.
+
+        Arguments:
+        - ``handle``: The handle returned by any of ``Start * Request`` keywords.
+        - ``timeout``: The maximum number of seconds to wait for the response,
+                       waits indefinitely when not given.
+
+        Examples:
+        | ${handle} = | Start Get Request | label | /endpoint |
+        | ${var} = | Wait For Response | ${handle} | timeout=30 |
+        """
+        handle.wait(None if timeout is None else float(timeout))
+        if not handle.ready():
+            raise AssertionError('Response not received within %s seconds.' % timeout)
+        if handle in self._handles:
+            self._handles.remove(handle)
+        return handle.get()
+
+    @staticmethod
+    def _get_result_safely(handle):
+        """Returns the handle result, or the raised error on failure."""
+        # pylint: disable=broad-except
+        try:
+            return handle.get()
+        except Exception as error:
+            return error
+
+    @staticmethod
+    def _log_errors(responses):
+        """Logs collected request errors."""
+        for index, response in enumerate(responses):
+            if isinstance(response, Exception):
+                logger.warn('Request #%d failed: %s' % (index, response))
+
+    def _run_load_worker(self, label, requests, end, tasks, state):
+        """Send requests in turn until the end, or until no task is scheduled anymore."""
+        while True:
+            if tasks is None:
+                scheduled = time()
+                if scheduled >= end:
+                    return
+            else:
+                scheduled = tasks.get()
+                if scheduled is None:
+                    return
+                if time() >= end:
+                    with state['lock']:
+                        state['missed'] += 1
+                    continue
+            request = requests[next(state['sequence']) % len(requests)]
+            response = self._send_request_safely(label, request)
+            latency = time() - scheduled
+            if isinstance(response, Exception):
+                error = type(response).__name__
+            elif int(getattr(response, 'status_code', 0)) >= 400:
+                error = str(response.status_code)
+            else:
+                error = None
+            with state['lock']:
+                state['histogram'].add(latency)
+                if error is not None:
+                    state['error_counts'][error] = state['error_counts'].get(error, 0) + 1
+
+    @staticmethod
+    def _schedule_load(tasks, start, end, rate, workers):
+        """Schedule tasks at the given rate until the end, then stop the workers."""
+        for index in count():
+            scheduled = start + index / rate
+            if scheduled >= end:
+                break
+            delay = scheduled - time()
+            if delay > 0:
+                sleep(delay)
+            tasks.put(scheduled)
+        for _ in range(workers):
+            tasks.put(None)
+
+    def _send_request(self, label, request):
+        """Send a request described by the given request dictionary."""
+        kwargs = dict(request)
+        method = kwargs.pop('method', 'GET')
+        uri = kwargs.pop('uri', None)
+        return getattr(self, '%s_request' % method.lower())(label, uri, **kwargs)
+
+    def _send_request_safely(self, label, request):
+        """Send a request and returns the raised error instead of the response on failure."""
+        # pylint: disable=broad-except
+        try:
+            return self._send_request(label, request)
+        except Exception as error:
+            return error
+
+    def _start_request(self, method, label, uri, **kwargs):
+        """Start sending a request in the background and returns its handle."""
+        if self._pool is None:
+            self._pool = ThreadPool(10)
+        handle = self._pool.apply_async(getattr(self, '%s_request' % method),
+                                        (label, uri), kwargs)
+        self._handles.append(handle)
+        return handle
@@ -21,14 +21,13 @@
 Extended Requests Library - a HTTP client library with OAuth2 support.
 """
 
-from collections import namedtuple, OrderedDict
-from decimal import Decimal
-from json import loads
-# import numpy as np
-from re import split, sub
 from robot.api import logger
 from robot.libraries.BuiltIn import BuiltIn
-from robot.libraries.OperatingSystem import OperatingSystem
+from ExtendedRequestsLibrary.jsonbackend import get_loads
+from ExtendedRequestsLibrary.jsonstream import iter_items
+from ExtendedRequestsLibrary.naturalsort import natural_sort, natural_top
+from ExtendedRequestsLibrary.restorer import restore
+from ExtendedRequestsLibrary.templatecache import TemplateCache
 
 
 class Utility(object):
@@ -36,12 +35,67 @@ class Utility(object):
 
     def __init__(self):
         self._builtin = BuiltIn()
-        self._os = OperatingSystem()
+        self._json_loads = get_loads()
+        self._templates = TemplateCache()
+
+    def count_json_items(self, source, prefix='item', condition=None):
+        """Returns the number of [http://goo.gl/o0X6Pp|JSON] values at the given ``prefix`` of
+        a response or a file, that match the given ``condition``.
+
+        The values are decoded and counted one at a time, see `Iterate JSON Items`.
+
+        Arguments:
+        - ``source``: A response object, or the path to a JSON file.
+        - ``prefix``: The dot separated path of the values, ``item`` for array items.
+        - ``condition``: A Python expression of the value named ``item`` that is true for
+                         the values to count, all values are counted when not given.
+
+        Examples:
+        | ${var} = | Count JSON Items | ${response} | data.item |
+        | ${var} = | Count JSON Items | /path/to/records.json | condition=item['status'] == 'failed' |
+        """
+        match = self._compile_condition(condition)
+        return sum(1 for item in self.iterate_json_items(source, prefix) if match(item))
+
+    def filter_json_items(self, source, condition, prefix='item', limit=None):
+        """Returns the list of [http://goo.gl/o0X6Pp|JSON] values at the given ``prefix`` of
+        a response or a file, that match the given ``condition``.
+
+        The values are decoded one at a time, see `Iterate JSON Items`, only the matching
+        values are kept.
+
+        Arguments:
+        - ``source``: A response object, or the path to a JSON file.
+        - ``condition``: A Python expression of the value named ``item`` that is true for
+                         the values to return.
+        - ``prefix``: The dot separated path of the values, ``item`` for array items.
+        - ``limit``: The maximum number of values to return, the rest of the source
+                     is not read once it is reached.
+
+        Examples:
+        | @{var} = | Filter JSON Items | ${response} | item['status'] == 'failed' | data.item |
+        | @{var} = | Filter JSON Items | /path/to/records.json | item['id'] > 100 | limit=10 |
+        """
+        match = self._compile_condition(condition)
+        limit = int(limit) if limit is not None else None
+        items = []
+        if limit is not None and limit <= 0:
+            return items
+        for item in self.iterate_json_items(source, prefix):
+            if match(item):
+                items.append(item)
+                if len(items) == limit:
+                    break
+        return items
 
     def get_json_file(self, path):
         """Returns [http://goo.gl/o0X6Pp|JSON] object from [http://goo.gl/o0X6Pp|JSON] file
         with all variables replaced.
 
+        The file is split into text and variables once, and kept until it is modified.
+        Later calls only replace the variables whose values changed, see
+        `Get JSON File Cache Statistics`.
+
         Arguments:
         - ``path``: The path to JSON file.
 
@@ -58,12 +112,57 @@ class Utility(object):
         | @{var} = | Get JSON File | request.json |
         | # [{'key2': 'value2', 'bad': False, 'good': True, 'key': Decimal('5.5')}] |
         """
-        content = self._os.get_file(path)
-        content = self._builtin.replace_variables(content)
-        content = sub(r'(False|True)', lambda match: match.group(1).lower(), content)
+        (template, hit) = self._templates.get(path)
+        if hit:
+            logger.debug("Reusing cached template of '%s'." % path)
+        content = template.render(self._builtin.replace_variables)
         logger.debug(content)
         return self.json_loads(content)
 
+    def get_json_file_cache_statistics(self):
+        """Returns the `Get JSON File` template cache usage:
+        - ``hits``: The number of files reused without being read.
+        - ``misses``: The number of files read, because they were new or modified.
+        - ``entries``: The number of files kept in memory.
+
+        Examples:
+        | &{var} = | Get JSON File Cache Statistics |
+        | Should Be Equal As Integers | ${var.hits} | 1 |
+        """
+        return self._templates.statistics()
+
+    def iterate_json_items(self, source, prefix='item', chunk_size=65536):
+        """Returns an iterator over the [http://goo.gl/o0X6Pp|JSON] values at the given
+        ``prefix`` of a response or a file, that reads and decodes one value at a time.
+
+        Only the value being decoded is kept in memory, when the response is sent with
+        ``stream=${True}``, or the values are read from a file. The values are decoded
+        with the `Set JSON Backend` parser, and tagged objects are restored.
+
+        A ``FOR`` loop expands all values before its first round, without the text and
+        the rest of the document. `Count JSON Items` and `Filter JSON Items` go through
+        the values one at a time.
+
+        Arguments:
+        - ``source``: A response object, or the path to a JSON file.
+        - ``prefix``: The dot separated path of the values, ``item`` for the items of
+                      a top-level array, ``data.item`` for the items of the array in the
+                      ``data`` key of a top-level object, or empty for the whole document.
+        - ``chunk_size``: The number of bytes to read at a time.
+
+        Examples:
+        | ${response} = | Get Request | label | /records | stream=${True} |
+        | ${items} = | Iterate JSON Items | ${response} | data.item |
+        | FOR | ${item} | IN | @{items} |
+        | | Should Be True | ${item['id']} > 0 |
+        | END |
+        """
+        if hasattr(source, 'iter_content'):
+            chunks = source.iter_content(chunk_size=int(chunk_size))
+        else:
+            chunks = self._read_chunks(source, int(chunk_size))
+        return iter_items(chunks, prefix, self._json_loads)
+
     def json_loads(self, text):
         # pylint: disable=line-too-long
         """Returns [http://goo.gl/o0X6Pp|JSON] object from [http://goo.gl/o0X6Pp|JSON] string
@@ -78,6 +177,11 @@ class Utility(object):
         | `py/set`                     |
         | `py/collections.namedtuple`  |
         | `py/collections.OrderedDict` |
+        | `py/numpy.ndarray`           | # when numpy is installed |
+
+        Other tags can be registered with ``ExtendedRequestsLibrary.restorer.register``.
+        The JSON string is decoded with the `Set JSON Backend` parser, the standard library
+        with Decimal numbers by default.
 
         Examples:
         | @{var} = | JSON Loads | [{"key":"value"}] |
@@ -88,43 +192,84 @@ class Utility(object):
         | @{var} = | JSON Loads | [{"py/collections.OrderedDict":[("key2",2),("key1",1)]}] |
         """
         # pylint: disable=line-too-long
-        return loads(text, object_hook=self._restore, parse_float=Decimal)
+        return self._json_loads(text)
 
-    def natural_sort_list_of_dictionaries(self, items, key):
+    def natural_sort_list_of_dictionaries(self, items, key, *keys):
         """Returns natural sorted list of dictionaries.
 
+        Numbers in text are compared by their value and case is ignored. Dictionaries
+        with equal values keep their order, and missing or ``None`` values are last.
+
         Arguments:
         - ``items``: List of dictionaries to be sorted.
-        - ``key``: The dictionary key to be used to sort.
+        - ``key``: The dictionary key to be used to sort, a key starting with ``-`` is
+                   sorted in descending order.
+        - ``keys``: More dictionary keys to sort equal ``key`` values by, in order of
+                    importance.
 
         Examples:
         | @{var} = | Natural Sort List Of Dictionaries | ${list} | key |
+        | @{var} = | Natural Sort List Of Dictionaries | ${list} | key=name |
+        | @{var} = | Natural Sort List Of Dictionaries | ${list} | -priority | name |
+        """
+        return natural_sort(items, (key,) + keys)
+
+    def natural_top_n(self, items, count, key, *keys):
+        """Returns the first ``count`` dictionaries of natural sorted list of dictionaries,
+        see `Natural Sort List Of Dictionaries`, without sorting the whole list.
+
+        Arguments:
+        - ``items``: List of dictionaries to select from.
+        - ``count``: The number of dictionaries to return.
+        - ``key``: The dictionary key to be used to sort, a key starting with ``-`` is
+                   sorted in descending order.
+        - ``keys``: More dictionary keys to sort equal ``key`` values by, in order of
+                    importance.
+
+        Examples:
+        | @{var} = | Natural Top N | ${list} | 50 | key |
+        | @{var} = | Natural Top N | ${list} | 10 | -priority | name |
         """
-        def _natural_sorter(item):
-            """Returns splitted aphanumeric value list of given dictionary key."""
-            return [self._cast_alphanumeric(text) for text in split('([0-9]+)', item[key])]
-        return sorted(items, key=_natural_sorter)
+        return natural_top(items, int(count), (key,) + keys)
+
+    def set_json_backend(self, backend='auto', mode='decimal'):
+        """Sets the JSON parser `JSON Loads` and `Get JSON File` decode with, and whether
+        numbers with a fraction are decoded into exact Decimal or faster float numbers.
+
+        Tagged objects are restored the same way with every backend, JSON strings without
+        tagged objects are decoded without looking for them.
+
+        Arguments:
+        - ``backend``: ``stdlib``, ``simplejson``, ``orjson``, ``ujson``, or ``auto`` for
+                       the standard library in ``decimal`` mode, and the fastest installed
+                       one of orjson, ujson and the standard library in ``float`` mode.
+        - ``mode``: ``decimal`` to keep the precision of numbers with a fraction, only
+                    supported by ``stdlib`` and ``simplejson``, or ``float``.
+
+        Examples:
+        | Set JSON Backend | mode=float |
+        | Set JSON Backend | simplejson |
+        | Set JSON Backend | # standard library with Decimal numbers |
+        """
+        self._json_loads = get_loads(backend, mode)
+
+    @staticmethod
+    def _compile_condition(condition):
+        """Returns the function that evaluates the given condition of an item."""
+        if condition is None:
+            return lambda item: True
+        code = compile(condition, '<condition>', 'eval')
+        # pylint: disable=eval-used
+        return lambda item: eval(code, {}, {'item': item})
 
     @staticmethod
-    def _cast_alphanumeric(text):
-        """Casts alphanumeric value."""
-        return int(text) if text.isdigit() else text.lower()
+    def _read_chunks(path, chunk_size):
+        """Yields the chunks of the given file."""
+        with open(path, 'rb') as reader:
+            for chunk in iter(lambda: reader.read(chunk_size), b''):
+                yield chunk
 
     @staticmethod
     def _restore(dct):
         """Returns restored object."""
-        if "py/dict" in dct:
-            return dict(dct["py/dict"])
-        if "py/tuple" in dct:
-            return tuple(dct["py/tuple"])
-        if "py/set" in dct:
-            return set(dct["py/set"])
-        if "py/collections.namedtuple" in dct:
-            data = dct["py/collections.namedtuple"]
-            return namedtuple(data["type"], data["fields"])(*data["values"])
-        # if "py/numpy.ndarray" in dct:
-        #     data = dct["py/numpy.ndarray"]
-        #     return np.array(data["values"], dtype=data["dtype"])
-        if "py/collections.OrderedDict" in dct:
-            return OrderedDict(dct["py/collections.OrderedDict"])
-        return dct
+        return restore(dct)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from math import ceil, log
+import re
+from threading import Lock
+from robot.utils import NormalizedDict
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    # pylint: disable=import-error
+    from urlparse import urlsplit
+
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'download')
+_IDENTIFIER = re.compile(r'^(\d+|[0-9a-fA-F]{8}-?([0-9a-fA-F]{4}-?){3}[0-9a-fA-F]{12}|'
+                         r'[0-9a-fA-F]{16,})$')
+
+
+class LatencyHistogram(object):
+    """Latency histogram with logarithmic buckets, each bucket is ``precision`` wider
+    than the previous one, so the memory usage stays bounded regardless of the number
+    of recorded values, and percentiles are accurate within ``precision``."""
+
+    def __init__(self, precision=0.02, minimum=0.0001):
+        self.count = 0
+        self.maximum = None
+        self.minimum = None
+        self.total = 0.0
+        self._buckets = {}
+        self._floor = minimum
+        self._growth = 1 + precision
+
+    def add(self, value):
+        """Records the given value in seconds."""
+        index = (int(ceil(log(value / self._floor) / log(self._growth)))
+                 if value > self._floor else 0)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+
+    def buckets(self):
+        """Returns the upper bound in seconds and the number of values of each non-empty
+        bucket, in ascending order."""
+        return [(self._floor * self._growth ** index, self._buckets[index])
+                for index in sorted(self._buckets)]
+
+    def percentile(self, percent):
+        """Returns the value in seconds below which the given percent of values fall."""
+        if not self.count:
+            return None
+        rank = max(1, int(ceil(self.count * percent / 100.0)))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                # the upper bound of the bucket, within the recorded values
+                return min(max(self._floor * self._growth ** index, self.minimum), self.maximum)
+        return self.maximum
+
+    def summary(self):
+        """Returns count, mean, minimum, maximum, and 50th, 90th and 99th percentiles."""
+        return {
+            'count': self.count,
+            'max': self.maximum,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.minimum,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99)
+        }
+
+
+class RequestStatistics(object):
+    """Latency statistics of requests per case and space insensitive label, and per method
+    and URI template."""
+
+    def __init__(self):
+        self._labels = NormalizedDict()
+        self._lock = Lock()
+
+    def record(self, label, method, url, timings):
+        """Records the phase durations in seconds of a request sent with the given label."""
+        endpoint = '%s %s' % (method.upper(), self.template(url))
+        elapsed = sum(timings.get(phase, 0.0) or 0.0 for phase in PHASES)
+        with self._lock:
+            entry = self._labels.setdefault(label, self._new_entry())
+            entry['endpoints'].setdefault(endpoint, self._new_entry(False))
+            for target in (entry, entry['endpoints'][endpoint]):
+                target['histogram'].add(elapsed)
+                for phase in PHASES:
+                    target['phases'][phase] += timings.get(phase, 0.0) or 0.0
+
+    def summary(self, label=None):
+        """Returns the statistics of the given label, or of all labels."""
+        with self._lock:
+            if label is not None:
+                return self._summarize(self._labels.get(label, self._new_entry()))
+            return dict((name, self._summarize(entry)) for (name, entry) in self._labels.items())
+
+    @staticmethod
+    def template(url):
+        """Returns the path of the given URL with numeric, UUID and long hexadecimal
+        segments replaced by ``{id}``."""
+        return '/'.join('{id}' if _IDENTIFIER.match(segment) else segment
+                        for segment in urlsplit(url).path.split('/')) or '/'
+
+    @staticmethod
+    def _new_entry(endpoints=True):
+        """Returns new empty statistics."""
+        entry = {'histogram': LatencyHistogram(),
+                 'phases': dict((phase, 0.0) for phase in PHASES)}
+        if endpoints:
+            entry['endpoints'] = {}
+        return entry
+
+    def _summarize(self, entry):
+        """Returns the summary of the given statistics."""
+        summary = entry['histogram'].summary()
+        count = summary['count']
+        summary['phases'] = dict((phase, total / count if count else None)
+                                 for (phase, total) in entry['phases'].items())
+        if 'endpoints' in entry:
+            summary['endpoints'] = dict((endpoint, self._summarize(value))
+                                        for (endpoint, value) in entry['endpoints'].items())
+        return summary
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from heapq import nlargest, nsmallest
+from numbers import Number
+from re import compile as compile_pattern
+
+_DIGITS = compile_pattern(r'([0-9]+)')
+
+
+class _Descending(object):
+    """Sort key wrapper that reverses the order of the given key."""
+
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+
+def natural_key(value):
+    """Returns the case insensitive natural sort key of the given value, numbers in text
+    are compared by their value, numbers are compared like text starting with them."""
+    if value.__class__ is str:
+        parts = _DIGITS.split(value.lower())
+    elif isinstance(value, Number) and not isinstance(value, complex):
+        return ('', value)
+    else:
+        parts = _DIGITS.split(('%s' % (value,)).lower())
+    parts[1::2] = [int(part) for part in parts[1::2]]
+    return tuple(parts)
+
+
+def natural_sort(items, keys):
+    """Returns a new list of the given dictionaries, stable sorted by the given keys.
+
+    A key starting with ``-`` is sorted in descending order, missing and None values
+    are sorted last in both orders.
+    """
+    items = list(items)
+    # stable sorting by the least significant key first keeps the order of the others
+    for (name, descending) in reversed(_parse(keys)):
+        missing = [item for item in items if item.get(name, None) is None]
+        if missing:
+            items = [item for item in items if item.get(name, None) is not None]
+        items.sort(key=lambda item, name=name: natural_key(item[name]), reverse=descending)
+        items.extend(missing)
+    return items
+
+
+def natural_top(items, count, keys):
+    """Returns the first ``count`` of the given dictionaries in `natural_sort` order,
+    selected with a heap instead of sorting all of them."""
+    keys = _parse(keys)
+    functions = [_key_function(name, descending) for (name, descending) in keys]
+    directions = set(descending for (_, descending) in keys)
+    if len(functions) == 1:
+        key = functions[0]
+    else:
+        key = _combined_key_function(functions, [len(directions) > 1 and descending
+                                                 for (_, descending) in keys])
+    select = nlargest if directions == set([True]) else nsmallest
+    return select(count, items, key=key)
+
+
+def _combined_key_function(functions, reversed_keys):
+    """Returns the function that returns the sort keys of the given key functions,
+    with the order of the given reversed keys reversed."""
+    def key(item):
+        """Returns the natural sort keys of the given dictionary."""
+        return tuple(_Descending(function(item)) if reverse else function(item)
+                     for (function, reverse) in zip(functions, reversed_keys))
+    return key
+
+
+def _key_function(name, descending):
+    """Returns the function that returns the sort key of the given dictionary key."""
+    # missing values are last, also when sorted in reverse
+    missing = (-1 if descending else 1, ())
+
+    def key(item):
+        """Returns the natural sort key of the value of the given dictionary."""
+        value = item.get(name, None)
+        return missing if value is None else (0, natural_key(value))
+    return key
+
+
+def _parse(keys):
+    """Returns the dictionary key and whether it is sorted in descending order of the
+    given keys."""
+    if not keys:
+        raise ValueError('At least one sort key is required.')
+    return [(key[1:], True) if key.startswith('-') else (key, False) for key in keys]
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from collections import OrderedDict
+from threading import RLock
+from time import time
+
+
+class SessionRegistry(object):
+    """Session objects cache with constant time lookup by case and space insensitive
+    label, real removal that closes the session connection pools, and optional
+    idle timeout and least recently used eviction."""
+
+    def __init__(self, no_current_msg='No sessions created', idle_timeout=None,
+                 max_sessions=None):
+        self.current = None
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.no_current_msg = no_current_msg
+        self._lock = RLock()
+        # normalized label: [label, session, last used], least recently used first
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def close_all(self):
+        """Closes the connection pools of all sessions, the sessions stay registered
+        and open new connections when used again."""
+        with self._lock:
+            for (_, session, _) in list(self._sessions.values()):
+                self._close(session)
+
+    def empty_cache(self):
+        """Removes all sessions and closes their connection pools."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self.current = None
+        for (_, session, _) in sessions:
+            self._close(session)
+
+    def items(self):
+        """Returns all labels and sessions, least recently used first."""
+        with self._lock:
+            return [(label, session) for (label, session, _) in self._sessions.values()]
+
+    def register(self, session, alias=None):
+        """Registers the given session with the given label, replaces and closes
+        the session already registered with the same label, and returns the number
+        of registered sessions."""
+        label = alias if alias is not None else str(id(session))
+        with self._lock:
+            previous = self._sessions.pop(self._normalize(label), None)
+            self._sessions[self._normalize(label)] = [label, session, time()]
+            self.current = session
+            evicted = self._evict()
+        if previous is not None and previous[1] is not session:
+            evicted.append(previous[1])
+        for old in evicted:
+            self._close(old)
+        return len(self._sessions)
+
+    def remove(self, label):
+        """Removes the session registered with the given label, closes its connection
+        pools and returns it."""
+        with self._lock:
+            entry = self._sessions.pop(self._normalize(label), None)
+            if entry is None:
+                raise RuntimeError("Non-existing index or alias '%s'." % label)
+            if self.current is entry[1]:
+                self.current = None
+        self._close(entry[1])
+        return entry[1]
+
+    def switch(self, label):
+        """Returns the session registered with the given label."""
+        key = self._normalize(label)
+        with self._lock:
+            evicted = self._evict(keep=key)
+            entry = self._sessions.pop(key, None)
+            if entry is None:
+                raise RuntimeError("Non-existing index or alias '%s'." % label)
+            entry[2] = time()
+            self._sessions[key] = entry
+            self.current = entry[1]
+        for old in evicted:
+            self._close(old)
+        return entry[1]
+
+    @staticmethod
+    def _close(session):
+        """Closes the session connection pools."""
+        close = getattr(session, 'close', None)
+        if close is not None:
+            close()
+
+    def _evict(self, keep=None):
+        """Removes and returns idle sessions, and least recently used sessions over
+        the maximum number of sessions."""
+        evicted = []
+        if self.idle_timeout is not None:
+            deadline = time() - float(self.idle_timeout)
+            for (key, entry) in list(self._sessions.items()):
+                if entry[2] >= deadline:
+                    break
+                if key != keep:
+                    evicted.append(self._sessions.pop(key)[1])
+        if self.max_sessions is not None:
+            for key in list(self._sessions.keys()):
+                if len(self._sessions) <= int(self.max_sessions):
+                    break
+                if key != keep:
+                    evicted.append(self._sessions.pop(key)[1])
+        if self.current is not None and self.current in evicted:
+            self.current = None
+        return evicted
+
+    @staticmethod
+    def _normalize(label):
+        """Returns case and space insensitive label."""
+        return ''.join(('%s' % label).split()).lower()
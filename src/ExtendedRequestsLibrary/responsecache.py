@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from collections import OrderedDict
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+from email.utils import mktime_tz, parsedate_tz
+from hashlib import sha256
+import os
+from os.path import exists, join
+import pickle
+from threading import RLock
+from time import time
+from requests.auth import AuthBase
+
+# 304 response headers that describe the stored body and must not replace its headers
+_BODY_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+
+class ResponseCache(object):
+    """HTTP response cache with an in-memory least recently used tier bounded in bytes,
+    an optional unbounded disk tier, Cache-Control freshness, and conditional
+    revalidation of stale responses."""
+
+    def __init__(self, max_bytes=16777216, path=None):
+        self.hits = 0
+        self.max_bytes = max_bytes
+        self.misses = 0
+        self.path = path
+        self.revalidations = 0
+        self._lock = RLock()
+        # key: [response, expires at, size], least recently used first
+        self._entries = OrderedDict()
+        self._size = 0
+        if path is not None and not exists(path):
+            os.makedirs(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Removes all in-memory responses, and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = self.revalidations = 0
+
+    def fetch(self, method, url, headers, send, scope=None):
+        """Returns the cached response of the given request while it is fresh, otherwise
+        returns the response of the given ``send`` function called with the request
+        headers, revalidating the stale cached response when it has validators.
+
+        Responses are only shared by requests with the same ``scope``, see `session_scope`.
+        """
+        key = self.key(method, url, headers, scope)
+        entry = self._get(key)
+        if entry is not None and entry[1] > time():
+            with self._lock:
+                self.hits += 1
+            return entry[0]
+        validators = self._validators(entry[0]) if entry is not None else {}
+        response = send(dict(headers or {}, **validators) if validators else headers)
+        if validators and response.status_code == 304:
+            cached = entry[0]
+            cached.headers.update((name, value) for (name, value) in response.headers.items()
+                                  if name.lower() not in _BODY_HEADERS)
+            with self._lock:
+                self.revalidations += 1
+            self._put(key, cached, self._lifetime(cached) or 0)
+            return cached
+        with self._lock:
+            self.misses += 1
+        lifetime = self._lifetime(response) if response.status_code == 200 else None
+        # the other Vary request headers are all part of the key
+        if response.headers.get('vary', '').strip() == '*':
+            lifetime = None
+        if lifetime is not None and (lifetime > 0 or self._validators(response)):
+            self._put(key, response, lifetime)
+        return response
+
+    @staticmethod
+    def key(method, url, headers=None, scope=None):
+        """Returns the cache key of the given request."""
+        return '%s %s %s %s' % (method.upper(), url,
+                                sorted((name.lower(), '%s' % value)
+                                       for (name, value) in (headers or {}).items()), scope)
+
+    def statistics(self):
+        """Returns the number of hits, misses, revalidations, in-memory responses and
+        their size in bytes."""
+        with self._lock:
+            return {'bytes': self._size, 'entries': len(self._entries), 'hits': self.hits,
+                    'misses': self.misses, 'revalidations': self.revalidations}
+
+    def _file(self, key):
+        """Returns the disk tier file path of the given key."""
+        return join(self.path, '%s.pickle' % sha256(key.encode('utf-8')).hexdigest())
+
+    def _get(self, key):
+        """Returns the entry of the given key from memory, or from disk."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+                return entry
+        if self.path is None or not exists(self._file(key)):
+            return None
+        try:
+            with open(self._file(key), 'rb') as reader:
+                (response, expires_at) = pickle.load(reader)
+        # pylint: disable=broad-except
+        except Exception:
+            # an unreadable file is treated as a miss, and replaced by the next store
+            return None
+        entry = [response, expires_at, len(response.content or b'')]
+        self._insert(key, entry)
+        return entry
+
+    def _insert(self, key, entry):
+        """Adds the given entry in memory, and evicts least recently used entries over
+        the maximum size."""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[2]
+            if self.max_bytes is not None and entry[2] > int(self.max_bytes):
+                return
+            self._entries[key] = entry
+            self._size += entry[2]
+            while self.max_bytes is not None and self._size > int(self.max_bytes):
+                self._size -= self._entries.popitem(last=False)[1][2]
+
+    @staticmethod
+    def _lifetime(response):
+        """Returns the number of seconds the response stays fresh, or None if the response
+        must not be stored."""
+        directives = {}
+        for directive in response.headers.get('cache-control', '').split(','):
+            (name, _, value) = directive.strip().partition('=')
+            directives[name.lower()] = value.strip('"')
+        if 'no-store' in directives:
+            return None
+        if 'no-cache' in directives:
+            return 0
+        age = float(response.headers.get('age', 0) or 0)
+        try:
+            if 'max-age' in directives:
+                return max(0, int(directives['max-age']) - age)
+            expires = parsedate_tz(response.headers.get('expires', '') or '')
+            if expires is not None:
+                return max(0, mktime_tz(expires) - time())
+        except (TypeError, ValueError):
+            return 0
+        return 0
+
+    def _put(self, key, response, lifetime):
+        """Stores the given response in memory and on disk."""
+        content = response.content or b''
+        expires_at = time() + lifetime
+        self._insert(key, [response, expires_at, len(content)])
+        if self.path is not None:
+            temporary = '%s.%s.tmp' % (self._file(key), id(response))
+            with open(temporary, 'wb') as writer:
+                pickle.dump((response, expires_at), writer, pickle.HIGHEST_PROTOCOL)
+            getattr(os, 'replace', os.rename)(temporary, self._file(key))
+
+    @staticmethod
+    def _validators(response):
+        """Returns the conditional request headers of the given response."""
+        validators = {}
+        if response.headers.get('etag', None):
+            validators['If-None-Match'] = response.headers['etag']
+        if response.headers.get('last-modified', None):
+            validators['If-Modified-Since'] = response.headers['last-modified']
+        return validators
+
+
+def session_scope(session):
+    """Returns the digest of the session state sent with every request: the default
+    headers, the default and stored cookies, the authentication, and the OAuth2
+    credentials, so sessions with different credentials never share responses."""
+    state = []
+    for name in ('headers', 'request_cookies', 'cookies'):
+        values = getattr(session, name, None)
+        if name == 'cookies' and hasattr(values, 'get_dict'):
+            values = values.get_dict()
+        state.append(sorted(('%s' % key, '%s' % value) for (key, value) in values.items())
+                     if isinstance(values, Mapping) else None)
+    auth = getattr(session, 'auth', None)
+    if isinstance(auth, AuthBase):
+        # authentication state, such as the digest nonce, is not a credential
+        auth = [type(auth).__name__] + sorted(
+            (name, '%s' % value) for (name, value) in vars(auth).items()
+            if isinstance(value, (bytes, str, int, float)))
+    state.append(list(auth) if isinstance(auth, (list, tuple)) else None)
+    credentials = getattr(session, 'credentials_key', None)
+    state.append(credentials if isinstance(credentials, str) else None)
+    return sha256(repr(state).encode('utf-8')).hexdigest()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from collections import namedtuple, OrderedDict
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# restorers by tag, looked up in this order in objects that have other keys too
+RESTORERS = OrderedDict()
+_NAMEDTUPLES = {}
+# quoted tag prefixes as text and bytes, as is and with escaped slash
+_NEEDLES = []
+_ORDER = []
+_TAGS = set()
+
+
+def register(tag, restorer):
+    """Registers the function that restores the object of the given tag from the tagged
+    value, in place of the restorer already registered for the tag.
+
+    Examples:
+    | register('py/fractions.Fraction', lambda value: Fraction(*value))
+    """
+    prefix = '"%s' % (tag[:tag.index('/') + 1] if '/' in tag else tag)
+    for variant in (prefix, prefix.replace('/', '\\/')):
+        if (variant, variant.encode('utf-8')) not in _NEEDLES:
+            _NEEDLES.append((variant, variant.encode('utf-8')))
+    RESTORERS[tag] = restorer
+    _ORDER[:] = list(RESTORERS.items())
+    _TAGS.add(tag)
+
+
+def restore(dct):
+    """Returns the object restored from the given decoded JSON object, or the given
+    object itself when it has no registered tag."""
+    # a single set operation lets untagged objects, by far the most common, through
+    if _TAGS.isdisjoint(dct):
+        return dct
+    if len(dct) == 1:
+        for (tag, value) in dct.items():
+            return RESTORERS[tag](value)
+    for (tag, restorer) in _ORDER:
+        if tag in dct:
+            return restorer(dct[tag])
+    return dct
+
+
+def restore_all(obj):
+    """Returns the given decoded JSON document with all tagged objects restored, inner
+    objects first, the same way the ``restore`` object hook restores them while decoding."""
+    if isinstance(obj, dict):
+        for (key, value) in obj.items():
+            if isinstance(value, (dict, list)):
+                obj[key] = restore_all(value)
+        return restore(obj)
+    if isinstance(obj, list):
+        for (index, value) in enumerate(obj):
+            if isinstance(value, (dict, list)):
+                obj[index] = restore_all(value)
+    return obj
+
+
+def tagged(text):
+    """Returns True if the given JSON string or bytes may have tagged objects."""
+    index = 1 if isinstance(text, bytes) else 0
+    return any(needle[index] in text for needle in _NEEDLES)
+
+
+def _namedtuple(data):
+    """Returns the named tuple of the given type, fields and values, named tuple types
+    are created once for each type and fields."""
+    fields = data['fields']
+    key = (data['type'], tuple(fields) if isinstance(fields, list) else fields)
+    cls = _NAMEDTUPLES.get(key, None)
+    if cls is None:
+        if len(_NAMEDTUPLES) >= 1024:
+            _NAMEDTUPLES.clear()
+        cls = _NAMEDTUPLES[key] = namedtuple(data['type'], fields)
+    return cls(*data['values'])
+
+
+register('py/dict', dict)
+register('py/tuple', tuple)
+register('py/set', set)
+register('py/collections.namedtuple', _namedtuple)
+if numpy is not None:
+    register('py/numpy.ndarray', lambda data: numpy.array(data['values'], dtype=data['dtype']))
+register('py/collections.OrderedDict', OrderedDict)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from codecs import utf_8_decode
+import mmap
+import os
+from os.path import abspath, normpath
+from re import compile as compile_pattern
+from threading import Lock
+from robot.utils import safe_str, unescape
+from robot.variables import search_variable
+
+_BOOLEAN = compile_pattern(r'(False|True)')
+
+
+def _lower_booleans(text):
+    """Returns the given text with Python boolean literals in JSON form."""
+    return _BOOLEAN.sub(lambda match: match.group(1).lower(), text)
+
+
+class Template(object):
+    """JSON file text split once into literal parts and variables, the literal parts are
+    unescaped and their boolean literals are lowered when the template is created."""
+
+    def __init__(self, text):
+        # literal parts, with None in place of each variable
+        self._parts = []
+        # variable: [part indexes, last value, last substituted text]
+        self._variables = {}
+        self._lock = Lock()
+        self._text = None
+        match = search_variable(text)
+        while match:
+            if match.before:
+                self._parts.append(_lower_booleans(unescape(match.before)))
+            self._variables.setdefault(match.match, [[], None, None])[0].append(
+                len(self._parts))
+            self._parts.append(None)
+            match = search_variable(match.after)
+        if match.string:
+            self._parts.append(_lower_booleans(unescape(match.string)))
+
+    def render(self, resolve):
+        """Returns the template text with the variables replaced by the values of the
+        given ``resolve`` function, only changed values are substituted again."""
+        with self._lock:
+            if self._text is not None and not self._variables:
+                return self._text
+            parts = list(self._parts)
+            changed = self._text is None
+            for (name, variable) in list(self._variables.items()):
+                value = safe_str(resolve(name))
+                if value != variable[1]:
+                    (variable[1], variable[2]) = (value, _lower_booleans(value))
+                    changed = True
+                for index in variable[0]:
+                    parts[index] = variable[2]
+            if changed:
+                self._text = ''.join(parts)
+            return self._text
+
+
+class TemplateCache(object):
+    """JSON file template cache keyed by path, modification time and size, files from
+    the given ``mmap_bytes`` size are read through a read-only memory map."""
+
+    def __init__(self, mmap_bytes=1048576):
+        self.hits = 0
+        self.misses = 0
+        self.mmap_bytes = mmap_bytes
+        self._lock = Lock()
+        # path: (modification time, size, template)
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Removes all templates, and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def get(self, path):
+        """Returns the template of the given file, and whether it was found in the cache.
+
+        The template is created again when the file is modified.
+        """
+        path = normpath(abspath(path))
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path, None)
+            if entry is not None and entry[:2] == (stat.st_mtime, stat.st_size):
+                self.hits += 1
+                return (entry[2], True)
+            self.misses += 1
+        template = Template(self._read(path, stat.st_size))
+        with self._lock:
+            self._entries[path] = (stat.st_mtime, stat.st_size, template)
+        return (template, False)
+
+    def statistics(self):
+        """Returns the number of hits, misses and templates."""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def _read(self, path, size):
+        """Returns the UTF-8 text of the given file with platform independent line breaks."""
+        with open(path, 'rb') as handle:
+            # empty files can't be memory mapped
+            if size and size >= self.mmap_bytes:
+                content = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    text = utf_8_decode(content, 'strict', True)[0]
+                finally:
+                    content.close()
+            else:
+                text = handle.read().decode('utf-8')
+        return text.replace('\r\n', '\n')
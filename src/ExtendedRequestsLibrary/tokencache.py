@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from hashlib import sha256
+from json import dumps, loads
+import os
+from os.path import join
+from tempfile import gettempdir
+from time import time
+try:
+    import fcntl
+except ImportError:
+    # pylint: disable=import-error
+    import msvcrt
+    fcntl = None
+
+
+class TokenCache(object):
+    """OAuth2 access token cache shared across processes through a locked JSON file."""
+
+    DEFAULT_PATH = join(gettempdir(), 'extendedrequestslibrary-tokens.json')
+
+    def __init__(self, path=None, leeway=60):
+        self.leeway = leeway
+        self.path = path or self.DEFAULT_PATH
+
+    def fetch(self, key, fetcher):
+        """Returns the cached token of the given key when it is still valid, otherwise
+        returns and caches a new token from the given fetcher.
+
+        The cache file stays locked while fetching, so concurrent processes wait for
+        a single fetch instead of all asking the token server at once.
+        """
+        handle = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600), 'r+')
+        try:
+            self._lock(handle)
+            tokens = self._read(handle)
+            token = tokens.get(key, None)
+            if token is not None and self._is_valid(token):
+                return token
+            token = fetcher()
+            if self._expires_at(token) is not None:
+                tokens = dict((name, value) for (name, value) in list(tokens.items())
+                              if self._is_valid(value))
+                tokens[key] = dict(token, expires_at=self._expires_at(token))
+                self._write(handle, tokens)
+            return token
+        finally:
+            self._unlock(handle)
+            handle.close()
+
+    @staticmethod
+    def key(token_url, tenant_id=None, username=None, scope=None):
+        """Returns the cache key of the given token request."""
+        if isinstance(scope, (list, set, tuple)):
+            scope = ' '.join(sorted(scope))
+        return sha256(dumps([token_url, tenant_id, username, scope]).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _expires_at(token):
+        """Returns the token expiry timestamp, or None if the token never expires."""
+        if token.get('expires_at', None) is not None:
+            return float(token['expires_at'])
+        if token.get('expires_in', None) is not None:
+            return time() + float(token['expires_in'])
+        return None
+
+    def _is_valid(self, token):
+        """Returns True if the token does not expire within the leeway."""
+        expires_at = token.get('expires_at', None)
+        return expires_at is not None and float(expires_at) - self.leeway > time()
+
+    @staticmethod
+    def _lock(handle):
+        """Exclusively locks the given file handle, waits until the lock is acquired."""
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+
+    @staticmethod
+    def _read(handle):
+        """Returns all cached tokens, an unreadable cache is treated as empty."""
+        handle.seek(0)
+        try:
+            return loads(handle.read() or '{}')
+        except ValueError:
+            return {}
+
+    @staticmethod
+    def _unlock(handle):
+        """Unlocks the given file handle."""
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @staticmethod
+    def _write(handle, tokens):
+        """Replaces all cached tokens."""
+        handle.seek(0)
+        handle.truncate()
+        handle.write(dumps(tokens))
+        handle.flush()
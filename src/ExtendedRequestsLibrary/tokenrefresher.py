@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from threading import Lock
+from time import time
+from robot.api import logger
+
+
+class TokenRefresher(object):
+    """OAuth2 session protected request hook that renews the access token
+    shortly before it expires, so no request is sent with an expired token."""
+
+    def __init__(self, session, fetcher, token_url, leeway=60, **kwargs):
+        self.count = 0
+        self.fetcher = fetcher
+        self.leeway = leeway
+        self.refresh_kwargs = kwargs
+        self.session = session
+        self.token_url = token_url
+        self._lock = Lock()
+        self._refreshing = False
+
+    def __call__(self, url, headers, data):
+        """Renews the access token if needed, and returns the request unchanged."""
+        # token requests made while refreshing go through this hook too
+        if not self._refreshing and self.is_expiring():
+            with self._lock:
+                if self.is_expiring():
+                    self._refreshing = True
+                    try:
+                        self.refresh()
+                    finally:
+                        self._refreshing = False
+        return url, headers, data
+
+    def is_expiring(self):
+        """Returns True if the access token expires within the leeway."""
+        expires_at = (self.session.token or {}).get('expires_at', None)
+        return expires_at is not None and float(expires_at) - self.leeway <= time()
+
+    def refresh(self):
+        """Renews the access token through the refresh token grant when a refresh token
+        is available, otherwise fetches a new access token, within the session timeouts."""
+        token = self.session.token
+        # pylint: disable=broad-except
+        try:
+            if token.get('refresh_token', None) is None:
+                raise ValueError('No refresh token available.')
+            # the session timeouts can be changed after the session is created
+            kwargs = dict({'timeout': getattr(self.session, 'timeout', None)},
+                          **self.refresh_kwargs)
+            self.session.refresh_token(self.token_url, **kwargs)
+        except Exception as error:
+            logger.debug('Fetching new OAuth2 access token: %s' % error)
+            self.session.token = self.fetcher()
+        self.count += 1
+        logger.debug('OAuth2 access token renewed %d time(s).' % self.count)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from collections import namedtuple
+from email.message import Message
+from functools import partial
+import socket
+import ssl
+from threading import Lock, local
+from time import time
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.cookies import extract_cookies_to_jar
+from requests.exceptions import ConnectionError as RequestsConnectionError, ConnectTimeout
+from requests.exceptions import ProxyError, ReadTimeout, Timeout
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+from requests.packages.urllib3.connection import HTTPConnection, HTTPSConnection
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from requests.packages.urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from requests.packages.urllib3.util.connection import allowed_gai_family
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# hop-by-hop headers that HTTP/2 does not allow
+_CONNECTION_HEADERS = ('connection', 'keep-alive', 'proxy-connection', 'transfer-encoding',
+                       'upgrade')
+# phase durations of the request being sent by the current thread
+_current = local()
+
+
+class _TimedConnectionMixin(object):
+    """Connection that adds its DNS, connect and TLS durations to the phases
+    of the request being sent by the current thread."""
+
+    def connect(self):
+        """Connects to the host."""
+        phases = getattr(_current, 'phases', None)
+        if phases is None:
+            return super(_TimedConnectionMixin, self).connect()
+        opened = phases['dns'] + phases['connect']
+        start = time()
+        result = super(_TimedConnectionMixin, self).connect()
+        remaining = max(0.0, time() - start - (phases['dns'] + phases['connect'] - opened))
+        phases['tls' if isinstance(self, HTTPSConnection) else 'connect'] += remaining
+        return result
+
+    def _new_conn(self):
+        """Returns a new socket, resolving the host separately to time it."""
+        phases = getattr(_current, 'phases', None)
+        dns_host = getattr(self, '_dns_host', None)
+        if phases is None or dns_host is None:
+            return super(_TimedConnectionMixin, self)._new_conn()
+        start = time()
+        try:
+            addresses = socket.getaddrinfo(dns_host.strip('[]'), self.port,
+                                           allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror:
+            # let the connection raise its own resolution error
+            return super(_TimedConnectionMixin, self)._new_conn()
+        resolved = time()
+        phases['dns'] += resolved - start
+        try:
+            for (index, address) in enumerate(addresses):
+                self._dns_host = address[4][0]
+                try:
+                    return super(_TimedConnectionMixin, self)._new_conn()
+                except (ConnectTimeoutError, NewConnectionError):
+                    if index == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = dns_host
+            phases['connect'] += time() - resolved
+        return super(_TimedConnectionMixin, self)._new_conn()
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    """HTTP connection with DNS and connect timing."""
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    """HTTPS connection with DNS, connect and TLS timing."""
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    """HTTP connection pool of timed connections."""
+
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    """HTTPS connection pool of timed connections."""
+
+    ConnectionCls = TimedHTTPSConnection
+
+
+_OriginalResponse = namedtuple('_OriginalResponse', 'msg')
+
+
+class _HTTP2Body(object):
+    """File-like body of a HTTP/2 response, read the way requests reads the body
+    of a urllib3 response."""
+
+    def __init__(self, response):
+        self._buffer = b''
+        self._chunks = response.iter_bytes()
+        self._response = response
+        message = Message()
+        for (name, value) in response.headers.multi_items():
+            message[name] = value
+        # lets requests extract the response cookies
+        self._original_response = _OriginalResponse(message)
+        self.status = response.status_code
+        self.version = 20 if response.http_version == 'HTTP/2' else 11
+
+    def close(self):
+        """Closes the response stream."""
+        self._response.close()
+
+    def read(self, amt=None, decode_content=True):
+        # pylint: disable=unused-argument
+        """Returns up to the given number of decoded bytes, or all remaining bytes."""
+        while amt is None or len(self._buffer) < amt:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if amt is None:
+            (data, self._buffer) = (self._buffer, b'')
+        else:
+            (data, self._buffer) = (self._buffer[:amt], self._buffer[amt:])
+        return data
+
+    def release_conn(self):
+        """Releases the stream back to the connection."""
+        self._response.close()
+
+    def stream(self, amt=None, decode_content=True):
+        # pylint: disable=unused-argument
+        """Yields decoded body chunks of up to the given number of bytes, or as they arrive."""
+        while True:
+            if amt:
+                data = self.read(amt)
+            else:
+                (data, self._buffer) = (self._buffer or next(self._chunks, b''), b'')
+            if not data:
+                break
+            yield data
+
+
+class _TimedAdapterMixin(object):
+    """Adapter that records the phase durations of each response, and sends requests
+    through an optional circuit breaker."""
+
+    def __init__(self, circuit_breaker=None, **kwargs):
+        self.circuit_breaker = circuit_breaker
+        super(_TimedAdapterMixin, self).__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        # pylint: disable=arguments-differ
+        """Sends the given request, unless the circuit breaker of its host is open."""
+        breaker = self.circuit_breaker
+        host = breaker.host(request.url) if breaker is not None else None
+        if breaker is not None:
+            breaker.before(host)
+        _current.phases = phases = {'connect': 0.0, 'dns': 0.0, 'tls': 0.0}
+        start = time()
+        try:
+            response = super(_TimedAdapterMixin, self).send(request, **kwargs)
+        except (RequestsConnectionError, Timeout) as error:
+            if breaker is not None:
+                breaker.after(host, error)
+            raise
+        except Exception:
+            # the host answered, the request failed for another reason
+            if breaker is not None:
+                breaker.after(host)
+            raise
+        finally:
+            _current.phases = None
+        if breaker is not None:
+            breaker.after(host)
+        response.received_at = time()
+        phases['ttfb'] = max(0.0, response.received_at - start - sum(phases.values()))
+        response.timings = phases
+        return response
+
+
+class _HTTPXAdapter(BaseAdapter):
+    """Transport adapter that sends requests through httpx with HTTP/2 enabled."""
+
+    def __init__(self, pool_maxsize=10, max_retries=0):
+        if httpx is None:
+            raise RuntimeError('HTTP/2 transport requires httpx with HTTP/2 support, '
+                               'install it with: pip install httpx[http2]')
+        super(_HTTPXAdapter, self).__init__()
+        self.max_retries = max_retries
+        self.pool_maxsize = pool_maxsize
+        self._lock = Lock()
+        self._transports = {}
+
+    def close(self):
+        """Closes the connections of all transports."""
+        with self._lock:
+            (transports, self._transports) = (list(self._transports.values()), {})
+        for transport in transports:
+            transport.close()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        # pylint: disable=arguments-differ,too-many-arguments
+        """Sends the given prepared request, and returns a requests response."""
+        transport = self._get_transport(request.url, verify, cert, proxies)
+        headers = [(name, value) for (name, value) in request.headers.items()
+                   if name.lower() not in _CONNECTION_HEADERS]
+        body = request.body
+        if hasattr(body, 'read'):
+            body = iter(partial(body.read, 65536), b'')
+        if isinstance(timeout, tuple):
+            (connect, read) = timeout
+        else:
+            (connect, read) = (timeout, timeout)
+        extensions = {'timeout': {'connect': connect, 'pool': connect, 'read': read,
+                                  'write': read}}
+        phases = getattr(_current, 'phases', None)
+        if phases is not None:
+            extensions['trace'] = self._trace(phases)
+        try:
+            response = transport.handle_request(httpx.Request(
+                request.method, request.url, headers=headers, content=body,
+                extensions=extensions))
+        except httpx.ConnectTimeout as error:
+            raise ConnectTimeout(error, request=request)
+        except httpx.TimeoutException as error:
+            raise ReadTimeout(error, request=request)
+        except httpx.ProxyError as error:
+            raise ProxyError(error, request=request)
+        except httpx.TransportError as error:
+            raise RequestsConnectionError(error, request=request)
+        result = Response()
+        result.connection = self
+        result.headers = CaseInsensitiveDict(response.headers.items())
+        result.encoding = get_encoding_from_headers(result.headers)
+        result.raw = _HTTP2Body(response)
+        result.reason = response.reason_phrase
+        result.request = request
+        result.status_code = response.status_code
+        result.url = request.url
+        extract_cookies_to_jar(result.cookies, request, result.raw)
+        return result
+
+    def _get_transport(self, url, verify, cert, proxies):
+        """Returns the transport of the given URL scheme, TLS and proxy settings."""
+        proxy = select_proxy(url, proxies or {})
+        secure = url.lower().startswith('https:')
+        key = (secure, verify, cert if not isinstance(cert, list) else tuple(cert), proxy)
+        with self._lock:
+            transport = self._transports.get(key, None)
+            if transport is None:
+                context = ssl.create_default_context(
+                    cafile=verify if not isinstance(verify, bool) else None)
+                if not verify:
+                    context.check_hostname = False
+                    context.verify_mode = ssl.CERT_NONE
+                if cert:
+                    context.load_cert_chain(*((cert,) if not isinstance(cert, (list, tuple))
+                                              else cert))
+                limits = httpx.Limits(max_connections=self.pool_maxsize,
+                                      max_keepalive_connections=self.pool_maxsize)
+                # cleartext HTTP/2 has no protocol negotiation, it is used with prior knowledge
+                transport = self._transports[key] = httpx.HTTPTransport(
+                    verify=context, http1=secure, http2=True, limits=limits, proxy=proxy,
+                    retries=self.max_retries)
+        return transport
+
+    @staticmethod
+    def _trace(phases):
+        """Returns the httpx trace callback that adds the connect and TLS durations
+        to the given phases."""
+        started = {}
+
+        def trace(event, info):
+            # pylint: disable=unused-argument
+            """Times the connection events."""
+            (name, _, state) = event.rpartition('.')
+            if name in ('connection.connect_tcp', 'connection.start_tls'):
+                if state == 'started':
+                    started[name] = time()
+                elif name in started:
+                    phase = 'connect' if name == 'connection.connect_tcp' else 'tls'
+                    phases[phase] += time() - started.pop(name)
+        return trace
+
+
+class HTTP2Adapter(_TimedAdapterMixin, _HTTPXAdapter):
+    """Transport adapter that sends concurrent requests to the same host as multiplexed
+    HTTP/2 streams over a single connection, through an optional circuit breaker.
+
+    HTTPS hosts negotiate HTTP/2, and fall back to HTTP/1.1 when they do not support it,
+    HTTP hosts are spoken to in HTTP/2 directly. Each response gets the same ``timings``
+    as from `SessionAdapter`, the DNS duration is part of the connect duration.
+    """
+
+
+class SessionAdapter(_TimedAdapterMixin, HTTPAdapter):
+    """HTTP adapter that records the phase durations of each response, and sends requests
+    through an optional circuit breaker.
+
+    Each response gets ``timings`` with ``dns``, ``connect``, ``tls`` and ``ttfb`` durations
+    in seconds, connections reused from the pool have no DNS, connect and TLS durations.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Initializes the pool manager with timed connection pools."""
+        super(SessionAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
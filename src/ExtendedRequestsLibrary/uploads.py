@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from mimetypes import guess_type
+import mmap
+import os
+from os.path import basename
+from uuid import uuid4
+import zlib
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ('br', 'deflate', 'gzip')
+
+
+class CompressedBody(object):
+    """Streaming compressed request body, the given body is read and compressed in blocks
+    while the request is sent instead of being compressed in memory at once.
+
+    The body can be bytes, text, a file-like object or an iterable of bytes or text
+    chunks. The compressed size is unknown up front, so the body is sent with chunked
+    transfer encoding. ``size`` is the number of compressed bytes read so far.
+    """
+
+    def __init__(self, body, encoding='gzip', block_size=65536):
+        if encoding == 'br' and brotli is None:
+            raise ValueError("Content encoding 'br' requires the brotli package.")
+        if encoding not in ENCODINGS:
+            raise ValueError("Unknown content encoding '%s'." % encoding)
+        if hasattr(body, 'encode') and not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        self.encoding = encoding
+        self._block_size = block_size
+        self._body = body
+        # chunks of an iterable body are pulled one at a time
+        iterable = not isinstance(body, bytes) and not hasattr(body, 'read')
+        self._chunks = iter(body) if iterable else None
+        self._start()
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self._block_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def close(self):
+        """Closes the uncompressed body."""
+        if hasattr(self._body, 'close'):
+            self._body.close()
+
+    def read(self, size=-1):
+        """Returns up to the given number of compressed bytes, or all remaining bytes."""
+        remaining = size if size is not None and size >= 0 else None
+        while not self._finished and (remaining is None or len(self._buffer) < remaining):
+            block = self._next_block()
+            if block is not None:
+                self._buffer += self._compress(block)
+            else:
+                self._buffer += self._flush()
+                self._finished = True
+        if remaining is None:
+            (chunk, self._buffer) = (self._buffer, b'')
+        else:
+            (chunk, self._buffer) = (self._buffer[:remaining], self._buffer[remaining:])
+        self.size += len(chunk)
+        return chunk
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Rewinds to the start of the uncompressed body and restarts the compression,
+        so a retried request is sent again from the start. Returns the position."""
+        position = offset + (self.size if whence == os.SEEK_CUR else 0)
+        if whence == os.SEEK_END or position not in (0, self.size):
+            raise IOError('Compressed body can only be rewound to the start.')
+        if position == 0 and self.size:
+            if self._chunks is not None:
+                raise IOError('Compressed iterable body can not be rewound.')
+            if hasattr(self._body, 'read'):
+                self._body.seek(0)
+            self._start()
+        return self.size
+
+    def tell(self):
+        """Returns the number of compressed bytes read so far."""
+        return self.size
+
+    def _next_block(self):
+        """Returns the next uncompressed block, or None at the end of the body."""
+        if self._chunks is not None:
+            block = next(self._chunks, None)
+            if block is not None and not isinstance(block, bytes):
+                block = ('%s' % block).encode('utf-8')
+        elif hasattr(self._body, 'read'):
+            block = self._body.read(self._block_size) or None
+        else:
+            block = self._body[self._offset:self._offset + self._block_size] or None
+            self._offset += len(block or b'')
+        return block
+
+    def _start(self):
+        """Starts the compression from the current uncompressed body position."""
+        if self.encoding == 'br':
+            compressor = brotli.Compressor()
+            (self._compress, self._flush) = (compressor.process, compressor.finish)
+        else:
+            # gzip has a gzip header and trailer, deflate is the zlib format
+            compressor = zlib.compressobj(6, zlib.DEFLATED,
+                                          31 if self.encoding == 'gzip' else 15)
+            (self._compress, self._flush) = (compressor.compress, compressor.flush)
+        self.size = 0
+        self._buffer = b''
+        self._finished = False
+        self._offset = 0
+
+
+class MappedFile(object):
+    """Read-only memory mapped file request body, read by the HTTP connection in blocks
+    instead of being loaded into memory at once."""
+
+    def __init__(self, path):
+        self._handle = open(path, 'rb')
+        self._size = os.fstat(self._handle.fileno()).st_size
+        # empty files can't be memory mapped
+        self._map = (mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+                     if self._size else None)
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        """Closes the memory map and its file."""
+        if self._map is not None:
+            self._map.close()
+        self._handle.close()
+
+    def read(self, size=-1):
+        """Returns up to the given number of bytes, or the remaining bytes."""
+        return self._map.read(size) if self._map is not None else b''
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Moves to and returns the given position, so a retried request is sent again
+        from the start."""
+        if self._map is not None:
+            self._map.seek(offset, whence)
+        return self.tell()
+
+    def tell(self):
+        """Returns the current position."""
+        return self._map.tell() if self._map is not None else 0
+
+
+class MultipartEncoder(object):
+    """Streaming multipart/form-data request body, file contents are read in blocks
+    while the request is sent instead of being assembled in memory."""
+
+    def __init__(self, fields=None, files=None):
+        self.boundary = uuid4().hex
+        self._handles = []
+        self._index = 0
+        self._offset = 0
+        self._parts = []
+        self._position = 0
+        for (name, value) in sorted((fields or {}).items()):
+            if not isinstance(value, bytes):
+                value = ('%s' % value).encode('utf-8')
+            self._parts.append(self._header(name) + value + b'\r\n')
+        try:
+            for (name, path) in sorted((files or {}).items()):
+                handle = open(path, 'rb')
+                self._handles.append(handle)
+                filename = basename(path)
+                content_type = guess_type(filename)[0] or 'application/octet-stream'
+                self._parts.append(self._header(name, filename, content_type))
+                self._parts.append(handle)
+                self._parts.append(b'\r\n')
+        except (IOError, OSError):
+            self.close()
+            raise
+        self._parts.append(('--%s--\r\n' % self.boundary).encode('utf-8'))
+        self._sizes = [os.fstat(part.fileno()).st_size if hasattr(part, 'read')
+                       else len(part) for part in self._parts]
+        self._length = sum(self._sizes)
+
+    def __len__(self):
+        return self._length
+
+    def close(self):
+        """Closes all opened files."""
+        for handle in self._handles:
+            handle.close()
+
+    @property
+    def content_type(self):
+        """Returns the multipart content type header value."""
+        return 'multipart/form-data; boundary=%s' % self.boundary
+
+    def read(self, size=-1):
+        """Returns up to the given number of bytes, or all remaining bytes."""
+        chunks = []
+        remaining = size if size is not None and size >= 0 else None
+        while self._index < len(self._parts) and (remaining is None or remaining > 0):
+            part = self._parts[self._index]
+            count = self._sizes[self._index] - self._offset
+            if remaining is not None:
+                count = min(count, remaining)
+            if hasattr(part, 'read'):
+                # the file position is not kept when the body is rewound
+                part.seek(self._offset)
+                chunk = part.read(count)
+            else:
+                chunk = part[self._offset:self._offset + count]
+            self._offset += len(chunk)
+            self._position += len(chunk)
+            if self._offset >= self._sizes[self._index] or len(chunk) < count:
+                self._index += 1
+                self._offset = 0
+            chunks.append(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+        return b''.join(chunks)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Moves to and returns the given position, so a retried request is sent again
+        from the start."""
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._position, os.SEEK_END: self._length}
+        self._position = min(max(base[whence] + offset, 0), self._length)
+        (self._index, self._offset) = (0, self._position)
+        while self._index < len(self._parts) and self._offset >= self._sizes[self._index]:
+            self._offset -= self._sizes[self._index]
+            self._index += 1
+        return self._position
+
+    def tell(self):
+        """Returns the current position."""
+        return self._position
+
+    def _header(self, name, filename=None, content_type=None):
+        """Returns the part header bytes."""
+        disposition = 'form-data; name="%s"' % name
+        if filename is not None:
+            disposition += '; filename="%s"' % filename
+        header = '--%s\r\nContent-Disposition: %s\r\n' % (self.boundary, disposition)
+        if content_type is not None:
+            header += 'Content-Type: %s\r\n' % content_type
+        return ('%s\r\n' % header).encode('utf-8')
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from multiprocessing.pool import ThreadPool
+try:
+    # pylint: disable=no-name-in-module
+    from urllib.parse import urlparse
+except ImportError:
+    # pylint: disable=import-error
+    # pylint: disable=no-name-in-module
+    from urlparse import urlparse
+from requests import Request
+from requests.adapters import HTTPAdapter
+
+MODES = ('connect', 'head', 'off')
+
+
+def warm_up(session, urls, mode='connect', connections=1, timeout=None):
+    """Opens connections to the given URL hosts inside the session connection pools,
+    all hosts at the same time, and returns the error of each host that failed.
+
+    The ``connect`` mode opens bare TCP and TLS connections, the ``head`` mode sends
+    HEAD requests, and the ``off`` mode does nothing.
+    """
+    mode = str(mode).lower()
+    if mode not in MODES:
+        raise ValueError("Unknown warm up mode '%s'." % mode)
+    if isinstance(urls, (bytes, str)):
+        urls = [urls]
+    hosts = {}
+    for url in urls:
+        if url and urlparse(url).hostname:
+            hosts.setdefault('%s://%s' % (urlparse(url).scheme, urlparse(url).netloc), url)
+    if mode == 'off' or not hosts:
+        return {}
+    tasks = []
+    for (host, url) in sorted(hosts.items()):
+        tasks.extend([(host, url)] * max(1, int(connections)))
+    if mode == 'head':
+        return _run(_head, session, tasks, timeout)
+    (opened, heads, errors) = _get_conns(session, tasks)
+    errors.update(_run(_connect, session, opened, timeout))
+    errors.update(_run(_head, session, heads, timeout))
+    for (_, pool, conn) in opened:
+        pool._put_conn(conn)  # pylint: disable=protected-access
+    return errors
+
+
+def _connect(session, task, timeout):
+    """Connects an idle pool connection."""
+    # pylint: disable=unused-argument
+    conn = task[2]
+    if getattr(conn, 'sock', None) is not None:
+        return
+    if timeout is not None:
+        conn.timeout = timeout
+    conn.connect()
+
+
+def _get_conns(session, tasks):
+    """Returns the idle pool connections taken for the given tasks, the tasks of adapters
+    without connection pools, and the error of each host that failed."""
+    errors = {}
+    heads = []
+    opened = []
+    for (host, url) in tasks:
+        if not isinstance(session.get_adapter(url), HTTPAdapter):
+            # adapters without connection pools open their connections on first request
+            heads.append((host, url))
+            continue
+        try:
+            pool = _get_pool(session, url)
+            # never wait for, or open more connections than the pool can keep
+            if len([task for task in opened if task[1] is pool]) < pool.pool.maxsize:
+                opened.append((host, pool, pool._get_conn()))  # pylint: disable=protected-access
+        # pylint: disable=broad-except
+        except Exception as error:
+            errors[host] = error
+    return (opened, heads, errors)
+
+
+def _get_pool(session, url):
+    """Returns the session connection pool of the given URL, set up the same way
+    as for the requests sent through the session."""
+    adapter = session.get_adapter(url)
+    settings = session.merge_environment_settings(url, {}, None, None, None)
+    if hasattr(adapter, 'get_connection_with_tls_context'):
+        return adapter.get_connection_with_tls_context(
+            Request('HEAD', url).prepare(), settings['verify'], proxies=settings['proxies'],
+            cert=settings['cert'])
+    pool = adapter.get_connection(url, settings['proxies'])
+    adapter.cert_verify(pool, url, settings['verify'], settings['cert'])
+    return pool
+
+
+def _head(session, task, timeout):
+    """Sends a HEAD request through the session connection pool."""
+    request = session.prepare_request(Request('HEAD', task[1]))
+    settings = session.merge_environment_settings(request.url, {}, None, None, None)
+    session.send(request, allow_redirects=False, timeout=timeout, **settings).close()
+
+
+def _run(target, session, tasks, timeout):
+    """Runs the given target for all tasks at the same time, and returns errors by host."""
+    if not tasks:
+        return {}
+
+    def _safely(task):
+        """Returns the raised error instead of raising it."""
+        # pylint: disable=broad-except
+        try:
+            target(session, task, timeout)
+        except Exception as error:
+            return task[0], error
+        return task[0], None
+    pool = ThreadPool(len(tasks))
+    try:
+        results = pool.map(_safely, tasks)
+    finally:
+        pool.close()
+        pool.join()
+    return dict((host, error) for (host, error) in results if error is not None)
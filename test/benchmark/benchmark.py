@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library benchmark suite.
+
+Measures the overhead of library keywords against plain ``requests`` and ``json``
+on a local in-process HTTP server, and saves the results as JSON, i.e.:
+
+    PYTHONPATH=./src python test/benchmark/benchmark.py --output benchmark.json
+    PYTHONPATH=./src python test/benchmark/benchmark.py --baseline benchmark.json
+
+Keywords that replace Robot Framework variables run against a standalone variable
+store, as no Robot Framework execution is running.
+"""
+
+from argparse import ArgumentParser
+from json import dump, dumps, load, loads
+from multiprocessing.pool import ThreadPool
+from os.path import join
+import platform
+from shutil import rmtree
+import socket
+import sys
+from tempfile import mkdtemp
+from threading import Thread
+from time import strftime
+from timeit import default_timer
+import requests
+from robot.variables import Variables
+from ExtendedRequestsLibrary import ExtendedRequestsLibrary
+from ExtendedRequestsLibrary.version import get_version
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+
+class BenchmarkHandler(BaseHTTPRequestHandler):
+    """Answers GET /<size> with a body of that many bytes, and POST with an empty body."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        # pylint: disable=invalid-name
+        """Send a body of the requested size."""
+        self.respond(b'x' * int(self.path.strip('/') or 0))
+
+    def do_POST(self):
+        # pylint: disable=invalid-name
+        """Read and discard the request body."""
+        remaining = int(self.headers.get('Content-Length', 0))
+        while remaining > 0:
+            remaining -= len(self.rfile.read(min(remaining, 65536)))
+        self.respond(b'')
+
+    def log_message(self, *args):
+        # pylint: disable=arguments-differ
+        """Do not log requests."""
+
+    def respond(self, body):
+        """Send the given body in a single write."""
+        self.wfile.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n' % len(body) + body)
+
+    def setup(self):
+        """Disable the Nagle algorithm, so small responses are not delayed."""
+        BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class BenchmarkServer(ThreadingMixIn, HTTPServer):
+    """Local HTTP server answering each connection in its own thread."""
+
+    daemon_threads = True
+
+
+class VariableReplacer(object):
+    """Standalone replacement of the Robot Framework variables in a string."""
+
+    def __init__(self):
+        self._variables = Variables()
+        self._variables['${VALUE}'] = 'value'
+
+    def replace_variables(self, text):
+        """Returns the given text with all variables replaced."""
+        return self._variables.replace_string(text)
+
+
+def measure(target, iterations, concurrency=1):
+    """Returns timing of calling the given target the given number of times."""
+    target()
+    durations = []
+
+    def timed(_):
+        """Call the target and record its duration."""
+        start = default_timer()
+        target()
+        durations.append(default_timer() - start)
+    pool = ThreadPool(concurrency)
+    start = default_timer()
+    try:
+        pool.map(timed, range(iterations))
+    finally:
+        pool.close()
+        pool.join()
+    elapsed = default_timer() - start
+    durations.sort()
+    return {
+        'mean': sum(durations) / len(durations),
+        'ops': iterations / elapsed,
+        'p50': durations[len(durations) // 2],
+        'p90': durations[int(len(durations) * 0.9)]
+    }
+
+
+def compare(name, params, target, baseline, iterations, concurrency=1):
+    """Returns the timings of the given library target and baseline target."""
+    library = measure(target, iterations, concurrency)
+    plain = measure(baseline, iterations, concurrency)
+    result = {'baseline': plain, 'library': library, 'name': name,
+              'overhead': library['mean'] / plain['mean'], 'params': params}
+    print('%-35s %-30s %10.1f us %10.1f us %6.2fx' % (
+        name, ' '.join('%s=%s' % item for item in sorted(params.items())),
+        library['mean'] * 1e6, plain['mean'] * 1e6, result['overhead']))
+    return result
+
+
+def http_cases(library, url, directory, iterations):
+    """Returns the timings of the request keywords."""
+    results = []
+    session = requests.Session()
+    try:
+        for size in (1024, 65536, 1048576):
+            for concurrency in (1, 8):
+                uri = '/%d' % size
+                results.append(compare(
+                    'get_request', {'concurrency': concurrency, 'size': size},
+                    lambda uri=uri: library.get_request('benchmark', uri),
+                    lambda uri=uri: session.get(url + uri, timeout=(10, 90)),
+                    iterations, concurrency))
+        for size in (1024, 1048576):
+            path = join(directory, 'upload-%d.bin' % size)
+            with open(path, 'wb') as writer:
+                writer.write(b'x' * size)
+
+            def plain_upload(path=path):
+                """Upload the file with plain requests."""
+                with open(path, 'rb') as reader:
+                    return session.post(url, files={'file': reader}, timeout=(10, 90))
+            results.append(compare(
+                'post_request_with_files', {'size': size},
+                lambda path=path: library.post_request('benchmark', '/', files={'file': path}),
+                plain_upload, iterations))
+    finally:
+        session.close()
+    return results
+
+
+def json_cases(library, directory, iterations):
+    """Returns the timings of the JSON and sort keywords."""
+    results = []
+    for items in (10, 1000, 10000):
+        text = dumps([{'id': index, 'name': 'item %d' % (items - index), 'price': 1.5,
+                       'tags': ['a', 'b'], 'value': '${VALUE}'} for index in range(items)])
+        count = max(1, iterations * 10 // items)
+        results.append(compare('json_loads', {'items': items},
+                               lambda text=text: library.json_loads(text),
+                               lambda text=text: loads(text), count))
+        path = join(directory, 'items-%d.json' % items)
+        with open(path, 'w') as writer:
+            writer.write(text)
+
+        def plain_json_file(path=path):
+            """Read the JSON file with plain json."""
+            with open(path) as reader:
+                return load(reader)
+        results.append(compare('get_json_file', {'items': items},
+                               lambda path=path: library.get_json_file(path),
+                               plain_json_file, count))
+        values = loads(text)
+        results.append(compare(
+            'natural_sort_list_of_dictionaries', {'items': items},
+            lambda values=values: library.natural_sort_list_of_dictionaries(values, 'name'),
+            lambda values=values: sorted(values, key=lambda value: value['name']), count))
+    return results
+
+
+def report(results, baseline, max_regression):
+    """Prints the overhead change of each result against the baseline results,
+    and returns the number of regressions."""
+    previous = dict((dumps([result['name'], result['params']], sort_keys=True), result)
+                    for result in baseline['results'])
+    regressions = 0
+    print('\nOverhead change against %s:' % baseline['metadata']['version'])
+    for result in results:
+        old = previous.get(dumps([result['name'], result['params']], sort_keys=True))
+        if old is None:
+            continue
+        change = result['overhead'] / old['overhead'] - 1
+        regressed = change > max_regression
+        regressions += 1 if regressed else 0
+        print('%-35s %-30s %+7.1f%%%s' % (
+            result['name'], ' '.join('%s=%s' % item for item in sorted(result['params'].items())),
+            change * 100, ' REGRESSION' if regressed else ''))
+    return regressions
+
+
+def main(argv=None):
+    """Runs the benchmark suite."""
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='the JSON file to save the results to')
+    parser.add_argument('--baseline', help='the JSON results file to compare with')
+    parser.add_argument('--iterations', type=int, default=200,
+                        help='the number of calls per measurement')
+    parser.add_argument('--max-regression', type=float, default=0.10,
+                        help='the overhead increase ratio reported as regression')
+    args = parser.parse_args(argv)
+    server = BenchmarkServer(('127.0.0.1', 0), BenchmarkHandler)
+    thread = Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    url = 'http://127.0.0.1:%d' % server.server_address[1]
+    directory = mkdtemp()
+    library = ExtendedRequestsLibrary()
+    # pylint: disable=protected-access
+    library._builtin = VariableReplacer()
+    library.set_response_logging('off')
+    library.create_session('benchmark', url, pool_maxsize=8)
+    print('%-35s %-30s %13s %13s %7s' % ('keyword', 'parameters', 'library', 'baseline',
+                                         'ratio'))
+    try:
+        results = (http_cases(library, url, directory, args.iterations) +
+                   json_cases(library, directory, args.iterations))
+    finally:
+        library.delete_all_sessions()
+        server.shutdown()
+        server.server_close()
+        rmtree(directory)
+    output = {
+        'metadata': {
+            'date': strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'iterations': args.iterations,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'requests': requests.__version__,
+            'version': get_version()
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as writer:
+            dump(output, writer, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as reader:
+            return 1 if report(results, load(reader), args.max_regression) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from sys import path
+import unittest
+from ExtendedRequestsLibrary.circuitbreaker import CircuitBreaker
+import mock
+from requests.exceptions import ConnectionError as RequestsConnectionError
+path.append('src')
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    """Circuit breaker test class."""
+
+    def setUp(self):
+        """Instantiate the circuit breaker class."""
+        self.breaker = CircuitBreaker(threshold=2, cooldown=30)
+        self.host = 'https://localhost:443'
+
+    def test_should_have_default_values(self):
+        """Circuit breaker instance should have default values set."""
+        breaker = CircuitBreaker()
+        self.assertEqual(breaker.threshold, 5)
+        self.assertEqual(breaker.cooldown, 30)
+        self.assertEqual(breaker.states(), {})
+
+    def test_should_return_host(self):
+        """Should return scheme, host and port of the given URL."""
+        self.assertEqual(CircuitBreaker.host('https://localhost/api'), self.host)
+        self.assertEqual(CircuitBreaker.host('http://localhost:8080/api'),
+                         'http://localhost:8080')
+
+    @mock.patch('ExtendedRequestsLibrary.circuitbreaker.time')
+    def test_should_open_after_consecutive_failures(self, mock_time):
+        """Should open the circuit after consecutive failures, and fail at once."""
+        mock_time.return_value = 1000
+        self.breaker.after(self.host, RuntimeError())
+        self.breaker.after(self.host)
+        self.breaker.after(self.host, RuntimeError())
+        self.breaker.before(self.host)
+        self.breaker.after(self.host, RuntimeError())
+        self.assertEqual(self.breaker.states(), {self.host: {'failures': 2, 'opened_at': 1000,
+                                                             'state': 'open'}})
+        with self.assertRaises(RequestsConnectionError):
+            self.breaker.before(self.host)
+        self.breaker.before('https://other:443')
+
+    @mock.patch('ExtendedRequestsLibrary.circuitbreaker.time')
+    def test_should_probe_after_cooldown(self, mock_time):
+        """Should let a single probe request through after the cool-down period."""
+        mock_time.return_value = 1000
+        self.breaker.after(self.host, RuntimeError())
+        self.breaker.after(self.host, RuntimeError())
+        mock_time.return_value = 1030
+        self.breaker.before(self.host)
+        self.assertEqual(self.breaker.states()[self.host]['state'], 'half-open')
+        with self.assertRaises(RequestsConnectionError):
+            self.breaker.before(self.host)
+        self.breaker.after(self.host, RuntimeError())
+        self.assertEqual(self.breaker.states()[self.host]['state'], 'open')
+        self.assertEqual(self.breaker.states()[self.host]['opened_at'], 1030)
+        mock_time.return_value = 1060
+        self.breaker.before(self.host)
+        self.breaker.after(self.host)
+        self.assertEqual(self.breaker.states()[self.host], {'failures': 0, 'opened_at': None,
+                                                            'state': 'closed'})
+
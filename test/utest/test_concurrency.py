@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from sys import path
+from time import sleep
+import unittest
+from ExtendedRequestsLibrary.keywords import Concurrency
+import mock
+path.append('src')
+
+
+class ConcurrencyTests(unittest.TestCase):
+    """Concurrency keyword test class."""
+
+    def setUp(self):
+        """Instantiate the concurrency class."""
+        self.concurrency = Concurrency()
+        self.label = 'MY-LABEL'
+
+    def test_should_send_requests_in_parallel(self):
+        """Should send all requests and return responses in input order."""
+        concurrency = self.concurrency
+        concurrency.get_request = mock.Mock(side_effect=lambda label, uri, **kwargs: uri)
+        concurrency.post_request = mock.Mock(side_effect=lambda label, uri, **kwargs: kwargs)
+        requests = [{'uri': '/%d' % index} for index in range(20)]
+        requests.append({'method': 'POST', 'uri': '/post', 'data': 'value'})
+        actual = concurrency.send_requests_in_parallel(self.label, requests, concurrency=4)
+        expected = ['/%d' % index for index in range(20)]
+        expected.append({'data': 'value'})
+        self.assertEqual(actual, expected)
+        self.assertEqual(concurrency.get_request.call_count, 20)
+        concurrency.post_request.assert_called_with(self.label, '/post', data='value')
+        self.assertEqual(requests[-1]['method'], 'POST')
+
+    @mock.patch('ExtendedRequestsLibrary.keywords.concurrency.logger')
+    def test_should_collect_errors_per_request(self, mock_logger):
+        """Should collect request errors in place of responses."""
+        error = RuntimeError('boom')
+        concurrency = self.concurrency
+        concurrency.get_request = mock.Mock(side_effect=[error])
+        concurrency.put_request = mock.Mock(return_value='response')
+        actual = concurrency.send_requests_in_parallel(
+            self.label, [{'uri': '/fail'}, {'method': 'put', 'uri': '/ok'}], concurrency=1)
+        self.assertEqual(actual, [error, 'response'])
+        mock_logger.warn.assert_called_with('Request #0 failed: boom')
+
+    def test_should_send_nothing_without_requests(self):
+        """Should return empty list without requests."""
+        self.assertEqual(self.concurrency.send_requests_in_parallel(self.label, []), [])
+
+    def test_should_start_and_wait_for_response(self):
+        """Should start a request in the background and wait for its response."""
+        concurrency = self.concurrency
+        concurrency.get_request = mock.Mock(return_value='response')
+        handle = concurrency.start_get_request(self.label, '/endpoint', params={'key': 'value'})
+        # pylint: disable=protected-access
+        self.assertEqual(concurrency._handles, [handle])
+        self.assertEqual(concurrency.wait_for_response(handle, timeout=5), 'response')
+        concurrency.get_request.assert_called_with(self.label, '/endpoint',
+                                                   params={'key': 'value'})
+        self.assertEqual(concurrency._handles, [])
+
+    def test_should_raise_request_error_on_wait(self):
+        """Should raise the request error when waiting for its response."""
+        concurrency = self.concurrency
+        concurrency.post_request = mock.Mock(side_effect=RuntimeError('boom'))
+        handle = concurrency.start_post_request(self.label, '/endpoint')
+        with self.assertRaises(RuntimeError):
+            concurrency.wait_for_response(handle)
+
+    def test_should_fail_wait_for_response_on_timeout(self):
+        """Should fail when the response is not received in time."""
+        handle = mock.Mock()
+        handle.ready.return_value = False
+        with self.assertRaises(AssertionError):
+            self.concurrency.wait_for_response(handle, timeout='0.1')
+        handle.wait.assert_called_with(0.1)
+
+    @mock.patch('ExtendedRequestsLibrary.keywords.concurrency.logger')
+    def test_should_wait_for_all_responses(self, mock_logger):
+        """Should wait for all started requests in start order."""
+        error = RuntimeError('boom')
+        concurrency = self.concurrency
+        concurrency.delete_request = mock.Mock(return_value='deleted')
+        concurrency.head_request = mock.Mock(side_effect=error)
+        concurrency.options_request = mock.Mock(return_value='options')
+        concurrency.patch_request = mock.Mock(return_value='patched')
+        concurrency.put_request = mock.Mock(return_value='put')
+        concurrency.start_delete_request(self.label, '/delete')
+        concurrency.start_head_request(self.label, '/head')
+        concurrency.start_options_request(self.label, '/options')
+        concurrency.start_patch_request(self.label, '/patch')
+        concurrency.start_put_request(self.label, '/put')
+        self.assertEqual(concurrency.wait_for_all_responses(timeout=5),
+                         ['deleted', error, 'options', 'patched', 'put'])
+        mock_logger.warn.assert_called_with('Request #1 failed: boom')
+        self.assertEqual(concurrency.wait_for_all_responses(), [])
+
+    @mock.patch('ExtendedRequestsLibrary.keywords.concurrency.logger')
+    def test_should_run_load_with_concurrency(self, mock_logger):
+        """Should send requests in turn until the end of the duration."""
+        concurrency = self.concurrency
+        # mock call counts are not thread safe, list appends are
+        (got, posted) = ([], [])
+        concurrency.get_request = lambda label, uri: got.append(uri) or mock.Mock(status_code=200)
+        concurrency.post_request = lambda label, uri: (posted.append(uri) or
+                                                       mock.Mock(status_code=503))
+        actual = concurrency.run_load(self.label, [{'uri': '/get'},
+                                                   {'method': 'POST', 'uri': '/post'}],
+                                      duration='0.2', concurrency='2')
+        self.assertTrue(actual['requests'] > 2)
+        self.assertEqual(actual['requests'], len(got) + len(posted))
+        self.assertTrue(abs(len(got) - len(posted)) <= 2)
+        self.assertEqual(actual['errors'], len(posted))
+        self.assertEqual(actual['error_counts'], {'503': actual['errors']})
+        self.assertEqual(actual['latency']['count'], actual['requests'])
+        self.assertEqual(sum(count for (_, count) in actual['latency']['histogram']),
+                         actual['requests'])
+        self.assertEqual(actual['missed'], 0)
+        self.assertTrue(actual['throughput'] > 0)
+        self.assertTrue(mock_logger.info.called)
+
+    def test_should_run_load_at_rate(self):
+        """Should schedule requests at the given rate."""
+        concurrency = self.concurrency
+        concurrency.get_request = mock.Mock(side_effect=RuntimeError('boom'))
+        actual = concurrency.run_load(self.label, {'uri': '/get'}, duration=0.5, rate=20,
+                                      concurrency=2)
+        self.assertEqual(actual['requests'], 10)
+        self.assertEqual(actual['error_counts'], {'RuntimeError': 10})
+
+    def test_should_fail_run_load_over_thresholds(self):
+        """Should fail when p99 latency or error rate is over the threshold."""
+        concurrency = self.concurrency
+        concurrency.get_request = mock.Mock(side_effect=lambda label, uri: sleep(0.05))
+        with self.assertRaises(AssertionError):
+            concurrency.run_load(self.label, {'uri': '/get'}, duration=0.1, max_p99=0.01)
+        concurrency.get_request = mock.Mock(side_effect=RuntimeError('boom'))
+        with self.assertRaises(AssertionError):
+            concurrency.run_load(self.label, {'uri': '/get'}, duration=0.1, max_error_rate=0.5)
@@ -21,16 +21,59 @@
 Extended Requests Library - a HTTP client library with OAuth2 support.
 """
 
+from hashlib import md5
+from json import loads
 from sys import path
-from os.path import abspath, dirname
+from os.path import abspath, dirname, join
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Thread
 import unittest
+import zlib
 from ExtendedRequestsLibrary import ExtendedRequestsLibrary
-from ExtendedRequestsLibrary.keywords import Utility
+from ExtendedRequestsLibrary.keywords import Concurrency, Utility
+from ExtendedRequestsLibrary.tokencache import TokenCache
+from ExtendedRequestsLibrary.tokenrefresher import TokenRefresher
+from ExtendedRequestsLibrary.uploads import CompressedBody, MappedFile, MultipartEncoder
 import mock
 from RequestsLibrary import RequestsLibrary
+from requests import Response
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
 path.append('src')
 
 
+class RetryHandler(BaseHTTPRequestHandler):
+    """Records each PUT request body, and answers the first one with 503."""
+
+    protocol_version = 'HTTP/1.1'
+    # do not wait forever for a body that is not sent
+    timeout = 5
+
+    def do_PUT(self):
+        # pylint: disable=invalid-name
+        """Record the request body, then ask for a retry or accept it."""
+        if self.headers.get('Transfer-Encoding', '') == 'chunked':
+            body = b''
+            size = int(self.rfile.readline().strip(), 16)
+            while size:
+                body += self.rfile.read(size)
+                self.rfile.readline()
+                size = int(self.rfile.readline().strip(), 16)
+            self.rfile.readline()
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.bodies.append(body)
+        status = b'503 Service Unavailable' if len(self.server.bodies) == 1 else b'200 OK'
+        self.wfile.write(b'HTTP/1.1 ' + status + b'\r\nContent-Length: 0\r\n\r\n')
+
+    def log_message(self, *args):
+        # pylint: disable=arguments-differ
+        """Do not log requests."""
+
+
 class ExtendedRequestsLibraryTests(unittest.TestCase):
     """Extended Requests library test class."""
 
@@ -59,47 +102,74 @@ class ExtendedRequestsLibraryTests(unittest.TestCase):
     def test_should_inherit_keywords(self):
         """Extended Requests library instance should inherit keyword instances."""
         self.assertIsInstance(self.library, RequestsLibrary)
+        self.assertIsInstance(self.library, Concurrency)
         self.assertIsInstance(self.library, Utility)
 
     def method_request_workflow(self, method, mock_oauth2, **kwargs):
         """Common workflow for method request."""
-        has_files = 'files' in kwargs
-        files = kwargs.pop('files', None)
         library = self.library
         oauth2_instance = mock_oauth2()
+        oauth2_instance.request_cookies = self.cookies
+        oauth2_instance.timeout = (self.timeout, self.timeout)
         # pylint: disable=protected-access
         library._cache.switch.return_value = oauth2_instance
         library._finalize_response = mock.Mock()
         url = library._get_url(oauth2_instance, self.uri)
-        lib_kwargs = {}
         request_kwargs = kwargs.copy()
         request_kwargs['allow_redirects'] = bool(self.allow_redirects)
         request_kwargs['cookies'] = self.cookies
-        if method == 'delete' or method == 'put':
-            request_kwargs['data'] = None
-        if has_files:
-            if files is not None:
-                lib_kwargs['files'] = files
-            request_kwargs['files'] = files
+        request_kwargs['data'] = None
         request_kwargs['headers'] = self.headers
-        if method == 'get':
-            request_kwargs['params'] = None
-        request_kwargs['timeout'] = self.timeout
-        getattr(library, '%s_request' % method)(self.label, self.uri, **lib_kwargs)
+        request_kwargs['params'] = None
+        request_kwargs['timeout'] = (self.timeout, self.timeout)
+        getattr(library, '%s_request' % method)(self.label, self.uri)
         getattr(oauth2_instance, method).assert_called_with(url, **request_kwargs)
         response = getattr(oauth2_instance, method)()
-        library._finalize_response.assert_called_with(oauth2_instance, response, method.upper())
+        library._finalize_response.assert_called_with(oauth2_instance, response, method.upper(),
+                                                      self.label)
+
+    def upload_workflow(self, method, mock_oauth2):
+        """Common workflow for file upload request."""
+        library = self.library
+        oauth2_instance = mock_oauth2()
+        bodies = []
+
+        def side_effect(url, **kwargs):
+            """Returns response after reading the streamed body."""
+            bodies.append(kwargs['data'].read())
+            return mock.Mock()
+        getattr(oauth2_instance, method).side_effect = side_effect
+        # pylint: disable=protected-access
+        library._cache.switch.return_value = oauth2_instance
+        library._finalize_response = mock.Mock(side_effect=lambda session, response, method, label:
+                                               response)
+        response = getattr(library, '%s_request' % method)(
+            self.label, self.uri, data={'key': 'value'}, headers={'Accept': 'text/plain'},
+            files={'file': '%s/file.txt' % self.cwd})
+        kwargs = getattr(oauth2_instance, method).call_args[1]
+        encoder = kwargs['data']
+        self.assertIsInstance(encoder, MultipartEncoder)
+        self.assertEqual(kwargs['headers'], {'Accept': 'text/plain',
+                                             'Content-Type': encoder.content_type})
+        self.assertFalse('files' in kwargs)
+        self.assertIn(b'name="key"\r\n\r\nvalue\r\n', bodies[0])
+        self.assertIn(b'name="file"; filename="file.txt"\r\nContent-Type: text/plain', bodies[0])
+        self.assertEqual(response.upload_size, len(bodies[0]))
+        self.assertTrue(response.upload_throughput > 0)
+        # pylint: disable=protected-access
+        self.assertTrue(all(handle.closed for handle in encoder._handles))
 
     def oauth2_workflow(self, grant, mock_oauth2, mock_client, mock_auth):
         """Common workflow for OAuth2 session."""
         args = [self.label, self.token_url, self.tenant_id, self.tenant_secret]
-        fetch_token_args = {'auth': mock_auth(), 'verify': self.verify}
+        fetch_token_args = {'auth': mock_auth(), 'timeout': mock_oauth2().timeout,
+                            'verify': self.verify}
         kwargs = dict(base_url=self.base_url, cookies=self.cookies, headers=self.headers,
                       proxies=self.proxies, timeout=self.timeout, verify=self.verify)
         library = self.library
         # pylint: disable=protected-access
-        library._register_urls = mock.Mock()
         library._session_init = mock.Mock()
+        library._warm_up = mock.Mock()
         if grant == 'password':
             args.append(self.username)
             args.append(self.password)
@@ -108,8 +178,8 @@ class ExtendedRequestsLibraryTests(unittest.TestCase):
         method = 'create_%s_oauth2_session' % grant
         oauth2_instance = mock_oauth2()
         getattr(library, method)(*args, **kwargs)
-        library._register_urls.assert_called_with(base_url=self.base_url,
-                                                  token_url=self.token_url)
+        library._warm_up.assert_called_with(oauth2_instance, [self.base_url, self.token_url],
+                                            'head')
         mock_client.assert_called_with('')
         mock_oauth2.assert_called_with(client=mock_client())
         library._session_init.assert_called_with(oauth2_instance, base_url=self.base_url,
@@ -118,23 +188,32 @@ class ExtendedRequestsLibraryTests(unittest.TestCase):
                                                  verify=self.verify)
         mock_auth.assert_called_with(self.tenant_id, self.tenant_secret)
         oauth2_instance.fetch_token.assert_called_with(self.token_url, **fetch_token_args)
+        oauth2_instance.register_compliance_hook.assert_called_with(
+            'protected_request', oauth2_instance.token_refresher)
+        self.assertEqual(oauth2_instance.token_refresher.refresh_kwargs,
+                         {'auth': mock_auth(), 'verify': self.verify})
         library._cache.register.assert_called_with(oauth2_instance, alias=self.label)
+        self.assertEqual(oauth2_instance.credentials_key, TokenCache.key(
+            self.token_url, self.tenant_id, self.username if grant == 'password' else None))
 
     def test_should_have_default_values(self):
         """Extended Requests library instance should have default values set."""
         self.assertIsInstance(self.library, ExtendedRequestsLibrary)
         # pylint: disable=protected-access
-        self.assertIsInstance(self.library._primers, dict)
-        self.assertIsNone(self.library.cookies)
-        self.assertEqual(self.library.timeout, self.timeout)
-        self.assertFalse(self.library.verify)
+        self.assertEqual(self.library._response_logging['mode'], 'all')
+        self.assertIsNone(self.library._deadline)
 
     def test_delete_should_remove_session(self):
         """Delete session should successfully remove requested existing session."""
         library = ExtendedRequestsLibrary()
-        library.create_session(self.label, self.base_url)
+        session = library.create_session(self.label, self.base_url)
+        adapter = session.adapters['https://']
+        adapter.close = mock.Mock()
         self.assertIsNotNone(library.get_session_object(self.label))
         library.delete_session(self.label)
+        adapter.close.assert_called_with()
+        # pylint: disable=protected-access
+        self.assertEqual(len(library._cache), 0)
         with self.assertRaises(RuntimeError) as context:
             # pylint: disable=protected-access
             library._cache.switch(self.label)
@@ -243,24 +322,138 @@ class ExtendedRequestsLibraryTests(unittest.TestCase):
     @mock.patch('ExtendedRequestsLibrary.OAuth2Session')
     def test_patch_request_workflow(self, mock_oauth2):
         """Patch method should return successfully."""
-        self.method_request_workflow('patch', mock_oauth2, data=None, files=None)
+        self.method_request_workflow('patch', mock_oauth2, data=None)
 
     @mock.patch('ExtendedRequestsLibrary.OAuth2Session')
     def test_patch_request_workflow_with_files(self, mock_oauth2):
         """Patch method with files should return successfully."""
-        self.method_request_workflow('patch', mock_oauth2, data=None,
-                                     files={'file.txt': '%s/file.txt' % self.cwd})
+        self.upload_workflow('patch', mock_oauth2)
 
     @mock.patch('ExtendedRequestsLibrary.OAuth2Session')
     def test_post_request_workflow(self, mock_oauth2):
         """Post method should return successfully."""
-        self.method_request_workflow('post', mock_oauth2, data=None, files=None)
+        self.method_request_workflow('post', mock_oauth2, data=None)
 
     @mock.patch('ExtendedRequestsLibrary.OAuth2Session')
     def test_post_request_workflow_with_files(self, mock_oauth2):
         """Post method with files should return successfully."""
-        self.method_request_workflow('post', mock_oauth2, data=None,
-                                     files={'file.txt': '%s/file.txt' % self.cwd})
+        self.upload_workflow('post', mock_oauth2)
+
+    @mock.patch('ExtendedRequestsLibrary.OAuth2Session')
+    def test_put_request_workflow_with_data_file(self, mock_oauth2):
+        """Put method with data file should stream the file and close it."""
+        library = self.library
+        oauth2_instance = mock_oauth2()
+        bodies = []
+
+        def side_effect(url, **kwargs):
+            """Returns response after reading the streamed body."""
+            bodies.append(kwargs['data'].read())
+            return mock.Mock()
+        oauth2_instance.put.side_effect = side_effect
+        # pylint: disable=protected-access
+        library._cache.switch.return_value = oauth2_instance
+        library._finalize_response = mock.Mock(side_effect=lambda session, response, method, label:
+                                               response)
+        response = library.put_request(self.label, self.uri,
+                                       data_file='%s/file.txt' % self.cwd)
+        with open('%s/file.txt' % self.cwd, 'rb') as reader:
+            content = reader.read()
+        self.assertEqual(bodies, [content])
+        self.assertEqual(response.upload_size, len(content))
+        data = oauth2_instance.put.call_args[1]['data']
+        self.assertIsInstance(data, MappedFile)
+        with self.assertRaises(ValueError):
+            data.read()
+
+    def test_should_compress_request_body(self):
+        """Should compress request bodies of the session size threshold, or when asked."""
+        library = self.library
+        session = mock.Mock(request_cookies=None, timeout=(10.0, 90.0), url=self.base_url)
+        bodies = []
+
+        def side_effect(url, **kwargs):
+            """Returns response after reading the streamed body."""
+            data = kwargs['data']
+            bodies.append((kwargs['headers'], data.read() if hasattr(data, 'read') else data))
+            return mock.Mock()
+        session.post.side_effect = side_effect
+        # pylint: disable=protected-access
+        library._cache.switch.return_value = session
+        library._finalize_response = mock.Mock(side_effect=lambda session, response, method, label:
+                                               response)
+        with self.assertRaises(ValueError):
+            library.set_request_compression(self.label, 'zip')
+        library.set_request_compression(self.label, 'GZIP', min_bytes='10')
+        self.assertEqual(session.request_compression, ('gzip', 10))
+        library.post_request(self.label, self.uri, data='short')
+        response = library.post_request(self.label, self.uri, json={'key': 'value' * 10})
+        library.post_request(self.label, self.uri, data='short', compress='deflate')
+        library.post_request(self.label, self.uri, data='value' * 10, compress='off')
+        self.assertEqual(bodies[0], (None, b'short'))
+        self.assertEqual(bodies[1][0], {'Content-Encoding': 'gzip',
+                                        'Content-Type': 'application/json'})
+        self.assertEqual(loads(zlib.decompress(bodies[1][1], 31).decode('utf-8')),
+                         {'key': 'value' * 10})
+        self.assertEqual(response.upload_size, len(bodies[1][1]))
+        self.assertEqual(bodies[2][0], {'Content-Encoding': 'deflate'})
+        self.assertEqual(zlib.decompress(bodies[2][1]), b'short')
+        self.assertEqual(bodies[3], (None, b'value' * 10))
+        library.set_request_compression(self.label, 'off')
+        self.assertIsNone(session.request_compression)
+
+    def test_should_stream_compressed_body(self):
+        """Should compress body in blocks while it is read."""
+        with self.assertRaises(ValueError):
+            CompressedBody(b'', 'zip')
+        path = '%s/file.txt' % self.cwd
+        with open(path, 'rb') as reader:
+            content = reader.read()
+        body = CompressedBody(MappedFile(path), 'gzip', block_size=4)
+        chunks = list(body)
+        self.assertEqual(zlib.decompress(b''.join(chunks), 31), content)
+        self.assertTrue(all(len(chunk) <= 4 for chunk in chunks))
+        self.assertEqual(body.size, sum(len(chunk) for chunk in chunks))
+        body.close()
+
+    def test_should_compress_iterable_body(self):
+        """Should compress iterable bodies chunk by chunk and not rewind them."""
+        body = CompressedBody((chunk for chunk in (b'abc', 'def', b'')), 'gzip', block_size=4)
+        self.assertEqual(zlib.decompress(b''.join(body), 31), b'abcdef')
+        with self.assertRaises(IOError):
+            body.seek(0)
+
+    def test_should_compress_form_list_body(self):
+        """Should encode form field lists before compressing them."""
+        library = self.library
+        session = mock.Mock(request_cookies=None, timeout=(10.0, 90.0), url=self.base_url,
+                            request_compression=None)
+        bodies = []
+
+        def side_effect(url, **kwargs):
+            """Returns response after reading the streamed body."""
+            bodies.append((kwargs['headers'], kwargs['data'].read()))
+            return mock.Mock()
+        session.post.side_effect = side_effect
+        # pylint: disable=protected-access
+        library._cache.switch.return_value = session
+        library._finalize_response = mock.Mock(side_effect=lambda session, response, method, label:
+                                               response)
+        library.post_request(self.label, self.uri, data=[('key', 'a'), ('key', 'b c')],
+                             compress='gzip')
+        library.post_request(self.label, self.uri, data=(chunk for chunk in (b'ab', b'cd')),
+                             compress='deflate')
+        self.assertEqual(bodies[0][0], {'Content-Encoding': 'gzip',
+                                        'Content-Type': 'application/x-www-form-urlencoded'})
+        self.assertEqual(zlib.decompress(bodies[0][1], 31), b'key=a&key=b+c')
+        self.assertEqual(bodies[1][0], {'Content-Encoding': 'deflate'})
+        self.assertEqual(zlib.decompress(bodies[1][1]), b'abcd')
+
+    def test_should_not_upload_files_with_string_data(self):
+        """Should not upload files with non-dictionary data."""
+        with self.assertRaises(ValueError):
+            self.library.post_request(self.label, self.uri, data='value',
+                                      files={'file.txt': '%s/file.txt' % self.cwd})
 
     @mock.patch('ExtendedRequestsLibrary.OAuth2Session')
     def test_put_request_workflow(self, mock_oauth2):
@@ -286,26 +479,31 @@ class ExtendedRequestsLibraryTests(unittest.TestCase):
         self.assertEqual(oauth2_instance.last_resp, response)
         mock_logger.debug.assert_called_with("%s response: %s" % ('HEAD', self.value))
 
-    @mock.patch('ExtendedRequestsLibrary.requests')
-    def test_should_register_url(self, mock_requests):
-        """Should register URL."""
-        hostname = 'subdomain.domain.moo'
-        library = self.library
-        # pylint: disable=protected-access
-        self.assertFalse(hostname in library._primers)
-        library._register_url('http://%s' % hostname)
-        mock_requests.head.assert_called_with('http://%s' % hostname, verify=False)
-        self.assertTrue(hostname in library._primers)
-
-    def test_should_register_urls(self):
-        """Should register multiple URLs."""
+    @mock.patch('ExtendedRequestsLibrary.warm_up')
+    @mock.patch('ExtendedRequestsLibrary.logger')
+    def test_should_warm_up(self, mock_logger, mock_warm_up):
+        """Should warm up hosts and log failures."""
         library = self.library
+        session = mock.Mock(timeout=(10.0, 90.0))
+        mock_warm_up.return_value = {'https://localhost2': RuntimeError('boom')}
         # pylint: disable=protected-access
-        library._register_url = mock.Mock()
-        library._register_urls(base_url='http://localhost1', token_url='https://localhost2')
-        library._register_url.assert_any_call('http://localhost1')
-        library._register_url.assert_any_call('https://localhost2')
-        self.assertTrue(library._register_url.call_count, 2)
+        library._cache.switch.return_value = session
+        library.warm_up_hosts(self.label, ['https://localhost1', 'https://localhost2'],
+                              connections=2)
+        mock_warm_up.assert_called_with(session, ['https://localhost1', 'https://localhost2'],
+                                        'connect', 2, 10.0)
+        mock_logger.warn.assert_called_with('Unable to warm up https://localhost2: boom')
+
+    @mock.patch('ExtendedRequestsLibrary.warm_up')
+    def test_create_session_should_warm_up(self, mock_warm_up):
+        """Should warm up server host on session creation when requested."""
+        mock_warm_up.return_value = {}
+        library = ExtendedRequestsLibrary()
+        session = library.create_session(self.label, self.base_url)
+        self.assertFalse(mock_warm_up.called)
+        session = library.create_session(self.label, self.base_url, warm_up='connect',
+                                         connect_timeout=2)
+        mock_warm_up.assert_called_with(session, [self.base_url], 'connect', 1, 2.0)
 
     def test_should_init_session_with_header(self):
         """Should init session with header."""
@@ -318,9 +516,8 @@ class ExtendedRequestsLibraryTests(unittest.TestCase):
         session.headers.update.assert_called_with({'key': 'value'})
         self.assertIsNotNone(session.proxies)
         self.assertFalse(session.verify)
-        self.assertEqual(self.library.cookies, self.cookies)
-        self.assertEqual(self.library.timeout, self.timeout)
-        self.assertEqual(self.library.verify, self.verify)
+        self.assertEqual(session.request_cookies, self.cookies)
+        self.assertEqual(session.timeout, (self.timeout, self.timeout))
 
     def test_should_init_session_with_proxy(self):
         """Should init session with proxy."""
@@ -333,9 +530,8 @@ class ExtendedRequestsLibraryTests(unittest.TestCase):
         self.assertFalse(session.headers.update.called)
         self.assertEqual(session.proxies, {'key': 'value'})
         self.assertFalse(session.verify)
-        self.assertEqual(self.library.cookies, self.cookies)
-        self.assertEqual(self.library.timeout, self.timeout)
-        self.assertEqual(self.library.verify, self.verify)
+        self.assertEqual(session.request_cookies, self.cookies)
+        self.assertEqual(session.timeout, (self.timeout, self.timeout))
 
     def test_should_init_session_without_header(self):
         """Should init session without header."""
@@ -348,17 +544,465 @@ class ExtendedRequestsLibraryTests(unittest.TestCase):
         self.assertFalse(session.headers.update.called)
         self.assertIsNotNone(session.proxies)
         self.assertFalse(session.verify)
-        self.assertEqual(self.library.cookies, self.cookies)
-        self.assertEqual(self.library.timeout, self.timeout)
-        self.assertEqual(self.library.verify, self.verify)
+        self.assertEqual(session.request_cookies, self.cookies)
+        self.assertEqual(session.timeout, (self.timeout, self.timeout))
 
     def test_should_not_init_without_session(self):
         """Should not init session without session."""
-        self.library.cookies = 'yum'
-        self.library.timeout = 0
-        self.library.verify = True
-        # pylint: disable=protected-access
-        self.library._session_init(session=None)
-        self.assertEqual(self.library.cookies, 'yum')
-        self.assertEqual(self.library.timeout, 0)
-        self.assertTrue(self.library.verify)
+        # pylint: disable=protected-access
+        self.assertIsNone(self.library._session_init(session=None))
+
+    def test_should_keep_timeouts_per_session(self):
+        """Should keep connect and read timeouts per session."""
+        library = ExtendedRequestsLibrary()
+        first = library.create_session('first', self.base_url, cookies={'key': 'value'})
+        second = library.create_session('second', self.base_url, timeout=5, read_timeout=30)
+        self.assertEqual(first.timeout, (10.0, 90.0))
+        self.assertEqual(first.request_cookies, {'key': 'value'})
+        self.assertEqual(second.timeout, (5.0, 30.0))
+        self.assertIsNone(second.request_cookies)
+
+    @mock.patch('ExtendedRequestsLibrary.time')
+    def test_should_bound_timeout_by_request_deadline(self, mock_time):
+        """Should bound the session timeouts by the remaining request deadline."""
+        library = self.library
+        session = mock.Mock(timeout=(10.0, 90.0))
+        # pylint: disable=protected-access
+        library._get_test_name = mock.Mock(return_value='test')
+        mock_time.return_value = 1000
+        library.set_request_deadline('30')
+        mock_time.return_value = 1025
+        self.assertEqual(library._get_request_timeout(session), (5.0, 5.0))
+        mock_time.return_value = 1030
+        with self.assertRaises(AssertionError):
+            library._get_request_timeout(session)
+        library._get_test_name.return_value = 'other test'
+        self.assertEqual(library._get_request_timeout(session), (10.0, 90.0))
+        self.assertIsNone(library._deadline)
+        library.set_request_deadline('30')
+        library.set_request_deadline()
+        self.assertEqual(library._get_request_timeout(session), (10.0, 90.0))
+
+    @mock.patch('ExtendedRequestsLibrary.warm_up')
+    def test_should_create_session_after_request_deadline(self, mock_warm_up):
+        """Should create and warm up sessions without the spent request deadline."""
+        library = ExtendedRequestsLibrary()
+        # pylint: disable=protected-access
+        library._get_test_name = mock.Mock(return_value='test')
+        library._deadline = ('test', 0)
+        mock_warm_up.return_value = {}
+        session = library.create_session(self.label, self.base_url, timeout='5')
+        self.assertFalse(mock_warm_up.called)
+        library.warm_up_hosts(self.label, [self.base_url])
+        mock_warm_up.assert_called_once_with(session, [self.base_url], 'connect', 1, 5.0)
+        with self.assertRaises(AssertionError):
+            library._get_request_timeout(session)
+
+    def test_should_mount_pooled_adapters(self):
+        """Should mount connection pooling and retry adapters on created session."""
+        library = ExtendedRequestsLibrary()
+        session = library.create_session(self.label, self.base_url, max_retries=5,
+                                         pool_block='true', pool_connections=2,
+                                         pool_maxsize=50, status_forcelist=['503'])
+        for prefix in ('http://', 'https://'):
+            adapter = session.adapters[prefix]
+            # pylint: disable=protected-access
+            self.assertEqual(adapter._pool_connections, 2)
+            self.assertEqual(adapter._pool_maxsize, 50)
+            self.assertTrue(adapter._pool_block)
+            self.assertEqual(adapter.max_retries.total, 5)
+            self.assertEqual(adapter.max_retries.status_forcelist, [503])
+        self.assertIsNot(session.adapters['http://'], session.adapters['https://'])
+
+    @mock.patch('ExtendedRequestsLibrary.HTTP2Adapter')
+    def test_should_mount_http2_adapters(self, mock_adapter):
+        """Should mount HTTP/2 adapters on created session when enabled."""
+        mock_adapter.return_value = mock.Mock(spec=['close', 'send'])
+        library = ExtendedRequestsLibrary()
+        session = library.create_session(self.label, self.base_url, http2='true',
+                                         max_retries=1, pool_maxsize=5)
+        mock_adapter.assert_called_with(pool_maxsize=5, max_retries=1)
+        self.assertEqual(mock_adapter.call_count, 2)
+        self.assertIs(session.adapters['https://'], mock_adapter.return_value)
+        self.assertEqual(library.get_connection_pool_statistics(self.label), {})
+
+    @mock.patch('ExtendedRequestsLibrary.HTTPBasicAuth')
+    @mock.patch('ExtendedRequestsLibrary.OAuth2Session')
+    def test_should_not_fetch_token_with_adapter_arguments(self, mock_oauth2, mock_auth):
+        """Should not pass adapter arguments to OAuth2 token fetch."""
+        library = self.library
+        # pylint: disable=protected-access
+        library._session_init = mock.Mock()
+        library._warm_up = mock.Mock()
+        oauth2_instance = mock_oauth2()
+        library.create_client_oauth2_session(self.label, self.token_url, self.tenant_id,
+                                             self.tenant_secret, max_retries=1, pool_maxsize=5,
+                                             verify=self.verify)
+        library._session_init.assert_called_with(oauth2_instance, max_retries=1,
+                                                 pool_maxsize=5, verify=self.verify)
+        oauth2_instance.fetch_token.assert_called_with(self.token_url, auth=mock_auth(),
+                                                       timeout=oauth2_instance.timeout,
+                                                       verify=self.verify)
+
+    def test_should_return_connection_pool_statistics(self):
+        """Should return connection pool usage per session."""
+        library = ExtendedRequestsLibrary()
+        session = library.create_session(self.label, self.base_url)
+        pool = mock.Mock(host='localhost', num_connections=2, num_requests=7, port=443,
+                         scheme='https')
+        pool.pool.maxsize = 10
+        pool.pool.queue = [None, mock.Mock()]
+        session.adapters['https://'].poolmanager.pools = {'key': pool}
+        expected = {'https://localhost:443': {'idle': 1, 'maxsize': 10, 'opened': 2,
+                                              'reused': 5}}
+        self.assertEqual(library.get_connection_pool_statistics(self.label), expected)
+        self.assertEqual(library.get_connection_pool_statistics(),
+                         {self.label: expected})
+
+    @mock.patch('ExtendedRequestsLibrary.TokenCache')
+    def test_should_fetch_token_through_token_cache(self, mock_cache):
+        """Should fetch OAuth2 token through token cache when enabled."""
+        session = mock.Mock()
+        argv = {'tenant_id': self.tenant_id, 'token_url': self.token_url,
+                'username': self.username}
+        mock_cache().fetch.side_effect = lambda key, fetcher: fetcher()
+        # pylint: disable=protected-access
+        self.library._fetch_token(session, argv, 'True', scope='read', verify=False)
+        mock_cache.assert_called_with(None)
+        mock_cache().key.assert_called_with(self.token_url, self.tenant_id, self.username, 'read')
+        session.fetch_token.assert_called_with(self.token_url, scope='read', verify=False)
+        self.assertEqual(session.token, session.fetch_token())
+        self.library._fetch_token(session, argv, '/path/to/tokens.json')
+        mock_cache.assert_called_with('/path/to/tokens.json')
+
+    @mock.patch('ExtendedRequestsLibrary.TokenCache')
+    def test_should_fetch_token_without_token_cache(self, mock_cache):
+        """Should fetch OAuth2 token directly when token cache is disabled."""
+        session = mock.Mock()
+        # pylint: disable=protected-access
+        self.library._fetch_token(session, {'token_url': self.token_url}, 'False')
+        session.fetch_token.assert_called_with(self.token_url)
+        self.assertFalse(mock_cache.called)
+
+    @mock.patch('ExtendedRequestsLibrary.OAuth2Session')
+    def test_should_return_token_refresh_count(self, mock_oauth2):
+        """Should return the number of renewed OAuth2 access tokens."""
+        library = self.library
+        session = mock_oauth2()
+        # pylint: disable=protected-access
+        library._cache.switch.return_value = session
+        self.assertEqual(library.get_token_refresh_count(self.label), 0)
+        session.token_refresher = TokenRefresher(session, None, self.token_url)
+        session.token_refresher.count = 3
+        self.assertEqual(library.get_token_refresh_count(self.label), 3)
+
+    def test_should_set_response_logging(self):
+        """Should set response logging policy."""
+        library = self.library
+        library.set_response_logging('FAILURE', max_bytes='10', content_types=['text/'])
+        # pylint: disable=protected-access
+        self.assertEqual(library._response_logging, {'content_types': ['text/'],
+                                                     'max_bytes': 10, 'mode': 'failure'})
+        with self.assertRaises(ValueError):
+            library.set_response_logging('sometimes')
+
+    @mock.patch('ExtendedRequestsLibrary.logger')
+    def test_finalize_response_with_logging_policy(self, mock_logger):
+        """Should log response content according to logging policy."""
+        library = self.library
+        session = mock.Mock()
+        response = mock.Mock(content='0123456789', headers={'content-type': 'text/plain'},
+                             status_code=200)
+        library.set_response_logging(max_bytes=4)
+        # pylint: disable=protected-access
+        library._finalize_response(session, response, 'GET')
+        mock_logger.debug.assert_called_with('GET response: 0123... (6 bytes truncated)')
+        mock_logger.reset_mock()
+        library.set_response_logging('failure')
+        library._finalize_response(session, response, 'GET')
+        self.assertFalse(mock_logger.debug.called)
+        response.status_code = 500
+        library._finalize_response(session, response, 'GET')
+        mock_logger.debug.assert_called_with('GET response: 0123456789')
+        mock_logger.reset_mock()
+        library.set_response_logging(content_types=['application/json'])
+        library._finalize_response(session, response, 'GET')
+        self.assertFalse(mock_logger.debug.called)
+        library.set_response_logging('off')
+        library._finalize_response(session, response, 'GET')
+        self.assertFalse(mock_logger.debug.called)
+        self.assertEqual(session.last_resp, response)
+
+    @mock.patch('ExtendedRequestsLibrary.logger')
+    def test_finalize_response_should_not_read_streamed_content(self, mock_logger):
+        """Should not log response content that has not been read yet."""
+        response = mock.Mock(_content=False)
+        type(response).content = mock.PropertyMock()
+        # pylint: disable=protected-access
+        self.library._finalize_response(mock.Mock(), response, 'GET')
+        self.assertFalse(mock_logger.debug.called)
+        self.assertFalse(type(response).content.called)
+
+    @mock.patch('ExtendedRequestsLibrary.logger')
+    def test_finalize_response_should_respect_log_level(self, mock_logger):
+        """Should not log response content when debug messages are not logged."""
+        library = self.library
+        library.builtin = mock.Mock()
+        library.builtin.get_variable_value.return_value = 'INFO'
+        response = mock.Mock()
+        type(response).content = mock.PropertyMock()
+        # pylint: disable=protected-access
+        library._finalize_response(mock.Mock(), response, 'GET')
+        library.builtin.get_variable_value.assert_called_with('${LOG LEVEL}')
+        self.assertFalse(mock_logger.debug.called)
+        self.assertFalse(type(response).content.called)
+        library.builtin.get_variable_value.return_value = 'TRACE'
+        library._finalize_response(mock.Mock(), response, 'GET')
+        self.assertTrue(mock_logger.debug.called)
+
+    def test_should_download_to_file(self):
+        """Should stream response content to file with content digest."""
+        library = self.library
+        session = mock.Mock(request_cookies=self.cookies, timeout=(self.timeout, self.timeout),
+                            url=self.base_url)
+        response = session.get()
+        response.iter_content.return_value = [b'abc', b'def']
+        # pylint: disable=protected-access
+        library._cache.switch.return_value = session
+        library._finalize_response = mock.Mock(side_effect=lambda session, response, method, label:
+                                               response)
+        directory = mkdtemp()
+        try:
+            path = join(directory, 'download.txt')
+            actual = library.download_to_file(self.label, self.uri, path, algorithm='md5',
+                                              chunk_size='3')
+            with open(path, 'rb') as reader:
+                self.assertEqual(reader.read(), b'abcdef')
+        finally:
+            rmtree(directory)
+        session.get.assert_called_with('%s/%s' % (self.base_url, self.uri),
+                                       allow_redirects=False, cookies=self.cookies, data=None,
+                                       headers=self.headers, params=None, stream=True,
+                                       timeout=(self.timeout, self.timeout))
+        response.iter_content.assert_called_with(chunk_size=3)
+        response.close.assert_called_with()
+        library._finalize_response.assert_called_with(session, response, 'GET', self.label)
+        self.assertEqual(actual['digest'], md5(b'abcdef').hexdigest())
+        self.assertEqual(actual['path'], path)
+        self.assertEqual(actual['size'], 6)
+        self.assertTrue(actual['elapsed'] >= 0)
+
+    def test_should_close_all_sessions(self):
+        """Should close connections of all sessions."""
+        self.library.close_all_sessions()
+        # pylint: disable=protected-access
+        self.library._cache.close_all.assert_called_with()
+
+    def test_should_set_session_eviction(self):
+        """Should set session eviction policy."""
+        library = ExtendedRequestsLibrary()
+        library.set_session_eviction(idle_timeout='30', max_sessions='5')
+        # pylint: disable=protected-access
+        self.assertEqual(library._cache.idle_timeout, 30)
+        self.assertEqual(library._cache.max_sessions, 5)
+        library.set_session_eviction()
+        self.assertIsNone(library._cache.idle_timeout)
+        self.assertIsNone(library._cache.max_sessions)
+
+    def test_should_cache_get_request(self):
+        """Should send GET request through the session response cache."""
+        library = self.library
+        session = mock.Mock(request_cookies=None, timeout=(10.0, 90.0), url=self.base_url)
+        session.get.return_value = mock.Mock(status_code=200,
+                                             headers={'cache-control': 'max-age=60'},
+                                             content=b'body')
+        # pylint: disable=protected-access
+        library._cache.switch.return_value = session
+        with self.assertRaises(RuntimeError):
+            library.get_response_cache_statistics(self.label)
+        library.enable_response_cache(self.label, max_bytes='1024')
+        self.assertEqual(session.response_cache.max_bytes, 1024)
+        library.get_request(self.label, self.uri, params={'key': 'value'})
+        response = library.get_request(self.label, self.uri, params={'key': 'value'})
+        self.assertEqual(response, session.get.return_value)
+        session.get.assert_called_once_with('%s/%s' % (self.base_url, self.uri),
+                                            allow_redirects=False, cookies=None, data=None,
+                                            headers=None, params='key=value',
+                                            timeout=(10.0, 90.0))
+        self.assertEqual(library.get_response_cache_statistics(self.label)['hits'], 1)
+
+    def test_should_return_response_json_once(self):
+        """Should decode response JSON once, and reuse it while body and parser are same."""
+        library = self.library
+        response = Response()
+        # pylint: disable=protected-access
+        response._content = b'{"py/tuple": [1, 2]}'
+        library._json_loads = mock.Mock(wraps=library._json_loads)
+        library._cache.switch.return_value = mock.Mock(last_resp=response)
+        self.assertEqual(library.get_response_json(response), (1, 2))
+        self.assertIs(library.get_response_json(label=self.label),
+                      library.get_response_json(response))
+        library._json_loads.assert_called_once_with(b'{"py/tuple": [1, 2]}')
+        library._cache.switch.assert_called_once_with(self.label)
+        self.assertNotIn('_parsed_json', response.__getstate__())
+        response._content = b'[3]'
+        self.assertEqual(library.get_response_json(response), [3])
+        self.assertEqual(library._json_loads.call_count, 2)
+        library.set_json_backend(mode='float')
+        self.assertEqual(library.get_response_json(response), [3])
+        self.assertIs(response._parsed_json[0], library._json_loads)
+        library._cache.switch.return_value = mock.Mock(last_resp=None)
+        with self.assertRaises(RuntimeError):
+            library.get_response_json(label=self.label)
+        with self.assertRaises(ValueError):
+            library.get_response_json()
+
+    @mock.patch('ExtendedRequestsLibrary.MappedFile')
+    @mock.patch('ExtendedRequestsLibrary.MultipartEncoder')
+    def test_should_not_open_upload_when_request_fails_early(self, mock_encoder, mock_file):
+        """Should not open upload files when the session or deadline lookup fails."""
+        library = self.library
+        # pylint: disable=protected-access
+        library._cache.switch.side_effect = RuntimeError("Non-existing index or alias 'x'.")
+        with self.assertRaises(RuntimeError):
+            library.post_request('x', self.uri, files={'file': '%s/file.txt' % self.cwd})
+        with self.assertRaises(RuntimeError):
+            library.put_request('x', self.uri, data_file='%s/file.txt' % self.cwd)
+        library._cache.switch.side_effect = None
+        library._cache.switch.return_value = mock.Mock(timeout=None)
+        library._get_test_name = mock.Mock(return_value='test')
+        library._deadline = ('test', 0)
+        with self.assertRaises(AssertionError):
+            library.post_request(self.label, self.uri, files={'file': '%s/file.txt' % self.cwd})
+        self.assertFalse(mock_encoder.called)
+        self.assertFalse(mock_file.called)
+
+    def test_should_send_request_with_digest_session(self):
+        """Should send request with session created by inherited digest session keyword."""
+        library = ExtendedRequestsLibrary()
+        session = library.create_digest_session(self.label, self.base_url,
+                                                [self.username, self.password])
+        self.assertFalse(hasattr(session, 'request_cookies'))
+        session.get = mock.Mock()
+        self.assertIs(library.get_request(self.label, self.uri), session.get.return_value)
+        session.get.assert_called_once_with('%s/%s' % (self.base_url, self.uri),
+                                            allow_redirects=False, cookies=None, data=None,
+                                            headers=None, params=None, timeout=None)
+
+    def test_should_not_share_cached_responses_across_credentials(self):
+        """Should not reuse responses cached on disk by a session with other credentials."""
+        library = ExtendedRequestsLibrary()
+        directory = mkdtemp()
+        try:
+            sessions = []
+            for (label, password) in (('first', 'a'), ('second', 'b'), ('third', 'a')):
+                session = library.create_session(label, self.base_url,
+                                                 auth=[self.username, password])
+                response = Response()
+                response.status_code = 200
+                response.headers['cache-control'] = 'max-age=60'
+                # pylint: disable=protected-access
+                response._content = password.encode('utf-8')
+                session.get = mock.Mock(return_value=response)
+                library.enable_response_cache(label, path=directory)
+                sessions.append(session)
+            self.assertEqual(library.get_request('first', self.uri).content, b'a')
+            self.assertEqual(library.get_request('second', self.uri).content, b'b')
+            self.assertEqual(library.get_request('third', self.uri).content, b'a')
+            self.assertEqual([session.get.call_count for session in sessions], [1, 1, 0])
+        finally:
+            library.delete_all_sessions()
+            rmtree(directory)
+
+    def test_should_enable_circuit_breaker(self):
+        """Should enable circuit breaker on session adapters."""
+        library = ExtendedRequestsLibrary()
+        session = library.create_session(self.label, self.base_url)
+        with self.assertRaises(RuntimeError):
+            library.get_circuit_breaker_states(self.label)
+        library.enable_circuit_breaker(self.label, threshold='3', cooldown='60')
+        self.assertEqual(session.circuit_breaker.threshold, 3)
+        self.assertEqual(session.circuit_breaker.cooldown, 60)
+        for prefix in ('http://', 'https://'):
+            self.assertIs(session.adapters[prefix].circuit_breaker, session.circuit_breaker)
+        self.assertEqual(library.get_circuit_breaker_states(self.label), {})
+
+    @mock.patch('ExtendedRequestsLibrary.time')
+    def test_should_record_request_statistics(self, mock_time):
+        """Should record request phase durations per label and endpoint once."""
+        library = self.library
+        redirect = mock.Mock(timings={'connect': 0.5, 'dns': 0.5, 'tls': 0.0, 'ttfb': 1.0},
+                             url='%s/users/42' % self.base_url)
+        response = mock.Mock(history=[redirect], received_at=100.0,
+                             timings={'connect': 0.0, 'dns': 0.0, 'tls': 0.0, 'ttfb': 1.0},
+                             url='%s/people/42' % self.base_url)
+        mock_time.return_value = 101.0
+        # pylint: disable=protected-access
+        library._finalize_response(mock.Mock(), response, 'GET', self.label)
+        library._finalize_response(mock.Mock(), response, 'GET', self.label)
+        library._finalize_response(mock.Mock(), mock.Mock(), 'GET', self.label)
+        self.assertEqual(response.timings['download'], 1.0)
+        actual = library.get_request_statistics('my-label')
+        self.assertEqual(actual['count'], 1)
+        self.assertEqual(actual['mean'], 4.0)
+        self.assertEqual(actual['phases'], {'connect': 0.5, 'dns': 0.5, 'download': 1.0,
+                                            'tls': 0.0, 'ttfb': 2.0})
+        self.assertEqual(list(actual['endpoints'].keys()), ['GET /api/users/{id}'])
+        self.assertEqual(list(library.get_request_statistics().keys()), [self.label])
+
+
+class UploadRetryTests(unittest.TestCase):
+    """Retried upload test class."""
+
+    def setUp(self):
+        """Start a local server that asks to retry the first upload."""
+        self.cwd = abspath(dirname(__file__))
+        self.server = HTTPServer(('127.0.0.1', 0), RetryHandler)
+        self.server.bodies = []
+        self.thread = Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.library = ExtendedRequestsLibrary()
+        self.library.create_session('retry', 'http://127.0.0.1:%d' % self.server.server_port,
+                                    backoff_factor='0', status_forcelist=['503'],
+                                    timeout='5', warm_up='off')
+
+    def tearDown(self):
+        """Stop the local server."""
+        self.library.delete_all_sessions()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_should_send_whole_file_again_when_retried(self):
+        """Should send the whole mapped file body again on retry."""
+        response = self.library.put_request('retry', '/upload',
+                                            data_file='%s/file.txt' % self.cwd)
+        self.assertEqual(response.status_code, 200)
+        with open('%s/file.txt' % self.cwd, 'rb') as reader:
+            self.assertEqual(self.server.bodies, [reader.read()] * 2)
+
+    def test_should_send_whole_multipart_body_again_when_retried(self):
+        """Should send the whole multipart body again on retry."""
+        response = self.library.put_request('retry', '/upload', data={'key': 'value'},
+                                            files={'file': '%s/file.txt' % self.cwd})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.bodies), 2)
+        self.assertEqual(self.server.bodies[0], self.server.bodies[1])
+        self.assertEqual(len(self.server.bodies[1]), response.upload_size)
+        self.assertIn(b'name="key"\r\n\r\nvalue\r\n', self.server.bodies[1])
+
+    def test_should_send_whole_compressed_body_again_when_retried(self):
+        """Should compress and send the whole body again on retry."""
+        data = b'compressible ' * 10000
+        response = self.library.put_request('retry', '/upload', data=data, compress='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.bodies), 2)
+        self.assertEqual(zlib.decompress(self.server.bodies[1], 31), data)
+        self.assertEqual(self.server.bodies[0], self.server.bodies[1])
+        self.assertEqual(response.upload_size, len(self.server.bodies[1]))
+        body = CompressedBody(data, 'gzip', block_size=4)
+        body.read(10)
+        with self.assertRaises(IOError):
+            body.seek(5)
+        self.assertEqual(body.seek(0, 1), 10)
+
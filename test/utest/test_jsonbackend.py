@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from decimal import Decimal
+import json
+from sys import path
+import unittest
+from ExtendedRequestsLibrary.jsonbackend import get_loads
+import mock
+path.append('src')
+
+
+class JSONBackendTests(unittest.TestCase):
+    """JSON backend test class."""
+
+    def test_should_decode_into_decimal(self):
+        """Should decode numbers with a fraction into Decimal by default."""
+        self.assertEqual(get_loads()('[{"key": 5.5}, {"py/tuple": [1, 2]}]'),
+                         [{'key': Decimal('5.5')}, (1, 2)])
+
+    def test_should_decode_into_float(self):
+        """Should decode numbers with a fraction into float in float mode."""
+        with mock.patch('ExtendedRequestsLibrary.jsonbackend.orjson', None):
+            with mock.patch('ExtendedRequestsLibrary.jsonbackend.ujson', None):
+                value = get_loads(mode='FLOAT')('{"key": 5.5}')['key']
+        self.assertTrue(isinstance(value, float))
+
+    @mock.patch('ExtendedRequestsLibrary.jsonbackend.ujson')
+    def test_should_restore_after_decoding_without_object_hook(self, mock_ujson):
+        """Should restore tagged objects after decoding with backends without object hook."""
+        mock_ujson.loads.side_effect = json.loads
+        loads = get_loads('ujson', 'float')
+        self.assertEqual(loads(b'{"items": [{"py/set": [1]}]}'), {'items': [set([1])]})
+        mock_ujson.loads.assert_called_with(b'{"items": [{"py/set": [1]}]}')
+        self.assertEqual(loads('{"key": "py/set"}'), {'key': 'py/set'})
+
+    @mock.patch('ExtendedRequestsLibrary.jsonbackend.orjson', None)
+    def test_should_reject_unavailable_backend(self):
+        """Should reject unknown, not installed or imprecise backends."""
+        with self.assertRaises(ValueError):
+            get_loads('yaml')
+        with self.assertRaises(ValueError):
+            get_loads(mode='double')
+        with self.assertRaises(ValueError):
+            get_loads('orjson', 'float')
+        with mock.patch('ExtendedRequestsLibrary.jsonbackend.ujson'):
+            with self.assertRaises(ValueError):
+                get_loads('ujson')
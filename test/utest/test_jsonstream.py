@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+import json
+from sys import path
+import unittest
+from ExtendedRequestsLibrary.jsonstream import iter_items
+path.append('src')
+
+
+class JSONStreamTests(unittest.TestCase):
+    """JSON stream test class."""
+
+    def setUp(self):
+        """Prepare a document with values that look like delimiters inside strings."""
+        self.document = {'meta': {'skip': [1, {'x': 'a]"}'}], 'text': 'q\\"\\\\'},
+                         'data': [{'id': index, 'text': u'é"\\ ]}{,', 'value': 1.5,
+                                   'nested': [[1], {'a': []}], 'none': None}
+                                  for index in range(50)],
+                         'tail': 3}
+        self.raw = json.dumps(self.document, ensure_ascii=False).encode('utf-8')
+
+    def chunks(self, size):
+        """Returns the document bytes in chunks of the given size."""
+        return [self.raw[index:index + size] for index in range(0, len(self.raw), size)]
+
+    def test_should_yield_values_at_prefix(self):
+        """Should yield values at the prefix whatever the chunk boundaries are."""
+        for size in (1, 3, 64, len(self.raw)):
+            chunks = self.chunks(size)
+            self.assertEqual(list(iter_items(chunks, 'data.item')), self.document['data'])
+            self.assertEqual(list(iter_items(chunks, 'data.item.id')), list(range(50)))
+            self.assertEqual(list(iter_items(chunks, 'data.item.nested.item.item')), [1] * 50)
+            self.assertEqual(list(iter_items(chunks, 'meta.skip.item')),
+                             self.document['meta']['skip'])
+            self.assertEqual(list(iter_items(chunks, 'tail')), [3])
+            self.assertEqual(list(iter_items(chunks, '')), [self.document])
+            self.assertEqual(list(iter_items(chunks, 'missing.item')), [])
+
+    def test_should_yield_top_level_array_items(self):
+        """Should yield items of top-level array decoded with the given function."""
+        self.assertEqual(list(iter_items([' [1, 2 ', ',3] '], loads=lambda text: text)),
+                         ['1', '2', '3'])
+        self.assertEqual(list(iter_items(['[]'])), [])
+
+    def test_should_read_lazily(self):
+        """Should only read the chunks needed for the values consumed."""
+        def chunks():
+            """Yields the first item, and fails on the second one."""
+            yield b'[{"id": 1},'
+            raise AssertionError('read too far')
+        self.assertEqual(next(iter_items(chunks())), {'id': 1})
+
+    def test_should_reject_invalid_document(self):
+        """Should raise error on missing delimiters."""
+        for (chunks, prefix) in ((['[1 2]'], 'item'), (['[1, 2'], 'item'),
+                                 (['{"a" 1}'], 'a'), (['{"a": [1'], 'a')):
+            with self.assertRaises(ValueError):
+                list(iter_items(chunks, prefix))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from sys import path
+import unittest
+from ExtendedRequestsLibrary.latency import LatencyHistogram, RequestStatistics
+path.append('src')
+
+
+class LatencyHistogramTests(unittest.TestCase):
+    """Latency histogram test class."""
+
+    def test_should_summarize_empty_histogram(self):
+        """Should summarize empty histogram."""
+        self.assertEqual(LatencyHistogram().summary(), {
+            'count': 0, 'max': None, 'mean': None, 'min': None, 'p50': None, 'p90': None,
+            'p99': None})
+
+    def test_should_return_percentiles_within_precision(self):
+        """Should return percentiles within the histogram precision."""
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.add(value / 1000.0)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 1000)
+        self.assertAlmostEqual(summary['mean'], 0.5005)
+        self.assertEqual(summary['min'], 0.001)
+        self.assertEqual(summary['max'], 1.0)
+        for (key, expected) in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+            self.assertTrue(expected <= summary[key] <= expected * 1.02, (key, summary[key]))
+
+    def test_should_keep_memory_bounded(self):
+        """Should keep a bounded number of buckets."""
+        histogram = LatencyHistogram()
+        for value in range(100000):
+            histogram.add(value / 10000.0)
+        # pylint: disable=protected-access
+        self.assertTrue(len(histogram._buckets) < 600)
+        self.assertEqual(histogram.percentile(100), histogram.maximum)
+
+
+class RequestStatisticsTests(unittest.TestCase):
+    """Request statistics test class."""
+
+    def test_should_return_uri_template(self):
+        """Should replace identifier path segments."""
+        self.assertEqual(RequestStatistics.template('https://localhost/api/users/42?key=1'),
+                         '/api/users/{id}')
+        self.assertEqual(RequestStatistics.template(
+            'https://localhost/orders/123e4567-e89b-12d3-a456-426655440000/items'),
+                         '/orders/{id}/items')
+        self.assertEqual(RequestStatistics.template('https://localhost/blobs/0123456789abcdef'),
+                         '/blobs/{id}')
+        self.assertEqual(RequestStatistics.template('https://localhost/v2/items'), '/v2/items')
+        self.assertEqual(RequestStatistics.template('https://localhost'), '/')
+
+    def test_should_record_per_label_and_endpoint(self):
+        """Should record statistics per label and per method and URI template."""
+        statistics = RequestStatistics()
+        statistics.record('My Label', 'get', 'https://localhost/users/1', {'ttfb': 1.0})
+        statistics.record('mylabel', 'GET', 'https://localhost/users/2',
+                          {'dns': 1.0, 'ttfb': 2.0})
+        statistics.record('mylabel', 'POST', 'https://localhost/users', {'ttfb': 3.0})
+        actual = statistics.summary('MY LABEL')
+        self.assertEqual(actual['count'], 3)
+        self.assertEqual(actual['mean'], 7.0 / 3)
+        self.assertEqual(actual['phases']['ttfb'], 2.0)
+        self.assertEqual(sorted(actual['endpoints'].keys()), ['GET /users/{id}', 'POST /users'])
+        self.assertEqual(actual['endpoints']['GET /users/{id}']['mean'], 2.0)
+        self.assertNotIn('endpoints', actual['endpoints']['POST /users'])
+        self.assertEqual(list(statistics.summary().keys()), ['My Label'])
+        self.assertEqual(statistics.summary('other')['count'], 0)
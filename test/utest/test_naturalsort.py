@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from decimal import Decimal
+from random import Random
+from sys import path
+import unittest
+from ExtendedRequestsLibrary.naturalsort import natural_key, natural_sort, natural_top
+path.append('src')
+
+
+class NaturalSortTests(unittest.TestCase):
+    """Natural sort test class."""
+
+    def setUp(self):
+        """Prepare dictionaries with ties, missing keys and mixed values."""
+        random = Random(0)
+        self.items = [{'id': index, 'name': random.choice(['File10', 'file2', 'File2b', None]),
+                       'size': random.choice([3, Decimal('2.5'), '10', 1.5])}
+                      for index in range(200)]
+        for item in self.items[::7]:
+            del item['size']
+
+    def test_should_return_natural_key(self):
+        """Should split text into lower case text and numbers."""
+        self.assertEqual(natural_key('File10b2'), ('file', 10, 'b', 2, ''))
+        self.assertEqual(natural_key(Decimal('2.5')), ('', Decimal('2.5')))
+        self.assertEqual(natural_key([1]), ('[', 1, ']'))
+        self.assertEqual(natural_key(('A', 2)), ("('a', ", 2, ')'))
+
+    def test_should_sort_tuple_values(self):
+        """Should sort and select dictionaries with tuple values."""
+        items = [{'key': ('b', 10)}, {'key': ('b', 9)}, {'key': ('a',)}, {'key': None}]
+        expected = [items[2], items[1], items[0], items[3]]
+        self.assertEqual(natural_sort(items, ['key']), expected)
+        self.assertEqual(natural_top(items, 3, ['key']), expected[:3])
+        self.assertEqual(natural_top(items, 2, ['-key', 'missing']), [items[0], items[1]])
+        self.assertTrue(natural_key(9) < natural_key('10 items') < natural_key('item'))
+
+    def test_should_sort_by_keys(self):
+        """Should stable sort by each key in its direction, with missing values last."""
+        actual = natural_sort(self.items, ['name', '-size'])
+        self.assertEqual(len(actual), len(self.items))
+        names = [item['name'] for item in actual]
+        self.assertEqual(names, sorted(names, key=lambda name: (
+            name is None, ['file2', 'File2b', 'File10'].index(name) if name else 0)))
+        for (first, second) in zip(actual, actual[1:]):
+            if first['name'] != second['name']:
+                continue
+            if 'size' not in first or 'size' not in second:
+                self.assertFalse('size' not in first and 'size' in second)
+            elif first['size'] == second['size']:
+                self.assertLess(first['id'], second['id'])
+            else:
+                self.assertGreater(float(first['size']), float(second['size']))
+
+    def test_should_select_top_items(self):
+        """Should select the same items as a full sort."""
+        for keys in (['name'], ['-size'], ['-name', '-size'], ['name', '-size', 'id'],
+                     ['missing']):
+            for count in (0, 1, 10, 500):
+                self.assertEqual(natural_top(self.items, count, keys),
+                                 natural_sort(self.items, keys)[:count])
+
+    def test_should_require_keys(self):
+        """Should raise error without sort keys."""
+        with self.assertRaises(ValueError):
+            natural_sort(self.items, [])
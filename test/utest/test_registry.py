@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from sys import path
+import unittest
+from ExtendedRequestsLibrary.registry import SessionRegistry
+import mock
+path.append('src')
+
+
+class SessionRegistryTests(unittest.TestCase):
+    """Session registry test class."""
+
+    def setUp(self):
+        """Instantiate the session registry class."""
+        self.registry = SessionRegistry()
+        self.session = mock.Mock()
+
+    def test_should_have_default_values(self):
+        """Session registry instance should have default values set."""
+        self.assertIsNone(self.registry.current)
+        self.assertIsNone(self.registry.idle_timeout)
+        self.assertIsNone(self.registry.max_sessions)
+        self.assertEqual(len(self.registry), 0)
+
+    def test_should_switch_with_insensitive_label(self):
+        """Should return registered session using case and space insensitive label."""
+        self.assertEqual(self.registry.register(self.session, alias='My Label'), 1)
+        self.assertEqual(self.registry.switch('mylabel'), self.session)
+        self.assertEqual(self.registry.current, self.session)
+        self.assertEqual(self.registry.items(), [('My Label', self.session)])
+        with self.assertRaises(RuntimeError):
+            self.registry.switch('other')
+
+    def test_should_replace_session_with_same_label(self):
+        """Should close the session replaced by a new session with the same label."""
+        other = mock.Mock()
+        self.registry.register(self.session, alias='label')
+        self.assertEqual(self.registry.register(other, alias='LABEL'), 1)
+        self.assertEqual(self.registry.switch('label'), other)
+        self.session.close.assert_called_with()
+        self.assertFalse(other.close.called)
+
+    def test_should_remove_and_close_session(self):
+        """Should remove the session and close its connection pools."""
+        self.registry.register(self.session, alias='label')
+        self.assertEqual(self.registry.remove('label'), self.session)
+        self.session.close.assert_called_with()
+        self.assertIsNone(self.registry.current)
+        self.assertEqual(len(self.registry), 0)
+        with self.assertRaises(RuntimeError):
+            self.registry.remove('label')
+
+    def test_should_close_all_sessions(self):
+        """Should close all sessions and keep them registered."""
+        other = mock.Mock()
+        self.registry.register(self.session, alias='label1')
+        self.registry.register(other, alias='label2')
+        self.registry.close_all()
+        self.session.close.assert_called_with()
+        other.close.assert_called_with()
+        self.assertEqual(len(self.registry), 2)
+
+    def test_should_empty_cache(self):
+        """Should remove and close all sessions."""
+        self.registry.register(self.session, alias='label')
+        self.registry.empty_cache()
+        self.session.close.assert_called_with()
+        self.assertIsNone(self.registry.current)
+        self.assertEqual(len(self.registry), 0)
+
+    def test_should_evict_least_recently_used(self):
+        """Should remove least recently used sessions over the maximum."""
+        sessions = [mock.Mock() for _ in range(3)]
+        self.registry.max_sessions = 2
+        self.registry.register(sessions[0], alias='label0')
+        self.registry.register(sessions[1], alias='label1')
+        self.registry.switch('label0')
+        self.registry.register(sessions[2], alias='label2')
+        self.assertEqual([label for (label, _) in self.registry.items()], ['label0', 'label2'])
+        sessions[1].close.assert_called_with()
+        self.assertFalse(sessions[0].close.called)
+
+    @mock.patch('ExtendedRequestsLibrary.registry.time')
+    def test_should_evict_idle_sessions(self, mock_time):
+        """Should remove sessions unused longer than the idle timeout."""
+        other = mock.Mock()
+        self.registry.idle_timeout = 60
+        mock_time.return_value = 1000
+        self.registry.register(self.session, alias='label1')
+        mock_time.return_value = 1050
+        self.registry.register(other, alias='label2')
+        mock_time.return_value = 1100
+        self.assertEqual(self.registry.switch('label2'), other)
+        self.session.close.assert_called_with()
+        with self.assertRaises(RuntimeError):
+            self.registry.switch('label1')
+        mock_time.return_value = 1200
+        self.assertEqual(self.registry.switch('label2'), other)
+        self.assertFalse(other.close.called)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from shutil import rmtree
+from sys import path
+from tempfile import mkdtemp
+import unittest
+from ExtendedRequestsLibrary.responsecache import ResponseCache, session_scope
+import mock
+from requests import Response, Session
+from requests.auth import HTTPBasicAuth, HTTPDigestAuth
+path.append('src')
+
+
+def make_response(status_code=200, content=b'body', **headers):
+    """Returns a response with the given status code, content and headers."""
+    response = Response()
+    response.status_code = status_code
+    # pylint: disable=protected-access
+    response._content = content
+    response.headers.update(dict((name.replace('_', '-'), value)
+                                 for (name, value) in headers.items()))
+    return response
+
+
+class ResponseCacheTests(unittest.TestCase):
+    """Response cache test class."""
+
+    def setUp(self):
+        """Instantiate the response cache class."""
+        self.cache = ResponseCache()
+        self.url = 'https://localhost/api/endpoint'
+
+    def test_should_have_default_values(self):
+        """Response cache instance should have default values set."""
+        self.assertEqual(self.cache.statistics(), {'bytes': 0, 'entries': 0, 'hits': 0,
+                                                   'misses': 0, 'revalidations': 0})
+        self.assertIsNone(self.cache.path)
+
+    def test_should_reuse_fresh_response(self):
+        """Should reuse response while max-age allows it."""
+        response = make_response(cache_control='max-age=60')
+        send = mock.Mock(return_value=response)
+        self.assertEqual(self.cache.fetch('GET', self.url, None, send), response)
+        self.assertEqual(self.cache.fetch('GET', self.url, None, send), response)
+        send.assert_called_once_with(None)
+        self.assertEqual(self.cache.statistics(), {'bytes': 4, 'entries': 1, 'hits': 1,
+                                                   'misses': 1, 'revalidations': 0})
+
+    def test_should_key_by_method_url_and_headers(self):
+        """Should not reuse response of other method, URL or headers."""
+        send = mock.Mock(side_effect=lambda headers: make_response(cache_control='max-age=60'))
+        self.cache.fetch('GET', self.url, None, send)
+        self.cache.fetch('HEAD', self.url, None, send)
+        self.cache.fetch('GET', '%s?key=value' % self.url, None, send)
+        self.cache.fetch('GET', self.url, {'Accept': 'text/plain'}, send)
+        self.cache.fetch('GET', self.url, {'accept': 'text/plain'}, send)
+        self.assertEqual(send.call_count, 4)
+
+    def test_should_not_store_uncacheable_response(self):
+        """Should not store no-store, error, and stale responses without validators."""
+        for response in (make_response(cache_control='no-store, max-age=60'),
+                         make_response(status_code=500, cache_control='max-age=60'),
+                         make_response()):
+            send = mock.Mock(return_value=response)
+            self.cache.fetch('GET', self.url, None, send)
+            self.cache.fetch('GET', self.url, None, send)
+            self.assertEqual(send.call_count, 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_should_revalidate_stale_response(self):
+        """Should reuse stale response after 304 Not Modified."""
+        response = make_response(cache_control='no-cache', etag='"v1"',
+                                 last_modified='Wed, 21 Oct 2015 07:28:00 GMT')
+        send = mock.Mock(side_effect=[response, make_response(
+            status_code=304, content=b'', cache_control='max-age=60', content_length='0')])
+        self.cache.fetch('GET', self.url, {'Accept': 'text/plain'}, send)
+        self.assertEqual(self.cache.fetch('GET', self.url, {'Accept': 'text/plain'}, send),
+                         response)
+        send.assert_called_with({'Accept': 'text/plain', 'If-None-Match': '"v1"',
+                                 'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        self.assertEqual(response.headers['cache-control'], 'max-age=60')
+        self.assertNotIn('content-length', response.headers)
+        self.assertEqual(self.cache.fetch('GET', self.url, {'Accept': 'text/plain'}, send),
+                         response)
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(self.cache.statistics()['revalidations'], 1)
+
+    def test_should_replace_changed_response(self):
+        """Should replace stale response when the server sends a new one."""
+        changed = make_response(content=b'new', etag='"v2"')
+        send = mock.Mock(side_effect=[make_response(etag='"v1"'), changed])
+        self.cache.fetch('GET', self.url, None, send)
+        self.assertEqual(self.cache.fetch('GET', self.url, None, send), changed)
+        self.assertEqual(self.cache.statistics()['misses'], 2)
+        self.assertEqual(self.cache.statistics()['bytes'], 3)
+
+    def test_should_evict_least_recently_used(self):
+        """Should evict least recently used responses over the maximum size."""
+        self.cache.max_bytes = 8
+        send = mock.Mock(side_effect=lambda headers: make_response(cache_control='max-age=60'))
+        self.cache.fetch('GET', '%s/1' % self.url, None, send)
+        self.cache.fetch('GET', '%s/2' % self.url, None, send)
+        self.cache.fetch('GET', '%s/1' % self.url, None, send)
+        self.cache.fetch('GET', '%s/3' % self.url, None, send)
+        self.assertEqual(self.cache.statistics()['bytes'], 8)
+        self.cache.fetch('GET', '%s/1' % self.url, None, send)
+        self.cache.fetch('GET', '%s/2' % self.url, None, send)
+        self.assertEqual(send.call_count, 4)
+
+    def test_should_reuse_response_from_disk(self):
+        """Should reuse response stored on disk."""
+        directory = mkdtemp()
+        try:
+            cache = ResponseCache(max_bytes=0, path=directory)
+            send = mock.Mock(return_value=make_response(cache_control='max-age=60'))
+            cache.fetch('GET', self.url, None, send)
+            self.assertEqual(len(cache), 0)
+            actual = ResponseCache(path=directory).fetch('GET', self.url, None, send)
+            self.assertEqual(actual.content, b'body')
+            send.assert_called_once_with(None)
+        finally:
+            rmtree(directory)
+
+    def test_should_not_share_responses_across_scopes(self):
+        """Should only reuse responses stored on disk with the same scope."""
+        directory = mkdtemp()
+        try:
+            send = mock.Mock(return_value=make_response(cache_control='max-age=60'))
+            ResponseCache(path=directory).fetch('GET', self.url, None, send, 'first')
+            ResponseCache(path=directory).fetch('GET', self.url, None, send, 'second')
+            self.assertEqual(send.call_count, 2)
+            ResponseCache(path=directory).fetch('GET', self.url, None, send, 'first')
+            self.assertEqual(send.call_count, 2)
+        finally:
+            rmtree(directory)
+
+    def test_should_not_store_vary_all_response(self):
+        """Should not store response varying on everything."""
+        send = mock.Mock(return_value=make_response(cache_control='max-age=60', vary='*'))
+        self.cache.fetch('GET', self.url, None, send)
+        self.cache.fetch('GET', self.url, None, send)
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_should_return_session_scope(self):
+        """Should return the same scope only for sessions with the same credentials."""
+        def scope(**settings):
+            """Returns the scope of a new session with the given settings."""
+            session = Session()
+            for (name, value) in settings.items():
+                if name == 'headers':
+                    session.headers.update(value)
+                else:
+                    setattr(session, name, value)
+            return session_scope(session)
+        scopes = [scope(), scope(headers={'Authorization': 'Bearer a'}),
+                  scope(headers={'Authorization': 'Bearer b'}),
+                  scope(auth=HTTPBasicAuth('user', 'a')), scope(auth=HTTPBasicAuth('user', 'b')),
+                  scope(auth=HTTPDigestAuth('user', 'a')), scope(auth=('user', 'a')),
+                  scope(request_cookies={'session': 'a'}), scope(credentials_key='a'),
+                  scope(credentials_key='b')]
+        self.assertEqual(len(set(scopes)), len(scopes))
+        self.assertEqual(scope(auth=HTTPDigestAuth('user', 'a')), scopes[5])
+        self.assertEqual(scope(credentials_key='a'), scopes[8])
+        session = Session()
+        session.cookies.set('session', 'a')
+        self.assertNotEqual(session_scope(session), scopes[0])
+        self.assertEqual(session_scope(mock.Mock()), session_scope(mock.Mock()))
+
+    def test_should_clear(self):
+        """Should remove in-memory responses and reset statistics."""
+        send = mock.Mock(return_value=make_response(cache_control='max-age=60'))
+        self.cache.fetch('GET', self.url, None, send)
+        self.cache.clear()
+        self.assertEqual(self.cache.statistics(), {'bytes': 0, 'entries': 0, 'hits': 0,
+                                                   'misses': 0, 'revalidations': 0})
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from sys import path
+import unittest
+from ExtendedRequestsLibrary import restorer
+from ExtendedRequestsLibrary.restorer import register, restore, restore_all, tagged
+path.append('src')
+
+
+class RestorerTests(unittest.TestCase):
+    """Object restorer test class."""
+
+    def tearDown(self):
+        """Remove the registered test tag."""
+        # pylint: disable=protected-access
+        if restorer.RESTORERS.pop('test/upper', None) is not None:
+            restorer._ORDER[:] = list(restorer.RESTORERS.items())
+            restorer._TAGS.discard('test/upper')
+            restorer._NEEDLES[:] = [needle for needle in restorer._NEEDLES
+                                    if not needle[0].startswith('"test')]
+
+    def test_should_return_untagged_object(self):
+        """Should return objects without registered tag as they are."""
+        dct = {'key': 'value', 'py/unknown': 1}
+        self.assertIs(restore(dct), dct)
+
+    def test_should_restore_by_tag_order(self):
+        """Should restore objects that have other keys by the first registered tag."""
+        self.assertEqual(restore({'key': 1, 'py/set': [1], 'py/tuple': [2]}), (2,))
+
+    def test_should_reuse_namedtuple_type(self):
+        """Should create named tuple type once for each type and fields."""
+        first = restore({'py/collections.namedtuple':
+                         {'fields': ['a', 'b'], 'type': 'Pair', 'values': [1, 2]}})
+        second = restore({'py/collections.namedtuple':
+                          {'fields': ['a', 'b'], 'type': 'Pair', 'values': [3, 4]}})
+        self.assertIs(type(first), type(second))
+        self.assertEqual((second.a, second.b), (3, 4))
+
+    def test_should_register_tag(self):
+        """Should restore objects of registered tag."""
+        register('test/upper', lambda value: value.upper())
+        self.assertEqual(restore({'test/upper': 'value'}), 'VALUE')
+        self.assertEqual(restore({'key': 1, 'test/upper': 'value'}), 'VALUE')
+        self.assertTrue(tagged('{"test\\/upper": "value"}'))
+
+    def test_should_restore_inner_objects_first(self):
+        """Should restore all tagged objects of decoded document, inner objects first."""
+        document = {'items': [{'py/tuple': [{'py/set': [1]}]}, {'key': 'value'}]}
+        self.assertEqual(restore_all(document),
+                         {'items': [(set([1]),), {'key': 'value'}]})
+
+    def test_should_find_tags_in_json(self):
+        """Should find quoted tags in JSON text and bytes."""
+        self.assertTrue(tagged('[{"py/set": [1]}]'))
+        self.assertTrue(tagged(b'[{"py\\/set": [1]}]'))
+        self.assertFalse(tagged('[{"happy/set": [1]}]'))
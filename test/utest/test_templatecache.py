@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+import mmap
+import os
+from shutil import rmtree
+from sys import path
+from tempfile import mkdtemp
+import unittest
+from ExtendedRequestsLibrary.templatecache import Template, TemplateCache
+import mock
+path.append('src')
+
+
+class TemplateTests(unittest.TestCase):
+    """Template test class."""
+
+    def test_should_render_variables(self):
+        """Should replace variables, unescape text and lower boolean literals."""
+        template = Template(u'{"a": ${a}, "b": "${b}[0] \\${c}", "c": ${a}, "d": True}')
+        values = {'${a}': True, '${b}[0]': u'é'}
+        self.assertEqual(template.render(values.get),
+                         u'{"a": true, "b": "é ${c}", "c": true, "d": true}')
+        values['${a}'] = 5
+        self.assertEqual(template.render(values.get),
+                         u'{"a": 5, "b": "é ${c}", "c": 5, "d": true}')
+
+    def test_should_only_substitute_changed_values(self):
+        """Should reuse the text when no value changed."""
+        template = Template(u'[${a}]')
+        first = template.render(lambda name: 1)
+        self.assertIs(template.render(lambda name: 1), first)
+        self.assertEqual(template.render(lambda name: 2), u'[2]')
+        self.assertEqual(Template(u'[]').render(None), u'[]')
+
+
+class TemplateCacheTests(unittest.TestCase):
+    """Template cache test class."""
+
+    def setUp(self):
+        """Instantiate the template cache class and a JSON file."""
+        self.cache = TemplateCache()
+        self.directory = mkdtemp()
+        self.path = os.path.join(self.directory, 'request.json')
+        self.write(b'{\r\n"key": ${value}}')
+
+    def tearDown(self):
+        """Remove the JSON file."""
+        rmtree(self.directory)
+
+    def write(self, content, mtime=1000000000):
+        """Writes the given content to the JSON file."""
+        with open(self.path, 'wb') as writer:
+            writer.write(content)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_should_reuse_template_until_modified(self):
+        """Should read the file again when its modification time or size changes."""
+        (template, hit) = self.cache.get(self.path)
+        self.assertFalse(hit)
+        self.assertEqual(template.render(lambda name: 1), u'{\n"key": 1}')
+        self.assertEqual(self.cache.get(self.path), (template, True))
+        self.write(b'{"key": ${value}}', 1000000001)
+        (template, hit) = self.cache.get(self.path)
+        self.assertFalse(hit)
+        self.assertEqual(template.render(lambda name: 2), u'{"key": 2}')
+        self.assertEqual(self.cache.statistics(), {'entries': 1, 'hits': 1, 'misses': 2})
+        self.cache.clear()
+        self.assertEqual(self.cache.statistics(), {'entries': 0, 'hits': 0, 'misses': 0})
+
+    def test_should_read_large_file_through_memory_map(self):
+        """Should read files from the memory map size through a memory map."""
+        self.cache.mmap_bytes = 1
+        with mock.patch('ExtendedRequestsLibrary.templatecache.mmap.mmap',
+                        wraps=mmap.mmap) as memory_map:
+            (template, _) = self.cache.get(self.path)
+            self.assertEqual(memory_map.call_count, 1)
+        self.assertEqual(template.render(lambda name: u'é'), u'{\n"key": é}')
+        self.write(b'')
+        self.assertEqual(self.cache.get(self.path)[0].render(None), u'')
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from json import dumps
+from os.path import join
+from shutil import rmtree
+from sys import path
+from tempfile import mkdtemp
+from time import time
+import unittest
+from ExtendedRequestsLibrary.tokencache import TokenCache
+import mock
+path.append('src')
+
+
+class TokenCacheTests(unittest.TestCase):
+    """Token cache test class."""
+
+    def setUp(self):
+        """Instantiate the token cache class."""
+        self.directory = mkdtemp()
+        self.cache = TokenCache(join(self.directory, 'tokens.json'))
+        self.key = TokenCache.key('https://localhost/oauth/token', 'key', 'MY-USERNAME')
+
+    def tearDown(self):
+        """Remove the token cache directory."""
+        rmtree(self.directory)
+
+    def test_should_have_default_values(self):
+        """Token cache instance should have default values set."""
+        cache = TokenCache()
+        self.assertEqual(cache.leeway, 60)
+        self.assertEqual(cache.path, TokenCache.DEFAULT_PATH)
+
+    def test_should_generate_distinct_keys(self):
+        """Should generate distinct keys per token request."""
+        self.assertEqual(self.key, TokenCache.key('https://localhost/oauth/token', 'key',
+                                                  'MY-USERNAME'))
+        self.assertNotEqual(self.key, TokenCache.key('https://localhost/oauth/token', 'key'))
+        self.assertEqual(TokenCache.key('https://token', scope=['b', 'a']),
+                         TokenCache.key('https://token', scope='a b'))
+
+    def test_should_reuse_valid_token(self):
+        """Should fetch a token once and reuse it until shortly before it expires."""
+        fetcher = mock.Mock(return_value={'access_token': 'abc', 'expires_in': 3600})
+        token = self.cache.fetch(self.key, fetcher)
+        self.assertEqual(token['access_token'], 'abc')
+        cached = TokenCache(self.cache.path).fetch(self.key, fetcher)
+        self.assertEqual(cached['access_token'], 'abc')
+        self.assertTrue(cached['expires_at'] > time())
+        self.assertEqual(fetcher.call_count, 1)
+
+    def test_should_fetch_expiring_token(self):
+        """Should fetch a new token when the cached one expires within the leeway."""
+        with open(self.cache.path, 'w') as writer:
+            writer.write(dumps({self.key: {'access_token': 'old', 'expires_at': time() + 30}}))
+        fetcher = mock.Mock(return_value={'access_token': 'new', 'expires_at': time() + 3600})
+        self.assertEqual(self.cache.fetch(self.key, fetcher)['access_token'], 'new')
+        self.assertEqual(self.cache.fetch(self.key, fetcher)['access_token'], 'new')
+        self.assertEqual(fetcher.call_count, 1)
+
+    def test_should_not_cache_token_without_expiry(self):
+        """Should not cache a token without expiry."""
+        fetcher = mock.Mock(return_value={'access_token': 'abc'})
+        self.cache.fetch(self.key, fetcher)
+        self.cache.fetch(self.key, fetcher)
+        self.assertEqual(fetcher.call_count, 2)
+
+    def test_should_ignore_unreadable_cache(self):
+        """Should treat an unreadable cache file as empty."""
+        with open(self.cache.path, 'w') as writer:
+            writer.write('{not json')
+        fetcher = mock.Mock(return_value={'access_token': 'abc', 'expires_in': 3600})
+        self.assertEqual(self.cache.fetch(self.key, fetcher)['access_token'], 'abc')
+        self.assertEqual(fetcher.call_count, 1)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+from sys import path
+from time import time
+import unittest
+from ExtendedRequestsLibrary.tokenrefresher import TokenRefresher
+import mock
+path.append('src')
+
+
+class TokenRefresherTests(unittest.TestCase):
+    """Token refresher test class."""
+
+    def setUp(self):
+        """Instantiate the token refresher class."""
+        self.auth = mock.Mock()
+        self.fetcher = mock.Mock(return_value={'access_token': 'fetched'})
+        self.request = ('https://localhost/api', {'key': 'value'}, 'data')
+        self.session = mock.Mock(timeout=(10.0, 90.0))
+        self.token_url = 'https://localhost/oauth/token'
+        self.refresher = TokenRefresher(self.session, self.fetcher, self.token_url,
+                                        auth=self.auth, verify=False)
+
+    def test_should_have_default_values(self):
+        """Token refresher instance should have default values set."""
+        self.assertEqual(self.refresher.count, 0)
+        self.assertEqual(self.refresher.leeway, 60)
+        self.assertEqual(self.refresher.refresh_kwargs, {'auth': self.auth, 'verify': False})
+
+    def test_should_not_refresh_valid_token(self):
+        """Should not renew a token that does not expire within the leeway."""
+        self.session.token = {'access_token': 'abc', 'expires_at': time() + 3600}
+        self.assertEqual(self.refresher(*self.request), self.request)
+        self.assertFalse(self.session.refresh_token.called)
+        self.assertFalse(self.fetcher.called)
+        self.assertEqual(self.refresher.count, 0)
+
+    def test_should_not_refresh_token_without_expiry(self):
+        """Should not renew a token without expiry."""
+        self.session.token = {'access_token': 'abc'}
+        self.assertEqual(self.refresher(*self.request), self.request)
+        self.assertFalse(self.refresher.is_expiring())
+        self.assertEqual(self.refresher.count, 0)
+
+    def test_should_refresh_expiring_token_with_refresh_token(self):
+        """Should renew an expiring token through the refresh token grant."""
+        self.session.token = {'access_token': 'abc', 'expires_at': time() + 30,
+                              'refresh_token': 'xyz'}
+        self.assertEqual(self.refresher(*self.request), self.request)
+        self.session.refresh_token.assert_called_with(self.token_url, auth=self.auth,
+                                                      timeout=(10.0, 90.0), verify=False)
+        self.assertFalse(self.fetcher.called)
+        self.assertEqual(self.refresher.count, 1)
+
+    def test_should_refresh_token_within_session_timeouts(self):
+        """Should renew an expiring token with the current session timeouts."""
+        self.session.token = {'access_token': 'abc', 'expires_at': time() + 30,
+                              'refresh_token': 'xyz'}
+        self.session.timeout = (1.0, 5.0)
+        self.refresher.refresh()
+        self.session.refresh_token.assert_called_with(self.token_url, auth=self.auth,
+                                                      timeout=(1.0, 5.0), verify=False)
+        self.refresher.refresh_kwargs['timeout'] = 2.0
+        self.refresher.refresh()
+        self.session.refresh_token.assert_called_with(self.token_url, auth=self.auth,
+                                                      timeout=2.0, verify=False)
+
+    def test_should_fetch_expiring_token_without_refresh_token(self):
+        """Should fetch a new token when there is no refresh token."""
+        self.session.token = {'access_token': 'abc', 'expires_at': time() - 1}
+        self.refresher(*self.request)
+        self.assertFalse(self.session.refresh_token.called)
+        self.assertEqual(self.session.token, {'access_token': 'fetched'})
+        self.assertEqual(self.refresher.count, 1)
+
+    def test_should_fetch_token_when_refresh_fails(self):
+        """Should fetch a new token when the refresh token grant fails."""
+        self.session.token = {'access_token': 'abc', 'expires_at': time(),
+                              'refresh_token': 'xyz'}
+        self.session.refresh_token.side_effect = RuntimeError('invalid_grant')
+        self.refresher(*self.request)
+        self.assertEqual(self.session.token, {'access_token': 'fetched'})
+        self.assertEqual(self.refresher.count, 1)
+
+    def test_should_not_refresh_while_refreshing(self):
+        """Should not renew again for token requests sent while renewing."""
+        self.session.token = {'access_token': 'abc', 'expires_at': time()}
+        self.fetcher.side_effect = lambda: self.refresher(*self.request) and {'expires_at': 0}
+        self.refresher(*self.request)
+        self.assertEqual(self.fetcher.call_count, 1)
+        self.assertEqual(self.refresher.count, 1)
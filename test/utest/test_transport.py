@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+import socket
+from sys import path
+from threading import Thread
+import unittest
+from ExtendedRequestsLibrary.circuitbreaker import CircuitBreaker
+from ExtendedRequestsLibrary.transport import HTTP2Adapter, SessionAdapter
+from ExtendedRequestsLibrary.transport import TimedHTTPConnectionPool
+import mock
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError, ConnectTimeout
+from requests.exceptions import ReadTimeout
+path.append('src')
+
+
+class HTTP2AdapterTests(unittest.TestCase):
+    """HTTP/2 adapter test class."""
+
+    def setUp(self):
+        """Replace httpx, and prepare a request."""
+        patcher = mock.patch('ExtendedRequestsLibrary.transport.httpx')
+        self.httpx = patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in ('ConnectTimeout', 'ProxyError', 'TimeoutException', 'TransportError'):
+            setattr(self.httpx, name, type(name, (Exception,), {}))
+        self.response = self.httpx.HTTPTransport().handle_request.return_value
+        self.response.headers.items.return_value = [('Content-Type', 'text/plain')]
+        self.response.headers.multi_items.return_value = [('Set-Cookie', 'a=1'),
+                                                          ('Set-Cookie', 'b=2')]
+        self.response.http_version = 'HTTP/2'
+        self.response.iter_bytes.return_value = iter([b'ab', b'c'])
+        self.response.reason_phrase = 'OK'
+        self.response.status_code = 200
+        self.request = requests.Request('POST', 'https://localhost/api', data=b'body',
+                                        headers={'Connection': 'keep-alive'}).prepare()
+
+    @mock.patch('ExtendedRequestsLibrary.transport.httpx', None)
+    def test_should_require_httpx(self):
+        """Should fail to create the adapter without httpx."""
+        with self.assertRaises(RuntimeError):
+            HTTP2Adapter()
+
+    def test_should_send_request_as_http2_stream(self):
+        """Should send the request without connection headers, and return a requests
+        response."""
+        adapter = HTTP2Adapter(pool_maxsize=5, max_retries=2)
+        response = adapter.send(self.request, timeout=(1.0, 2.0), verify=False)
+        self.assertEqual(self.httpx.HTTPTransport.call_args[1]['http1'], True)
+        self.assertEqual(self.httpx.HTTPTransport.call_args[1]['retries'], 2)
+        (method, url) = self.httpx.Request.call_args[0]
+        kwargs = self.httpx.Request.call_args[1]
+        self.assertEqual((method, url), ('POST', 'https://localhost/api'))
+        self.assertEqual(kwargs['content'], b'body')
+        self.assertEqual(kwargs['extensions']['timeout'],
+                         {'connect': 1.0, 'pool': 1.0, 'read': 2.0, 'write': 2.0})
+        self.assertTrue('connection' not in [name.lower() for (name, _) in kwargs['headers']])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['content-type'], 'text/plain')
+        self.assertEqual(response.content, b'abc')
+        self.assertEqual(response.cookies.get_dict(), {'a': '1', 'b': '2'})
+        self.assertEqual(response.raw.version, 20)
+        self.assertEqual(sorted(response.timings.keys()), ['connect', 'dns', 'tls', 'ttfb'])
+
+    def test_should_reuse_transport(self):
+        """Should reuse the transport of the same scheme, TLS and proxy settings."""
+        adapter = HTTP2Adapter()
+        adapter.send(self.request)
+        self.response.iter_bytes.return_value = iter([])
+        adapter.send(self.request)
+        adapter.send(requests.Request('GET', 'http://localhost/api').prepare())
+        transports = [call for call in self.httpx.HTTPTransport.call_args_list if call[1]]
+        self.assertEqual([call[1]['http1'] for call in transports], [True, False])
+        adapter.close()
+        self.httpx.HTTPTransport().close.assert_called_with()
+
+    def test_should_raise_requests_errors(self):
+        """Should raise requests errors for httpx errors."""
+        adapter = HTTP2Adapter()
+        for (error, expected) in ((self.httpx.ConnectTimeout, ConnectTimeout),
+                                  (self.httpx.TimeoutException, ReadTimeout),
+                                  (self.httpx.TransportError, RequestsConnectionError)):
+            self.httpx.HTTPTransport().handle_request.side_effect = error('boom')
+            with self.assertRaises(expected):
+                adapter.send(self.request)
+
+
+class SessionAdapterTests(unittest.TestCase):
+    """Session adapter test class."""
+
+    def setUp(self):
+        """Listen on a local port, and prepare a request."""
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(10)
+        self.url = 'http://localhost:%d/api/users/42' % self.listener.getsockname()[1]
+        self.request = requests.Request('GET', 'https://localhost/api').prepare()
+
+    def tearDown(self):
+        """Close the listener."""
+        self.listener.close()
+
+    def serve(self, count):
+        """Answer the given number of requests on a single connection in background."""
+        def target():
+            """Send a fixed response for each received request."""
+            (conn, _) = self.listener.accept()
+            received = b''
+            for _ in range(count):
+                while b'\r\n\r\n' not in received:
+                    received += conn.recv(4096)
+                received = received.split(b'\r\n\r\n', 1)[1]
+                conn.sendall(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok')
+            conn.close()
+        thread = Thread(target=target)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def test_should_time_request_phases(self):
+        """Should record phase durations, without connection phases on reused connections."""
+        session = requests.Session()
+        session.mount('http://', SessionAdapter())
+        thread = self.serve(2)
+        try:
+            first = session.get(self.url, timeout=5)
+            second = session.get(self.url, timeout=5)
+        finally:
+            session.close()
+            thread.join(5)
+        self.assertEqual(first.content, b'ok')
+        self.assertEqual(sorted(first.timings.keys()), ['connect', 'dns', 'tls', 'ttfb'])
+        self.assertTrue(first.timings['dns'] > 0)
+        self.assertTrue(first.timings['connect'] > 0)
+        self.assertEqual(first.timings['tls'], 0)
+        self.assertEqual([second.timings['dns'], second.timings['connect']], [0, 0])
+        self.assertTrue(second.timings['ttfb'] > 0)
+        self.assertTrue(second.received_at >= first.received_at)
+
+    def test_should_use_timed_connection_pools(self):
+        """Should create timed connection pools."""
+        adapter = SessionAdapter()
+        pool = adapter.poolmanager.connection_from_url(self.url)
+        self.assertIsInstance(pool, TimedHTTPConnectionPool)
+        pool.close()
+
+    @mock.patch.object(HTTPAdapter, 'send')
+    def test_should_send_without_circuit_breaker(self, mock_send):
+        """Should send requests without circuit breaker."""
+        adapter = SessionAdapter(pool_maxsize=5)
+        self.assertIsNone(adapter.circuit_breaker)
+        self.assertEqual(adapter.send(self.request, timeout=1), mock_send.return_value)
+        mock_send.assert_called_with(self.request, timeout=1)
+
+    @mock.patch.object(HTTPAdapter, 'send')
+    def test_should_record_circuit_breaker_outcome(self, mock_send):
+        """Should record connection errors and timeouts, and fail at once when open."""
+        breaker = CircuitBreaker(threshold=2)
+        adapter = SessionAdapter(circuit_breaker=breaker)
+        mock_send.side_effect = [RequestsConnectionError(), ValueError(), ReadTimeout(),
+                                 ReadTimeout()]
+        with self.assertRaises(RequestsConnectionError):
+            adapter.send(self.request)
+        with self.assertRaises(ValueError):
+            adapter.send(self.request)
+        for _ in range(2):
+            with self.assertRaises(ReadTimeout):
+                adapter.send(self.request)
+        with self.assertRaises(RequestsConnectionError):
+            adapter.send(self.request)
+        self.assertEqual(mock_send.call_count, 4)
+        self.assertEqual(breaker.states()['https://localhost:443']['state'], 'open')
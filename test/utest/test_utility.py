@@ -23,13 +23,15 @@ Extended Requests Library - a HTTP client library with OAuth2 support.
 
 from collections import namedtuple, OrderedDict
 from decimal import Decimal
+from os import fdopen, remove
 from os.path import dirname
 from sys import path
+from tempfile import mkstemp
 import unittest
 from ExtendedRequestsLibrary.keywords import Utility
+from ExtendedRequestsLibrary.templatecache import TemplateCache
 import mock
 from robot.libraries.BuiltIn import BuiltIn
-from robot.libraries.OperatingSystem import OperatingSystem
 path.append('src')
 
 
@@ -44,7 +46,7 @@ class UtilityTests(unittest.TestCase):
         """Class init should instantiate required classes."""
         # pylint: disable=protected-access
         self.assertIsInstance(self.utility._builtin, BuiltIn)
-        self.assertIsInstance(self.utility._os, OperatingSystem)
+        self.assertIsInstance(self.utility._templates, TemplateCache)
 
     def test_should_return_json(self):
         """De-serialize JSON file to JSON object correctly."""
@@ -57,6 +59,34 @@ class UtilityTests(unittest.TestCase):
         self.utility._builtin.replace_variables = mock.MagicMock(side_effect=side_effect)
         self.assertEqual(self.utility.get_json_file('%s/requests.json' % dirname(__file__)),
                          expected)
+        self.assertEqual(self.utility.get_json_file('%s/requests.json' % dirname(__file__)),
+                         expected)
+        self.assertEqual(self.utility.get_json_file_cache_statistics(),
+                         {'entries': 1, 'hits': 1, 'misses': 1})
+
+    def test_should_iterate_json_items(self):
+        """Should iterate, count and filter JSON values of a file or response."""
+        with open('%s/requests.json' % dirname(__file__), 'rb') as reader:
+            content = reader.read().replace(b'${false}', b'false').replace(b'${true}', b'true')
+        response = mock.Mock()
+        response.iter_content.side_effect = lambda chunk_size: iter(
+            [content[index:index + chunk_size] for index in range(0, len(content), chunk_size)])
+        items = list(self.utility.iterate_json_items(response, 'item.key', chunk_size='4'))
+        self.assertEqual(items, [Decimal('5.5')])
+        response.iter_content.assert_called_with(chunk_size=4)
+        self.assertEqual(self.utility.count_json_items(response), 1)
+        self.assertEqual(self.utility.count_json_items(response, condition='item["bad"]'), 0)
+        self.assertEqual(self.utility.filter_json_items(response, 'item["good"]', limit='1'),
+                         [{'bad': False, 'good': True, 'key': Decimal('5.5'), 'key2': 'value2'}])
+        self.assertEqual(self.utility.filter_json_items(response, 'True', limit='0'), [])
+        (handle, source) = mkstemp()
+        try:
+            with fdopen(handle, 'wb') as writer:
+                writer.write(content)
+            self.assertEqual(list(self.utility.iterate_json_items(source, 'item.key2')),
+                             ['value2'])
+        finally:
+            remove(source)
 
     def test_json_should_loads(self):
         """De-serialize JSON string to JSON object correctly."""
@@ -64,22 +94,36 @@ class UtilityTests(unittest.TestCase):
         expected = [{'key': Decimal(5.5), 'key2': 'value2'}]
         self.assertEqual(self.utility.json_loads(actual), expected)
 
+    def test_json_should_loads_with_backend(self):
+        """De-serialize JSON string with the set backend and number mode."""
+        self.utility.set_json_backend('stdlib', 'float')
+        self.assertEqual(self.utility.json_loads('[{"py/tuple": [5.5]}]'), [(5.5,)])
+        with self.assertRaises(ValueError):
+            self.utility.set_json_backend('unknown')
+
     def test_natural_sort_list_of_dictionaries(self):
         """Returns natural sorted list of dictionaries."""
         original = [{'key': 'value5.5'}, {'key': 'valUe2'}]
         expected = [{'key': 'valUe2'}, {'key': 'value5.5'}]
         actual = self.utility.natural_sort_list_of_dictionaries(original, 'key')
         self.assertEqual(actual, expected)
+        actual = self.utility.natural_sort_list_of_dictionaries(original, key='key')
+        self.assertEqual(actual, expected)
 
-    def test_cast_alphanumeric(self):
-        """Casts alphanumeric correctly."""
-        # pylint: disable=protected-access
-        value = self.utility._cast_alphanumeric('5')
-        self.assertTrue(isinstance(value, int))
-        self.assertEqual(value, 5)
-        value = self.utility._cast_alphanumeric('A')
-        self.assertTrue(isinstance(value, str))
-        self.assertEqual(value, 'a')
+    def test_natural_sort_list_of_dictionaries_by_keys(self):
+        """Returns natural sorted list of dictionaries by multiple keys."""
+        original = [{'a': 'x2', 'b': 1}, {'a': 'x10', 'b': 2}, {'b': 3}, {'a': 'x2', 'b': 4}]
+        actual = self.utility.natural_sort_list_of_dictionaries(original, 'a', '-b')
+        self.assertEqual([item['b'] for item in actual], [4, 1, 2, 3])
+        self.assertEqual([item['b'] for item in original], [1, 2, 3, 4])
+
+    def test_natural_top_n(self):
+        """Returns the first natural sorted dictionaries."""
+        original = [{'key': 'item%d' % index} for index in (3, 20, 1, 100)]
+        actual = self.utility.natural_top_n(original, '2', '-key')
+        self.assertEqual(actual, [{'key': 'item100'}, {'key': 'item20'}])
+        actual = self.utility.natural_top_n(original, count='1', key='key')
+        self.assertEqual(actual, [{'key': 'item1'}])
 
     def test_object_restore_dict(self):
         """Should restore dict object successfully."""
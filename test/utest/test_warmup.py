@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#    Extended Requests Library - a HTTP client library with OAuth2 support.
+#    Copyright (c) 2015, 2016 Richard Huang <rickypc@users.noreply.github.com>
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Extended Requests Library - a HTTP client library with OAuth2 support.
+"""
+
+import socket
+from sys import path
+import unittest
+from ExtendedRequestsLibrary import warmup
+from ExtendedRequestsLibrary.warmup import warm_up
+import mock
+import requests
+path.append('src')
+
+
+class WarmUpTests(unittest.TestCase):
+    """Warm up test class."""
+
+    def setUp(self):
+        """Listen on a local port."""
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(10)
+        self.url = 'http://127.0.0.1:%d' % self.listener.getsockname()[1]
+        self.session = requests.Session()
+
+    def tearDown(self):
+        """Close the listener and the session."""
+        self.listener.close()
+        self.session.close()
+
+    def get_pool(self):
+        """Returns the session connection pool of the local URL."""
+        # pylint: disable=protected-access
+        return warmup._get_pool(self.session, self.url)
+
+    def test_should_connect_inside_session_pool(self):
+        """Should open idle connections inside the session connection pool."""
+        errors = warm_up(self.session, ['%s/api' % self.url, '%s/token' % self.url],
+                         connections=3, timeout=5)
+        self.assertEqual(errors, {})
+        pool = self.get_pool()
+        self.assertEqual(pool.num_connections, 3)
+        idle = [conn for conn in list(pool.pool.queue) if conn is not None]
+        self.assertEqual(len(idle), 3)
+        self.assertTrue(all(conn.sock is not None for conn in idle))
+
+    def test_should_not_connect_more_than_pool_size(self):
+        """Should not open more connections than the pool can keep."""
+        self.session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=2,
+                                                                    pool_block=True))
+        self.assertEqual(warm_up(self.session, [self.url], connections=5, timeout=5), {})
+        self.assertEqual(self.get_pool().num_connections, 2)
+
+    def test_should_collect_connect_errors(self):
+        """Should return connection error by host."""
+        self.listener.close()
+        errors = warm_up(self.session, [self.url], timeout=5)
+        self.assertEqual(list(errors.keys()), [self.url])
+
+    def test_should_warm_up_single_url(self):
+        """Should warm up the host of a single URL given as a string."""
+        self.assertEqual(warm_up(self.session, '%s/api' % self.url, timeout=5), {})
+        self.assertEqual(self.get_pool().num_connections, 1)
+        self.listener.close()
+        other = requests.Session()
+        errors = warm_up(other, self.url, timeout=5)
+        other.close()
+        self.assertEqual(list(errors.keys()), [self.url])
+
+    def test_should_send_head_requests(self):
+        """Should send HEAD requests through the session."""
+        session = mock.Mock()
+        session.prepare_request.side_effect = lambda request: request
+        session.merge_environment_settings.return_value = {'verify': False}
+        errors = warm_up(session, [self.url, None, 'https://localhost/token'], mode='HEAD')
+        self.assertEqual(errors, {})
+        self.assertEqual(session.send.call_count, 2)
+        urls = sorted(call[0][0].url for call in session.send.call_args_list)
+        self.assertEqual(urls, [self.url, 'https://localhost/token'])
+        session.send.assert_called_with(mock.ANY, allow_redirects=False, timeout=None,
+                                        verify=False)
+
+    @mock.patch('ExtendedRequestsLibrary.warmup._head')
+    def test_should_send_head_requests_without_connection_pool(self, mock_head):
+        """Should send HEAD requests instead of connecting through adapters without pool."""
+        self.session.mount('http://', mock.Mock())
+        self.assertEqual(warm_up(self.session, [self.url], connections=2, timeout=5), {})
+        self.assertEqual(mock_head.call_count, 2)
+        mock_head.assert_called_with(self.session, (self.url, self.url), 5)
+
+    def test_should_not_warm_up_when_off(self):
+        """Should do nothing when turned off."""
+        session = mock.Mock()
+        self.assertEqual(warm_up(session, [self.url], mode='off'), {})
+        self.assertFalse(session.get_adapter.called)
+
+    def test_should_reject_unknown_mode(self):
+        """Should raise error on unknown mode."""
+        with self.assertRaises(ValueError):
+            warm_up(self.session, [self.url], mode='ping')